@@ -0,0 +1,433 @@
+import os
+import sys
+import hmac
+import json
+import time
+import queue
+import socket
+import threading
+import ipaddress
+import socketserver
+
+from jobs import start_process, terminate_tree
+from streaming import ProcessOutputStream
+
+# Protocol: one JSON object per line in each direction. The dispatcher sends
+# {"type": "run", "command", "cwd", "env", "token"} and may later send {"type": "cancel", "force"};
+# the agent answers "started" (or "busy"/"error"), then "output" lines and a final "exit".
+
+DEFAULT_AGENT_PORT = 8765
+TOKEN_ENV = 'UECMD_AGENT_TOKEN'  # shared secret agents require and dispatchers send, if set
+CONNECT_TIMEOUT = 3.0
+# Seconds before an agent that could not be reached is tried again
+OFFLINE_RETRY = 30.0
+# Seconds before an agent that was busy with other dispatchers' jobs is asked again
+BUSY_RETRY = 5.0
+# Seconds a job whose dispatcher disconnected gets to exit before it is killed
+ORPHAN_GRACE = 10.0
+
+
+class AgentBusy(Exception):
+    """The agent has no free slot"""
+
+
+class AgentError(Exception):
+    """The agent refused or could not start a job"""
+
+
+def parse_address(address):
+    """(host, port) of 'host' or 'host:port'"""
+    host, _, port = address.strip().rpartition(':')
+    if not host:
+        return address.strip(), DEFAULT_AGENT_PORT
+    return host, int(port)
+
+
+def is_loopback(host):
+    """True if host only accepts connections from this machine"""
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def token_matches(expected, given):
+    """Constant-time comparison of the agent token with the one a dispatcher sent"""
+    return isinstance(given, str) and hmac.compare_digest(expected.encode('utf-8'), given.encode('utf-8'))
+
+
+def valid_request(request):
+    """True for a run request with the fields the agent needs, of the right types"""
+    return (isinstance(request, dict) and request.get('type') == 'run'
+            and isinstance(request.get('command'), str) and isinstance(request.get('cwd'), str)
+            and (request.get('env') is None or (isinstance(request['env'], dict)
+                                                and all(isinstance(key, str) and isinstance(value, str)
+                                                        for key, value in request['env'].items()))))
+
+
+def encode(message):
+    return (json.dumps(message) + '\n').encode('utf-8')
+
+
+class AgentHandler(socketserver.StreamRequestHandler):
+    """Run one job for one dispatcher connection and stream it back"""
+
+    wbufsize = 64 * 1024  # output is flushed whenever the job has nothing more queued
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+        server = self.server
+        if server.token and not (isinstance(request, dict) and token_matches(server.token, request.get('token'))):
+            self.send({'type': 'error', 'message': "Agent token does not match"})
+            return
+        if not valid_request(request):
+            self.send({'type': 'error', 'message': "Malformed run request"})
+            return
+        with server.lock:
+            if server.running >= server.slots:
+                self.send({'type': 'busy', 'slots': server.slots})
+                return
+            server.running += 1
+        try:
+            self.run(request)
+        finally:
+            with server.lock:
+                server.running -= 1
+
+    def send(self, message):
+        self.wfile.write(encode(message))
+        self.wfile.flush()
+
+    def run(self, request):
+        try:
+            process = start_process(request['command'], request['cwd'], request.get('env'))
+        except Exception as e:
+            self.send({'type': 'error', 'message': str(e)})
+            return
+        server = self.server
+        server.log(f"Started job for {self.client_address[0]} in {request['cwd']}: {request['command']}")
+        self.send({'type': 'started', 'pid': process.pid, 'slots': server.slots, 'host': socket.gethostname()})
+        self.job_done = threading.Event()
+        threading.Thread(target=self.follow_dispatcher, args=(process,), daemon=True).start()
+
+        # Keep reading after the dispatcher is gone so the job never blocks on a full pipe
+        connected = True
+        stream = ProcessOutputStream(process)
+        for tag, line in stream:
+            if not connected:
+                continue
+            try:
+                self.wfile.write(encode({'type': 'output', 'tag': tag, 'line': line}))
+                if stream.lines.empty():
+                    self.wfile.flush()
+            except OSError:
+                connected = False
+        process.wait()
+        self.job_done.set()
+        server.log(f"Job for {self.client_address[0]} exited with code {process.returncode}")
+        if connected:
+            try:
+                self.send({'type': 'exit', 'returncode': process.returncode})
+            except OSError:
+                pass
+
+    def follow_dispatcher(self, process):
+        """Apply cancel requests, and stop the job if the dispatcher goes away first
+
+        Cancels are applied even after the shell itself exited, since the rest
+        of its process group may still be running.
+        """
+        try:
+            for raw in self.rfile:
+                message = json.loads(raw)
+                if message.get('type') == 'cancel':
+                    try:
+                        terminate_tree(process, force=message.get('force', False))
+                    except OSError:
+                        pass
+        except (OSError, ValueError):
+            pass
+        if not self.job_done.is_set():
+            self.server.log(f"Lost dispatcher {self.client_address[0]}, stopping its job")
+            self.stop(process)
+
+    def stop(self, process):
+        """Stop the job's process tree, killing it if it is still running ORPHAN_GRACE seconds later"""
+        try:
+            terminate_tree(process)
+        except OSError:
+            return
+        if not self.job_done.wait(ORPHAN_GRACE):
+            try:
+                terminate_tree(process, force=True)
+            except OSError:
+                pass
+
+
+class AgentServer(socketserver.ThreadingTCPServer):
+    """Worker agent: runs jobs sent by UECmd dispatchers, at most slots at a time"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, slots=1, token=None, log=print):
+        super().__init__(address, AgentHandler)
+        self.slots = max(1, slots)
+        self.token = token
+        self.running = 0
+        self.lock = threading.Lock()
+        self.log = log
+
+
+class RemoteProcess:
+    """A job running on a worker agent, with the process and output stream interface the scheduler uses
+
+    The constructor connects, sends the job and waits for the agent to start
+    it, raising AgentBusy, AgentError or OSError if it does not.
+    """
+
+    def __init__(self, agent, command, cwd, env=None, token=None, max_queued_lines=20000):
+        self.agent = agent
+        self.returncode = None
+        self.error = None
+        self.lines = queue.Queue(maxsize=max_queued_lines)
+        self.done = False
+        self.cancelled = False
+        self.send_lock = threading.Lock()
+        self.sock = socket.create_connection((agent.host, agent.port), timeout=CONNECT_TIMEOUT)
+        try:
+            self.rfile = self.sock.makefile('rb')
+            self.send({'type': 'run', 'command': command, 'cwd': cwd, 'env': env, 'token': token})
+            reply = json.loads(self.rfile.readline() or b'{}')
+        except (OSError, ValueError):
+            self.sock.close()
+            raise
+        if reply.get('type') != 'started':
+            self.sock.close()
+            if reply.get('type') == 'busy':
+                raise AgentBusy(reply.get('slots'))
+            raise AgentError(reply.get('message', f"Agent {agent} closed the connection"))
+        agent.slots = reply.get('slots', agent.slots)
+        self.pid = reply.get('pid')
+        self.host = reply.get('host', agent.host)
+        self.sock.settimeout(None)
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def send(self, message):
+        with self.send_lock:
+            self.sock.sendall(encode(message))
+
+    def _read(self):
+        try:
+            for raw in self.rfile:
+                message = json.loads(raw)
+                if message.get('type') == 'output':
+                    self.put((message['tag'], message['line']))
+                elif message.get('type') == 'exit':
+                    self.returncode = message['returncode']
+                    break
+        except (OSError, ValueError):
+            pass
+        finally:
+            if self.returncode is None:
+                self.error = f"Lost connection to agent {self.agent}"
+                self.put(('stderr', self.error + '\n'))
+                self.returncode = -1
+            self.sock.close()
+            self.agent.release()
+            self.done = True
+
+    def put(self, item):
+        """Queue a line, waiting while the queue is full unless the job was cancelled
+
+        Once cancelled nobody drains the queue, so lines are dropped rather
+        than blocking the socket and, through it, the agent.
+        """
+        while not self.cancelled:
+            try:
+                self.lines.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                pass
+
+    def poll(self):
+        return self.returncode if self.done else None
+
+    def cancel(self, force=False):
+        """Ask the agent to stop the job's process tree"""
+        self.cancelled = True
+        try:
+            self.send({'type': 'cancel', 'force': force})
+        except OSError:
+            pass
+
+    def drain(self, max_lines=5000):
+        """Return up to max_lines received (tag, line) pairs without blocking"""
+        batch = []
+        while len(batch) < max_lines:
+            try:
+                batch.append(self.lines.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def __iter__(self):
+        """Yield (tag, line) pairs until the job has exited and all output is read"""
+        while not self.finished:
+            try:
+                yield self.lines.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    @property
+    def finished(self):
+        return self.done and self.lines.empty()
+
+
+class Agent:
+    """A worker agent address and the jobs this dispatcher is running on it"""
+
+    def __init__(self, address):
+        self.address = address
+        self.host, self.port = parse_address(address)
+        self.slots = 1  # learned from the agent once it accepts a job
+        self.running = 0
+        self.offline_until = 0.0
+        self.busy_until = 0.0
+        self.lock = threading.Lock()
+
+    def __str__(self):
+        return self.address
+
+    @property
+    def free(self):
+        now = time.time()
+        return self.running < self.slots and now >= self.offline_until and now >= self.busy_until
+
+    def release(self):
+        with self.lock:
+            self.running -= 1
+
+
+class Connection:
+    """Connect a job to an agent and wait for it to start, on a worker thread"""
+
+    def __init__(self, agent, job, token):
+        self.agent = agent
+        self.remote = None
+        self.error = None  # AgentError the agent refused the job with
+        self.abandoned = False
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        threading.Thread(target=self.run, args=(job.command, job.cwd, job.env, token), daemon=True).start()
+
+    def run(self, command, cwd, env, token):
+        agent = self.agent
+        try:
+            self.remote = RemoteProcess(agent, command, cwd, env, token)
+        except AgentBusy:
+            agent.release()
+            agent.busy_until = time.time() + BUSY_RETRY
+        except (OSError, ValueError):
+            agent.release()
+            agent.offline_until = time.time() + OFFLINE_RETRY
+        except AgentError as e:
+            agent.release()
+            self.error = e
+        with self.lock:
+            self.done.set()
+            abandoned = self.abandoned
+        if abandoned and self.remote is not None:
+            self.remote.cancel(force=True)  # the job was cancelled while it was being dispatched
+
+    def abandon(self):
+        """Cancel the job on the agent once it started there, or right away if it already has"""
+        with self.lock:
+            self.abandoned = True
+            started = self.done.is_set()
+        if started and self.remote is not None:
+            self.remote.cancel(force=True)
+
+
+class AgentPool:
+    """Worker agents package jobs are dispatched to, whichever has a free slot first
+
+    Connecting and the start handshake happen on worker threads, so an
+    unreachable or slow agent never blocks the thread polling the scheduler.
+    """
+
+    def __init__(self, addresses=(), token=None):
+        self.agents = {}
+        self.token = os.environ.get(TOKEN_ENV) if token is None else token
+        self.connecting = {}  # job -> Connection still being made or not yet collected
+        self.configure(addresses)
+
+    def configure(self, addresses):
+        """Use these agent addresses, keeping the state of agents already known"""
+        self.agents = {address: self.agents.get(address) or Agent(address) for address in addresses}
+
+    def accepts(self, job):
+        """True if the job should wait for an agent rather than run on this machine
+
+        Only package jobs not pinned to this machine are dispatched, and only
+        while some agent is not known to be unreachable; otherwise they run
+        here as before.
+        """
+        now = time.time()
+        return job.kind == 'package' and not job.local and any(now >= agent.offline_until for agent in self.agents.values())
+
+    def start(self, job):
+        """The job's RemoteProcess once an agent started it, or None while it is not started yet
+
+        Without a connection under way, one is begun to the first free
+        agent; call again on a later poll to collect it. An agent that was
+        busy or unreachable is skipped for a while and the next call tries
+        another. Raises AgentError if the agent refused the job.
+        """
+        connection = self.connecting.get(job)
+        if connection is not None:
+            if not connection.done.is_set():
+                return None
+            del self.connecting[job]
+            if connection.error is not None:
+                raise connection.error
+            if connection.remote is not None:
+                return connection.remote
+        for agent in list(self.agents.values()):
+            if not agent.free:
+                continue
+            # Counted before connecting, since a very short job may release its slot at once
+            with agent.lock:
+                agent.running += 1
+            self.connecting[job] = Connection(agent, job, self.token)
+            return None
+        return None
+
+    def forget(self, job):
+        """Abandon a queued job's dispatch; a job the agent starts anyway is cancelled there"""
+        connection = self.connecting.pop(job, None)
+        if connection is not None:
+            connection.abandon()
+
+
+def serve_agent(host='127.0.0.1', port=DEFAULT_AGENT_PORT, slots=1, token=None):
+    """Run a worker agent until interrupted
+
+    The agent runs whatever command it is sent, so it only listens beyond
+    this machine when a token is set.
+    """
+    token = os.environ.get(TOKEN_ENV) if token is None else token
+    if not token and not is_loopback(host):
+        print(f"Refusing to listen on {host} without a token; set {TOKEN_ENV} on the agent and the "
+              f"dispatchers, or listen on 127.0.0.1", file=sys.stderr)
+        return 2
+    with AgentServer((host, port), slots, token) as server:
+        print(f"UECmd agent listening on {host}:{port} with {server.slots} slot(s)", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
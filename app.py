@@ -0,0 +1,1589 @@
+import tkinter as tk
+from tkinter import messagebox, filedialog, ttk
+import os
+import time
+import threading
+from datetime import datetime
+from logview import LogView, LogSpool
+from profiles import ProfileStore
+from command_history import CommandHistory, MAX_SUGGESTIONS
+from jobs import Job, JobScheduler, DONE, CANCELLED, format_duration, format_size
+from procmon import ResourceMonitor, monitoring_available, format_rate
+from agents import AgentPool
+from shellsession import ShellSessions
+from cooktune import apply_cook_tuning
+from ddcwarm import prewarm_job, prewarms, with_prewarm, prewarm_report
+from workspaces import isolate_settings, isolate_job
+from logfollow import follow_package_logs
+from uatparse import UATOutputParser, format_summary
+from uat import (DEFAULT_PACKAGE_SETTINGS, PLATFORMS, CONFIGURATIONS, build_package_command,
+                 split_list, plan_matrix, run_params, get_cook_process_count, pipelined, pipeline_steps,
+                 package_run_commands)
+from build_history import BuildHistory, run_key, format_time
+from fingerprint import FingerprintIndex
+from artifacts import restore_cached_build, store_build
+from copystage import sync_targets, sync_staged_build, format_progress
+from hashing import FileHasher, HashCache
+
+class SimpleApp:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Command Runner")
+        self.root.geometry("800x800")  # Increased initial size
+        
+        # Set color scheme (Unreal Engine inspired)
+        self.colors = {
+            'bg_dark': '#1B1B1B',
+            'bg_medium': '#2A2A2A',
+            'bg_light': '#303030',
+            'text': '#CCCCCC',
+            'accent': '#2196F3',
+            'accent_hover': '#1E88E5',
+            'error': '#FF4444',
+            'success': '#4CAF50'
+        }
+        
+        # Configure root window colors
+        self.root.configure(bg=self.colors['bg_dark'])
+        
+        # Configure styles
+        self.style = ttk.Style()
+        self.style.theme_use('default')
+        self.style.configure('Custom.TCombobox',
+                           fieldbackground=self.colors['bg_light'],
+                           background=self.colors['bg_medium'],
+                           foreground=self.colors['text'],
+                           selectbackground=self.colors['accent'],
+                           selectforeground=self.colors['text'])
+        self.style.map('Custom.TCombobox',
+                      fieldbackground=[('readonly', self.colors['bg_light'])],
+                      selectbackground=[('readonly', self.colors['accent'])],
+                      foreground=[('readonly', self.colors['text'])])
+        self.style.configure('Custom.TNotebook',
+                           background=self.colors['bg_dark'])
+        self.style.configure('Custom.TNotebook.Tab',
+                           background=self.colors['bg_medium'],
+                           foreground=self.colors['text'],
+                           padding=[10, 2])
+        self.style.map('Custom.TNotebook.Tab',
+                      background=[('selected', self.colors['accent'])],
+                      foreground=[('selected', self.colors['text'])])
+        self.style.configure('Custom.Treeview',
+                           background=self.colors['bg_medium'],
+                           fieldbackground=self.colors['bg_medium'],
+                           foreground=self.colors['text'])
+        self.style.configure('Custom.Treeview.Heading',
+                           background=self.colors['bg_light'],
+                           foreground=self.colors['text'])
+        self.style.map('Custom.Treeview',
+                      background=[('selected', self.colors['accent'])])
+        
+        # Initialize state variables
+        self.profiles_file = "command_profiles.json"
+        self.build_history = BuildHistory(
+            os.path.join(os.path.dirname(os.path.abspath(self.profiles_file)), 'history'))
+        self.hasher = FileHasher(HashCache(
+            os.path.join(os.path.dirname(os.path.abspath(self.profiles_file)), 'hash_cache.json')))
+        self.block_signatures = HashCache(
+            os.path.join(os.path.dirname(os.path.abspath(self.profiles_file)), 'block_signatures.json'),
+            max_entries=20000)
+        self.fingerprint_indexes = {}
+        self.command_histories = {}  # working dir -> CommandHistory
+        self.working_dir = ""
+        self.output_visible = False
+        self.scheduler = JobScheduler(max_concurrency=2)
+        self.scheduler.monitor = ResourceMonitor()
+        self.scheduler.agents = AgentPool()
+        self.scheduler.shells = ShellSessions()
+        self.pump_scheduled = False
+        self.applying_settings = False
+        self.output_pump_interval = 50  # ms between queue drains
+        self.output_batch_lines = 5000  # max lines inserted per drain
+        
+        # Load profiles before creating UI
+        self.load_profiles()
+        
+        # Create top frame for directory selection
+        self.top_frame = tk.Frame(self.root, bg=self.colors['bg_dark'], padx=5, pady=5)
+        self.top_frame.pack(fill='x')
+        
+        # Create directory selection in top
+        self.dir_frame = tk.Frame(self.top_frame, bg=self.colors['bg_dark'])
+        self.dir_frame.pack(fill='x')
+        
+        # Create directory dropdown frame
+        self.dir_dropdown_frame = tk.Frame(self.dir_frame, bg=self.colors['bg_dark'])
+        self.dir_dropdown_frame.pack(side='left', fill='x', expand=True)
+        
+        self.dir_label = tk.Label(
+            self.dir_dropdown_frame,
+            text="Directory:",
+            font=("Arial", 9),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        )
+        self.dir_label.pack(side='left')
+        
+        # Create directory dropdown
+        self.dir_var = tk.StringVar()
+        self.dir_dropdown = ttk.Combobox(
+            self.dir_dropdown_frame,
+            textvariable=self.dir_var,
+            font=("Consolas", 10),
+            style='Custom.TCombobox'
+        )
+        self.dir_dropdown.pack(side='left', fill='x', expand=True, padx=(5, 5))
+        self.dir_dropdown.bind('<<ComboboxSelected>>', self.on_dir_selected)
+        
+        # Create browse button
+        self.browse_button = tk.Button(
+            self.dir_frame,
+            text="Browse...",
+            command=self.browse_directory,
+            font=("Arial", 9),
+            bg=self.colors['accent'],
+            fg=self.colors['text'],
+            activebackground=self.colors['accent_hover'],
+            activeforeground=self.colors['text'],
+            relief='flat',
+            padx=10
+        )
+        self.browse_button.pack(side='right')
+        
+        # Create notebook (tabs container)
+        self.notebook = ttk.Notebook(self.root, style='Custom.TNotebook')
+        self.notebook.pack(fill='both', expand=True, padx=5, pady=5)
+        
+        # Create Command tab
+        self.cmd_tab = tk.Frame(self.notebook, bg=self.colors['bg_dark'])
+        self.notebook.add(self.cmd_tab, text='Cmd')
+        
+        # Create Package tab
+        self.package_tab = tk.Frame(self.notebook, bg=self.colors['bg_dark'])
+        self.notebook.add(self.package_tab, text='Package')
+        
+        # Create Jobs tab
+        self.jobs_tab = tk.Frame(self.notebook, bg=self.colors['bg_dark'])
+        self.notebook.add(self.jobs_tab, text='Jobs')
+        
+        # Setup Command tab
+        self.setup_cmd_tab()
+        
+        # Setup Package tab
+        self.setup_package_tab()
+        
+        # Setup Jobs tab
+        self.setup_jobs_tab()
+        self.scheduler.on_change = self.on_job_changed
+        
+        # Initialize UI state
+        self.update_dir_display()
+        self.command_dropdown['values'] = []
+        self.command_var.set("")
+        
+        # Configure hover effects for buttons
+        for button in [self.browse_button, self.button]:
+            button.bind('<Enter>', lambda e, b=button: b.configure(
+                bg=self.colors['accent_hover']))
+            button.bind('<Leave>', lambda e, b=button: b.configure(
+                bg=self.colors['accent']))
+    
+    def load_profiles(self):
+        """Open the profiles database; each directory's profile is read when first selected"""
+        self.profile_store = ProfileStore(self.profiles_file)
+        self.profiles = self.profile_store.data
+    
+    def on_close(self):
+        """Flush pending profile changes and stop running jobs before closing the window"""
+        self.profile_store.close()
+        # Stop running jobs and their whole process trees so no cooker outlives the window
+        self.scheduler.shutdown()
+        self.scheduler.shells.close()
+        self.scheduler.monitor.stop()
+        self.root.destroy()
+        for job in self.scheduler.jobs:
+            job.log.close()
+    
+    def update_dir_dropdown(self):
+        """Update directory dropdown with saved directories"""
+        dirs = [''] + list(self.profiles.keys())
+        self.dir_dropdown['values'] = dirs
+        
+        # Set current directory in dropdown if it exists
+        if self.working_dir in dirs:
+            self.dir_var.set(self.working_dir)
+        else:
+            self.dir_var.set('')
+    
+    def on_dir_selected(self, event=None):
+        """Handle directory selection from dropdown"""
+        selected_dir = self.dir_var.get()
+        if selected_dir:
+            self.working_dir = selected_dir
+            self.update_dir_display()
+            
+            # Load package settings if they exist
+            if 'package_settings' in self.profiles.get(selected_dir, {}):
+                self.apply_package_settings(self.profiles[selected_dir]['package_settings'])
+    
+    def apply_package_settings(self, settings):
+        """Apply a set of package settings as one change: one rebuild and one save"""
+        self.applying_settings = True
+        try:
+            for param, value in settings.items():
+                if param in self.package_params:
+                    self.package_params[param].set(value)
+        finally:
+            self.applying_settings = False
+        
+        with self.profile_store.transaction():
+            package_settings = self.profiles[self.working_dir].setdefault('package_settings', {})
+            for param in settings:
+                if param in self.package_params:
+                    package_settings[param] = self.package_params[param].get()
+        self.update_package_command()
+    
+    def update_dir_display(self):
+        """Update directory display and command history"""
+        # Update directory dropdown
+        self.update_dir_dropdown()
+        
+        # Update command history based on working directory
+        history = self.command_history()
+        self.command_dropdown['values'] = history.complete('') if history else []
+        
+        # Warm shell option of this directory
+        shell = self.profiles[self.working_dir].get('shell', {}) if self.working_dir in self.profiles else {}
+        self.warm_shell_var.set(shell.get('warm', False))
+        self.shell_setup_var.set(shell.get('setup', ''))
+    
+    def browse_directory(self):
+        """Open directory browser dialog"""
+        new_dir = filedialog.askdirectory(
+            initialdir=self.working_dir if self.working_dir else None,
+            title="Select Working Directory"
+        )
+        if new_dir:  # Only update if a directory was selected
+            self.working_dir = new_dir
+            
+            # Initialize profile for this directory if it doesn't exist
+            with self.profile_store.transaction():
+                if new_dir not in self.profiles:
+                    self.profiles[new_dir] = {
+                        'commands': []
+                    }
+            
+            self.update_dir_display()
+    
+    def save_current_profile(self):
+        """Save command to current directory's profile"""
+        if self.working_dir:
+            with self.profile_store.transaction():
+                # Save command history
+                command = self.command_var.get().strip()
+                if command:
+                    self.command_history().record(command)
+                self.profiles[self.working_dir]['shell'] = {
+                    'warm': self.warm_shell_var.get(),
+                    'setup': self.shell_setup_var.get().strip()
+                }
+                
+                # Save package settings
+                if 'package_settings' not in self.profiles[self.working_dir]:
+                    self.profiles[self.working_dir]['package_settings'] = {}
+                
+                # Save all package parameters
+                for param, var in self.package_params.items():
+                    self.profiles[self.working_dir]['package_settings'][param] = var.get()
+            
+            self.command_dropdown['values'] = self.command_history().complete('')
+    
+    def command_history(self):
+        """CommandHistory of the current working directory, or None without a profile"""
+        profile = self.profiles.get(self.working_dir)
+        if profile is None:
+            return None
+        history = self.command_histories.get(self.working_dir)
+        if history is None or history.profile is not profile:
+            with self.profile_store.transaction():
+                history = self.command_histories[self.working_dir] = CommandHistory(profile)
+        return history
+    
+    def on_command_typed(self, event):
+        """Offer ranked completions for the typed text and complete the best prefix match inline"""
+        if event.keysym in ('Return', 'Escape', 'Tab', 'Up', 'Down', 'Left', 'Right', 'Home', 'End') \
+                or not (event.char or event.keysym in ('BackSpace', 'Delete')):
+            return
+        history = self.command_history()
+        if history is None:
+            return
+        widget = self.command_dropdown
+        typed = widget.get()[:widget.index(tk.INSERT)] if widget.selection_present() else widget.get()
+        matches = history.complete(typed, MAX_SUGGESTIONS)
+        widget['values'] = matches
+        # Only extend what was typed; deleting should not bring the completion straight back
+        if event.char and typed and matches and matches[0].lower().startswith(typed.lower()) \
+                and len(matches[0]) > len(typed):
+            self.command_var.set(typed + matches[0][len(typed):])
+            widget.icursor(len(typed))
+            widget.select_range(len(typed), tk.END)
+    
+    def toggle_output(self):
+        """Toggle output area visibility"""
+        self.output_visible = not self.output_visible
+        if self.output_visible:
+            self.toggle_button.config(text="▼ Hide Output")
+            self.output_container.pack(fill='both', expand=True)
+            self.root.geometry("600x400")
+        else:
+            self.toggle_button.config(text="▶ Show Output")
+            self.output_container.pack_forget()
+            self.root.geometry("600x200")
+    
+    def run_command(self):
+        """Execute the current command"""
+        if not self.working_dir:
+            messagebox.showwarning("Warning", "Please select a working directory first")
+            return
+            
+        command = self.command_var.get().strip()
+        if not command:
+            messagebox.showwarning("Warning", "Please enter a command")
+            return
+        
+        # Save command to profile
+        self.save_current_profile()
+            
+        # Queue the command; it starts as soon as a job slot is free
+        job = Job(command, command, self.working_dir, kind='cmd')
+        if self.warm_shell_var.get():
+            job.warm_shell = self.shell_setup_var.get()
+        self.submit_job(job, self.output_area,
+                        f"Running command: {command}\nWorking directory: {self.working_dir}\n\n")
+    
+    def submit_job(self, job, output_area, header, show=True):
+        """Queue a job with its own log spool and, if show is set, show that log in output_area"""
+        job.log = LogSpool()
+        job.log.write(header)
+        job.on_start = self.on_job_started
+        job.on_output = self.on_job_output
+        job.on_finish = self.on_job_finished
+        try:
+            timeout = float(self.timeout_var.get())
+        except (tk.TclError, ValueError):
+            timeout = 0
+        if timeout > 0:
+            job.timeout = timeout * 60
+        if show:
+            output_area.show(job.log)
+        self.scheduler.submit(job)
+        self.ensure_pump()
+    
+    def on_job_started(self, job):
+        """Note where a job runs, and keep the package view on the running step of a pipeline"""
+        if job.agent:
+            job.log.write(f"Running on agent {job.agent} ({job.process.host})\n\n")
+        # Follow a pipelined run from its cook step into its stage step
+        if any(other.log is self.package_output_area.spool for other in job.depends_on + job.after):
+            self.package_output_area.show(job.log)
+    
+    def on_job_output(self, job, batch):
+        """Append a batch of a job's output lines to its log"""
+        job.log.append_batch(batch)
+        if job.parser:
+            now = time.time()
+            for tag, line in batch:
+                if tag != 'log':  # followed log files repeat much of what UAT prints
+                    job.parser.feed(line, now)
+        self.refresh_job_views(job)
+    
+    def on_job_finished(self, job):
+        """Record how a job ended at the bottom of its log"""
+        job.log.end_lines()  # output that never got its newline
+        if job.error:
+            job.log.write(f"Failed to start: {job.error}\n", 'stderr')
+        else:
+            if job.parser:
+                job.parser.finish(job.finished_at)
+                job.log.write(f"\nPhases: {format_summary(job.parser)}\n")
+            if job.state == CANCELLED:
+                job.log.write(f"\n{job.cancel_reason} after {format_duration(job.elapsed)}\n", 'stderr')
+            else:
+                job.log.write(f"\nProcess exited with code {job.returncode} after {format_duration(job.elapsed)}\n")
+        
+        # Remember which inputs a successful run built and cooked from; an agent's
+        # run built from that machine's inputs and left its staged build there
+        if job.fingerprints and job.state == DONE and not job.agent:
+            index, digests = job.fingerprints
+            threading.Thread(target=index.record_success, args=(job.params, digests), daemon=True).start()
+        
+        # Copy the build to the archive directory and/or keep it in the artifact cache
+        if (job.kind == 'package' and job.state == DONE and not job.agent
+                and (job.artifact or sync_targets(job.params))):
+            threading.Thread(target=self.after_package_run, args=(job,), daemon=True).start()
+        
+        # Keep the run's timings and flag it if it was notably slower than usual
+        try:
+            for message in self.build_history.record(job):
+                job.log.write(f"Slower than usual: {message}\n", 'stderr')
+            if job.kind == 'package':
+                records = self.build_history.load(job.cwd)
+                message = prewarm_report(records, records[-1])
+                if message:
+                    job.log.write(f"{message}\n")
+        except OSError as e:
+            job.log.write(f"Could not save run history: {e}\n", 'stderr')
+        self.refresh_job_views(job)
+    
+    def after_package_run(self, job):
+        """Sync a successful package run's staged build to its targets and cache it, off the UI thread"""
+        if sync_targets(job.params):
+            def on_progress(stats):
+                self.root.after(0, self.package_status_var.set, f"{job.name}: syncing {format_progress(stats)}")
+            try:
+                messages = sync_staged_build(job.params, self.hasher, self.block_signatures, on_progress)
+            except OSError as e:
+                self.root.after(0, self.write_job_note, job, f"Could not sync the staged build: {e}", 'stderr')
+                return
+            for message in messages:
+                self.root.after(0, self.write_job_note, job, message)
+            self.root.after(0, self.package_status_var.set, f"{job.name}: {messages[-1]}")
+        
+        if job.artifact:
+            store, key = job.artifact
+            try:
+                message, tag = store_build(store, key, job.params), None
+            except OSError as e:
+                message, tag = f"Could not store the build in the artifact cache: {e}", 'stderr'
+            self.root.after(0, self.write_job_note, job, message, tag)
+    
+    def write_job_note(self, job, message, tag=None):
+        """Add a line to a job's log unless the log was already discarded"""
+        if not job.log.file.closed:
+            job.log.write(f"{message}\n", tag)
+            self.refresh_job_views(job)
+    
+    def refresh_job_views(self, job):
+        """Refresh every output area currently showing a job's log"""
+        for view in (self.output_area, self.package_output_area, self.job_output_area):
+            if view.spool is job.log:
+                view.refresh()
+    
+    def ensure_pump(self):
+        """Schedule the output pump if it is not already pending"""
+        if not self.pump_scheduled:
+            self.pump_scheduled = True
+            self.root.after(self.output_pump_interval, self.pump_output)
+    
+    def pump_output(self):
+        """Drain job output into their logs in batches and start queued jobs as slots free up"""
+        self.pump_scheduled = False
+        active = self.scheduler.poll(self.output_batch_lines)
+        for job in self.scheduler.running:
+            self.jobs_tree.set(str(job.id), 'elapsed', format_duration(job.elapsed))
+            if job.parser:
+                self.jobs_tree.set(str(job.id), 'phase', job.parser.phase or '')
+            for column, value in zip(('cpu', 'memory', 'disk'), self.resource_columns(job)):
+                self.jobs_tree.set(str(job.id), column, value)
+        self.update_package_status()
+        if active:
+            self.ensure_pump()
+
+    def setup_cmd_tab(self):
+        """Setup the Command tab UI"""
+        # Create main frame in Command tab
+        self.main_frame = tk.Frame(self.cmd_tab, bg=self.colors['bg_dark'], padx=20, pady=20)
+        self.main_frame.pack(expand=True, fill='both')
+        
+        # Create command frame
+        self.cmd_frame = tk.Frame(self.main_frame, bg=self.colors['bg_dark'])
+        self.cmd_frame.pack(fill='x', pady=(0, 10))
+        
+        self.label = tk.Label(
+            self.cmd_frame,
+            text="Enter command:",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        )
+        self.label.pack(side='left')
+        
+        # Create command input container
+        self.cmd_input_frame = tk.Frame(self.cmd_frame, bg=self.colors['bg_dark'])
+        self.cmd_input_frame.pack(side='left', fill='x', expand=True, padx=(5, 5))
+        
+        self.command_var = tk.StringVar()
+        self.command_dropdown = ttk.Combobox(
+            self.cmd_input_frame,
+            textvariable=self.command_var,
+            font=("Consolas", 12),
+            style='Custom.TCombobox'
+        )
+        self.command_dropdown.pack(side='left', fill='x', expand=True)
+        
+        # Bind Enter key to run command
+        self.command_dropdown.bind('<Return>', lambda e: self.run_command())
+        self.command_dropdown.bind('<KeyRelease>', self.on_command_typed)
+        
+        # Create button next to command input
+        self.button = tk.Button(
+            self.cmd_frame,
+            text="Run",
+            command=self.run_command,
+            font=("Arial", 12),
+            padx=15,
+            pady=0,
+            bg=self.colors['accent'],
+            fg=self.colors['text'],
+            activebackground=self.colors['accent_hover'],
+            activeforeground=self.colors['text'],
+            relief='flat'
+        )
+        self.button.pack(side='right')
+        
+        tk.Button(
+            self.cmd_frame,
+            text="Cancel",
+            command=lambda: self.cancel_shown_job(self.output_area),
+            font=("Arial", 12),
+            padx=10,
+            pady=0,
+            bg=self.colors['bg_light'],
+            fg=self.colors['text'],
+            activebackground=self.colors['accent_hover'],
+            activeforeground=self.colors['text'],
+            relief='flat'
+        ).pack(side='right', padx=(0, 5))
+        
+        # Warm shell: commands run in a shell kept open per directory, with the setup run once
+        self.shell_frame = tk.Frame(self.main_frame, bg=self.colors['bg_dark'])
+        self.shell_frame.pack(fill='x')
+        
+        self.warm_shell_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            self.shell_frame,
+            text="Warm shell",
+            variable=self.warm_shell_var,
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text'],
+            selectcolor=self.colors['bg_medium'],
+            activebackground=self.colors['bg_dark'],
+            activeforeground=self.colors['text']
+        ).pack(side='left')
+        
+        tk.Label(
+            self.shell_frame,
+            text="Setup:",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        ).pack(side='left', padx=(10, 5))
+        
+        self.shell_setup_var = tk.StringVar()
+        tk.Entry(
+            self.shell_frame,
+            textvariable=self.shell_setup_var,
+            font=("Consolas", 10),
+            bg=self.colors['bg_light'],
+            fg=self.colors['text'],
+            insertbackground=self.colors['text']
+        ).pack(side='left', fill='x', expand=True)
+        
+        # Create output section frame
+        self.output_frame = tk.Frame(self.main_frame, bg=self.colors['bg_dark'])
+        self.output_frame.pack(fill='both', expand=True, pady=(10, 0))
+        
+        self.toggle_frame = tk.Frame(self.output_frame, bg=self.colors['bg_dark'])
+        self.toggle_frame.pack(fill='x')
+        
+        self.toggle_button = tk.Button(
+            self.toggle_frame,
+            text="▼ Show Output",
+            command=self.toggle_output,
+            font=("Arial", 10),
+            relief="flat",
+            bg=self.colors['bg_medium'],
+            fg=self.colors['text'],
+            activebackground=self.colors['bg_light'],
+            activeforeground=self.colors['text'],
+            anchor="w"
+        )
+        self.toggle_button.pack(fill='x')
+        
+        self.output_container = tk.Frame(self.output_frame, bg=self.colors['bg_dark'])
+        self.output_container.pack(fill='both', expand=True)
+        self.output_container.pack_forget()  # Initially hidden
+        
+        # Output is spooled to disk; the view only holds a window of it
+        self.output_area = LogView(self.output_container, self.colors)
+        self.output_area.tag_configure('stderr', foreground=self.colors['error'])
+        self.output_area.pack(fill='both', expand=True)
+
+    def setup_package_tab(self):
+        """Setup the Package tab UI"""
+        # Create main frame in Package tab with scrollbar
+        self.package_outer_frame = tk.Frame(self.package_tab, bg=self.colors['bg_dark'])
+        self.package_outer_frame.pack(fill='both', expand=True)
+        
+        # Add canvas and scrollbar
+        self.package_canvas = tk.Canvas(
+            self.package_outer_frame,
+            bg=self.colors['bg_dark'],
+            highlightthickness=0
+        )
+        self.package_scrollbar = ttk.Scrollbar(
+            self.package_outer_frame,
+            orient='vertical',
+            command=self.package_canvas.yview
+        )
+        
+        # Configure canvas
+        self.package_frame = tk.Frame(self.package_canvas, bg=self.colors['bg_dark'], padx=20, pady=20)
+        self.package_canvas.configure(yscrollcommand=self.package_scrollbar.set)
+        
+        # Pack scrollbar and canvas
+        self.package_scrollbar.pack(side='right', fill='y')
+        self.package_canvas.pack(side='left', fill='both', expand=True)
+        
+        # Add the frame to the canvas
+        self.canvas_frame = self.package_canvas.create_window(
+            (0, 0),
+            window=self.package_frame,
+            anchor='nw',
+            width=self.package_canvas.winfo_width()
+        )
+        
+        # Configure canvas scrolling
+        self.package_frame.bind('<Configure>', self.on_frame_configure)
+        self.package_canvas.bind('<Configure>', self.on_canvas_configure)
+        
+        # Create parameters
+        self.package_params = {
+            param: tk.BooleanVar(value=default) if isinstance(default, bool) else tk.StringVar(value=default)
+            for param, default in DEFAULT_PACKAGE_SETTINGS.items()
+        }
+        
+        # Add trace to all parameters for auto-save
+        for param_name, var in self.package_params.items():
+            var.trace_add('write', lambda *args, param=param_name: self.on_package_param_change(param))
+        
+        # Rest of the package tab setup code remains the same, but use self.package_frame instead of self.package_frame
+        self.params_frame = tk.Frame(self.package_frame, bg=self.colors['bg_dark'])
+        self.params_frame.pack(fill='x', pady=(0, 10))
+        
+        # Create parameter inputs
+        row = 0
+        
+        # Create left and right frames for two-column layout
+        left_frame = tk.Frame(self.params_frame, bg=self.colors['bg_dark'])
+        left_frame.grid(row=0, column=0, sticky='nsew', padx=(0, 10))
+        
+        right_frame = tk.Frame(self.params_frame, bg=self.colors['bg_dark'])
+        right_frame.grid(row=0, column=1, sticky='nsew')
+        
+        self.params_frame.grid_columnconfigure(0, weight=1)
+        self.params_frame.grid_columnconfigure(1, weight=1)
+        
+        # Left column - Main settings
+        current_frame = left_frame
+        row = 0
+        
+        # Project selection
+        tk.Label(
+            current_frame,
+            text="Project:",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        ).grid(row=row, column=0, sticky='w', pady=2)
+        
+        project_frame = tk.Frame(current_frame, bg=self.colors['bg_dark'])
+        project_frame.grid(row=row, column=1, sticky='ew', pady=2)
+        
+        self.project_entry = tk.Entry(
+            project_frame,
+            textvariable=self.package_params['Project'],
+            font=("Consolas", 10),
+            bg=self.colors['bg_light'],
+            fg=self.colors['text'],
+            insertbackground=self.colors['text']
+        )
+        self.project_entry.pack(side='left', fill='x', expand=True)
+        
+        project_browse = tk.Button(
+            project_frame,
+            text="Browse",
+            command=self.browse_project,
+            font=("Arial", 9),
+            bg=self.colors['accent'],
+            fg=self.colors['text'],
+            activebackground=self.colors['accent_hover'],
+            activeforeground=self.colors['text'],
+            relief='flat',
+            padx=10
+        )
+        project_browse.pack(side='right', padx=(5, 0))
+        
+        row += 1
+        
+        # Platform dropdown
+        tk.Label(
+            current_frame,
+            text="Platform:",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        ).grid(row=row, column=0, sticky='w', pady=2)
+        
+        platform_dropdown = ttk.Combobox(
+            current_frame,
+            textvariable=self.package_params['Platform'],
+            values=PLATFORMS,
+            state='readonly',
+            style='Custom.TCombobox'
+        )
+        platform_dropdown.grid(row=row, column=1, sticky='ew', pady=2)
+        
+        row += 1
+        
+        # Configuration dropdown
+        tk.Label(
+            current_frame,
+            text="Configuration:",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        ).grid(row=row, column=0, sticky='w', pady=2)
+        
+        config_dropdown = ttk.Combobox(
+            current_frame,
+            textvariable=self.package_params['Configuration'],
+            values=CONFIGURATIONS,
+            state='readonly',
+            style='Custom.TCombobox'
+        )
+        config_dropdown.grid(row=row, column=1, sticky='ew', pady=2)
+        
+        row += 1
+        
+        # Cook dropdown
+        tk.Label(
+            current_frame,
+            text="Cook:",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        ).grid(row=row, column=0, sticky='w', pady=2)
+        
+        cook_dropdown = ttk.Combobox(
+            current_frame,
+            textvariable=self.package_params['Cook'],
+            values=['cook', 'skipcook'],
+            state='readonly',
+            style='Custom.TCombobox'
+        )
+        cook_dropdown.grid(row=row, column=1, sticky='ew', pady=2)
+        
+        row += 1
+
+        # Archive Directory
+        tk.Label(
+            current_frame,
+            text="Archive Dir:",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        ).grid(row=row, column=0, sticky='w', pady=2)
+        
+        archive_dir_frame = tk.Frame(current_frame, bg=self.colors['bg_dark'])
+        archive_dir_frame.grid(row=row, column=1, sticky='ew', pady=2)
+        
+        archive_dir_entry = tk.Entry(
+            archive_dir_frame,
+            textvariable=self.package_params['ArchiveDirectory'],
+            font=("Consolas", 10),
+            bg=self.colors['bg_light'],
+            fg=self.colors['text'],
+            insertbackground=self.colors['text']
+        )
+        archive_dir_entry.pack(side='left', fill='x', expand=True)
+        
+        archive_dir_browse = tk.Button(
+            archive_dir_frame,
+            text="Browse",
+            command=self.browse_archive_directory,
+            font=("Arial", 9),
+            bg=self.colors['accent'],
+            fg=self.colors['text'],
+            activebackground=self.colors['accent_hover'],
+            activeforeground=self.colors['text'],
+            relief='flat',
+            padx=10
+        )
+        archive_dir_browse.pack(side='right', padx=(5, 0))
+        
+        row += 1
+        
+        # Cooker Options
+        tk.Label(
+            current_frame,
+            text="Cooker Opts:",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        ).grid(row=row, column=0, sticky='w', pady=2)
+        
+        cooker_options_entry = tk.Entry(
+            current_frame,
+            textvariable=self.package_params['CookerOptions'],
+            font=("Consolas", 10),
+            bg=self.colors['bg_light'],
+            fg=self.colors['text'],
+            insertbackground=self.colors['text']
+        )
+        cooker_options_entry.grid(row=row, column=1, sticky='ew', pady=2)
+        
+        row += 1
+        
+        # Extra directories (e.g. test machine shares) the staged build is synced to
+        tk.Label(
+            current_frame,
+            text="Sync Dirs:",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        ).grid(row=row, column=0, sticky='w', pady=2)
+        
+        sync_dirs_entry = tk.Entry(
+            current_frame,
+            textvariable=self.package_params['SyncDirectories'],
+            font=("Consolas", 10),
+            bg=self.colors['bg_light'],
+            fg=self.colors['text'],
+            insertbackground=self.colors['text']
+        )
+        sync_dirs_entry.grid(row=row, column=1, sticky='ew', pady=2)
+        
+        row += 1
+        
+        # Worker agents (host:port, comma separated) package jobs are dispatched to
+        tk.Label(
+            current_frame,
+            text="Agents:",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        ).grid(row=row, column=0, sticky='w', pady=2)
+        
+        agents_entry = tk.Entry(
+            current_frame,
+            textvariable=self.package_params['Agents'],
+            font=("Consolas", 10),
+            bg=self.colors['bg_light'],
+            fg=self.colors['text'],
+            insertbackground=self.colors['text']
+        )
+        agents_entry.grid(row=row, column=1, sticky='ew', pady=2)
+        
+        # Right column - Checkboxes
+        current_frame = right_frame
+        
+        # Create a frame specifically for checkboxes with a grid layout
+        checkbox_frame = tk.Frame(current_frame, bg=self.colors['bg_dark'])
+        checkbox_frame.pack(fill='both', expand=True)
+        
+        # Organize checkboxes in a grid (3 columns)
+        checkbox_params = [
+            ('Build', 0, 0), ('Stage', 0, 1), ('Package', 0, 2),
+            ('Archive', 1, 0), ('Prereqs', 1, 1), ('NoXGE', 1, 2),
+            ('NoCompileEditor', 2, 0), ('SkipBuildEditor', 2, 1), ('Compressed', 2, 2),
+            ('NoSndbsShaderCompile', 3, 0), ('NoRemoteShaderCompile', 3, 1), ('AutoSkip', 3, 2),
+            ('ArtifactCache', 4, 0), ('FastArchive', 4, 1), ('DeltaSync', 4, 2),
+            ('AutoCookProcesses', 5, 0), ('Pipeline', 5, 1), ('PrewarmDDC', 5, 2),
+            ('IsolateJobs', 6, 0), ('FollowLogs', 6, 1)
+        ]
+        
+        # Configure grid columns to be equal width
+        for i in range(3):
+            checkbox_frame.grid_columnconfigure(i, weight=1)
+        
+        # Create checkboxes in the grid
+        for param, row, col in checkbox_params:
+            checkbox = tk.Checkbutton(
+                checkbox_frame,
+                text=param,
+                variable=self.package_params[param],
+                bg=self.colors['bg_dark'],
+                fg=self.colors['text'],
+                selectcolor=self.colors['bg_medium'],
+                activebackground=self.colors['bg_dark'],
+                activeforeground=self.colors['text']
+            )
+            checkbox.grid(row=row, column=col, sticky='w', pady=1, padx=2)
+        
+        # Create matrix selection (several platforms x configurations per run)
+        matrix_frame = tk.Frame(self.package_frame, bg=self.colors['bg_dark'])
+        matrix_frame.pack(fill='x')
+        
+        tk.Checkbutton(
+            matrix_frame,
+            text="Matrix",
+            variable=self.package_params['Matrix'],
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text'],
+            selectcolor=self.colors['bg_medium'],
+            activebackground=self.colors['bg_dark'],
+            activeforeground=self.colors['text']
+        ).grid(row=0, column=0, rowspan=2, sticky='nw', padx=(0, 10))
+        
+        self.matrix_vars = {}
+        for row, (param, label, values) in enumerate([('MatrixPlatforms', "Platforms:", PLATFORMS),
+                                                      ('MatrixConfigurations', "Configurations:", CONFIGURATIONS)]):
+            tk.Label(
+                matrix_frame,
+                text=label,
+                font=("Arial", 10),
+                bg=self.colors['bg_dark'],
+                fg=self.colors['text']
+            ).grid(row=row, column=1, sticky='w', pady=1)
+            
+            self.matrix_vars[param] = {}
+            for col, value in enumerate(values):
+                var = tk.BooleanVar(value=value in split_list(self.package_params[param].get()))
+                self.matrix_vars[param][value] = var
+                tk.Checkbutton(
+                    matrix_frame,
+                    text=value,
+                    variable=var,
+                    command=lambda param=param: self.on_matrix_toggle(param),
+                    bg=self.colors['bg_dark'],
+                    fg=self.colors['text'],
+                    selectcolor=self.colors['bg_medium'],
+                    activebackground=self.colors['bg_dark'],
+                    activeforeground=self.colors['text']
+                ).grid(row=row, column=col + 2, sticky='w', pady=1, padx=2)
+            
+            # Keep the checkboxes in sync when a saved preset is applied
+            self.package_params[param].trace_add('write', lambda *args, param=param: self.sync_matrix_checkboxes(param))
+        
+        # Create command display
+        tk.Label(
+            self.package_frame,
+            text="Generated Command:",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        ).pack(anchor='w', pady=(10, 5))
+        
+        self.package_command_display = tk.Text(
+            self.package_frame,
+            height=3,
+            font=("Consolas", 10),
+            wrap=tk.WORD,
+            bg=self.colors['bg_medium'],
+            fg=self.colors['text'],
+            state='disabled'
+        )
+        self.package_command_display.pack(fill='x')
+        
+        # Create run and cancel buttons
+        package_buttons = tk.Frame(self.package_frame, bg=self.colors['bg_dark'])
+        package_buttons.pack(pady=10)
+        
+        self.package_button = tk.Button(
+            package_buttons,
+            text="Run Package",
+            command=self.run_package,
+            font=("Arial", 12),
+            padx=20,
+            pady=5,
+            bg=self.colors['accent'],
+            fg=self.colors['text'],
+            activebackground=self.colors['accent_hover'],
+            activeforeground=self.colors['text'],
+            relief='flat'
+        )
+        self.package_button.pack(side='left')
+        
+        tk.Button(
+            package_buttons,
+            text="Pre-warm DDC",
+            command=self.run_prewarm,
+            font=("Arial", 12),
+            padx=20,
+            pady=5,
+            bg=self.colors['bg_light'],
+            fg=self.colors['text'],
+            activebackground=self.colors['accent_hover'],
+            activeforeground=self.colors['text'],
+            relief='flat'
+        ).pack(side='left', padx=(10, 0))
+        
+        tk.Button(
+            package_buttons,
+            text="Cancel",
+            command=lambda: self.cancel_shown_job(self.package_output_area),
+            font=("Arial", 12),
+            padx=20,
+            pady=5,
+            bg=self.colors['bg_light'],
+            fg=self.colors['text'],
+            activebackground=self.colors['accent_hover'],
+            activeforeground=self.colors['text'],
+            relief='flat'
+        ).pack(side='left', padx=(10, 0))
+        
+        # Create status line for the running phase and error/warning counts
+        self.package_status_var = tk.StringVar(value='')
+        tk.Label(
+            self.package_frame,
+            textvariable=self.package_status_var,
+            font=("Consolas", 9),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text'],
+            anchor='w'
+        ).pack(fill='x', pady=(0, 5))
+        
+        # Create output section
+        self.package_output_frame = tk.Frame(self.package_frame, bg=self.colors['bg_dark'])
+        self.package_output_frame.pack(fill='both', expand=True)
+        
+        self.package_toggle_frame = tk.Frame(self.package_output_frame, bg=self.colors['bg_dark'])
+        self.package_toggle_frame.pack(fill='x')
+        
+        self.package_toggle_button = tk.Button(
+            self.package_toggle_frame,
+            text="▼ Show Output",
+            command=self.toggle_package_output,
+            font=("Arial", 10),
+            relief="flat",
+            bg=self.colors['bg_medium'],
+            fg=self.colors['text'],
+            activebackground=self.colors['bg_light'],
+            activeforeground=self.colors['text'],
+            anchor="w"
+        )
+        self.package_toggle_button.pack(fill='x')
+        
+        self.package_output_container = tk.Frame(self.package_output_frame, bg=self.colors['bg_dark'])
+        self.package_output_container.pack(fill='both', expand=True)
+        self.package_output_container.pack_forget()
+        
+        # Output is spooled to disk; the view only holds a window of it
+        self.package_output_area = LogView(self.package_output_container, self.colors)
+        self.package_output_area.tag_configure('stderr', foreground=self.colors['error'])
+        self.package_output_area.tag_configure('log', foreground=self.colors['accent'])
+        self.package_output_area.pack(fill='both', expand=True)
+        
+        # Initialize command display
+        self.package_output_visible = False
+        self.update_package_command()
+
+    def update_package_status(self):
+        """Show phase timings and error counts of the package job being displayed"""
+        for job in self.scheduler.jobs:
+            if job.parser and job.log is self.package_output_area.spool:
+                self.package_status_var.set(f"{job.name}: {format_summary(job.parser, job.finished_at)}")
+                return
+
+    def setup_jobs_tab(self):
+        """Setup the Jobs tab UI"""
+        self.jobs_frame = tk.Frame(self.jobs_tab, bg=self.colors['bg_dark'], padx=20, pady=20)
+        self.jobs_frame.pack(expand=True, fill='both')
+        
+        # Create controls frame
+        jobs_controls = tk.Frame(self.jobs_frame, bg=self.colors['bg_dark'])
+        jobs_controls.pack(fill='x', pady=(0, 10))
+        
+        tk.Label(
+            jobs_controls,
+            text="Max parallel jobs:",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        ).pack(side='left')
+        
+        self.max_jobs_var = tk.IntVar(value=self.scheduler.max_concurrency)
+        tk.Spinbox(
+            jobs_controls,
+            from_=1,
+            to=32,
+            width=4,
+            textvariable=self.max_jobs_var,
+            font=("Consolas", 10),
+            bg=self.colors['bg_light'],
+            fg=self.colors['text'],
+            buttonbackground=self.colors['bg_medium'],
+            insertbackground=self.colors['text']
+        ).pack(side='left', padx=(5, 0))
+        self.max_jobs_var.trace_add('write', lambda *args: self.on_max_jobs_change())
+        
+        tk.Label(
+            jobs_controls,
+            text="Timeout (min, 0 = none):",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        ).pack(side='left', padx=(15, 0))
+        
+        self.timeout_var = tk.StringVar(value='0')
+        tk.Spinbox(
+            jobs_controls,
+            from_=0,
+            to=1440,
+            width=5,
+            textvariable=self.timeout_var,
+            font=("Consolas", 10),
+            bg=self.colors['bg_light'],
+            fg=self.colors['text'],
+            buttonbackground=self.colors['bg_medium'],
+            insertbackground=self.colors['text']
+        ).pack(side='left', padx=(5, 0))
+        
+        tk.Button(
+            jobs_controls,
+            text="Clear Finished",
+            command=self.clear_finished_jobs,
+            font=("Arial", 9),
+            bg=self.colors['accent'],
+            fg=self.colors['text'],
+            activebackground=self.colors['accent_hover'],
+            activeforeground=self.colors['text'],
+            relief='flat',
+            padx=10
+        ).pack(side='right')
+        
+        tk.Button(
+            jobs_controls,
+            text="Cancel",
+            command=self.cancel_selected_job,
+            font=("Arial", 9),
+            bg=self.colors['accent'],
+            fg=self.colors['text'],
+            activebackground=self.colors['accent_hover'],
+            activeforeground=self.colors['text'],
+            relief='flat',
+            padx=10
+        ).pack(side='right', padx=(0, 5))
+        
+        tk.Button(
+            jobs_controls,
+            text="History",
+            command=self.show_history,
+            font=("Arial", 9),
+            bg=self.colors['accent'],
+            fg=self.colors['text'],
+            activebackground=self.colors['accent_hover'],
+            activeforeground=self.colors['text'],
+            relief='flat',
+            padx=10
+        ).pack(side='right', padx=(0, 5))
+        
+        # Create job list
+        columns = ('name', 'kind', 'host', 'state', 'phase', 'elapsed', 'cpu', 'memory', 'disk', 'exit')
+        self.jobs_tree = ttk.Treeview(
+            self.jobs_frame,
+            columns=columns,
+            show='headings',
+            height=8,
+            selectmode='browse',
+            style='Custom.Treeview'
+        )
+        headings = ('Job', 'Kind', 'Runs On', 'State', 'Phase', 'Elapsed', 'CPU (peak)', 'Memory (peak)', 'Disk (peak)',
+                    'Exit')
+        for column, heading, width in zip(columns, headings, (280, 70, 110, 70, 70, 70, 100, 140, 140, 50)):
+            self.jobs_tree.heading(column, text=heading)
+            self.jobs_tree.column(column, width=width, stretch=(column == 'name'))
+        self.jobs_tree.pack(fill='x')
+        self.jobs_tree.bind('<<TreeviewSelect>>', self.on_job_selected)
+        
+        # Create output view for the selected job
+        self.job_output_area = LogView(self.jobs_frame, self.colors)
+        self.job_output_area.tag_configure('stderr', foreground=self.colors['error'])
+        self.job_output_area.tag_configure('log', foreground=self.colors['accent'])
+        self.job_output_area.pack(fill='both', expand=True, pady=(10, 0))
+
+    def show_history(self):
+        """Open a window with run time trends and recent runs for the working directory"""
+        if not self.working_dir:
+            messagebox.showwarning("Warning", "Please select a working directory first")
+            return
+        
+        window = tk.Toplevel(self.root, bg=self.colors['bg_dark'], padx=10, pady=10)
+        window.title(f"Run History - {self.working_dir}")
+        window.geometry("1000x500")
+        
+        tk.Label(
+            window,
+            text="Trends (successful runs, median of the last 10):",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        ).pack(anchor='w')
+        
+        trend_columns = ('key', 'kind', 'runs', 'median', 'last', 'change')
+        trends_tree = ttk.Treeview(window, columns=trend_columns, show='headings', height=6,
+                                   style='Custom.Treeview')
+        for column, heading, width in zip(trend_columns, ('Run', 'Kind', 'Runs', 'Median', 'Last', 'Change'),
+                                          (360, 70, 60, 80, 80, 80)):
+            trends_tree.heading(column, text=heading)
+            trends_tree.column(column, width=width, stretch=(column == 'key'))
+        trends_tree.pack(fill='x', pady=(2, 10))
+        for trend in self.build_history.trends(self.working_dir):
+            trends_tree.insert('', 'end', values=(
+                trend['key'], trend['kind'], trend['runs'], format_duration(trend['median']),
+                format_duration(trend['last']), f"{trend['change'] * 100:+.0f}%"
+            ))
+        
+        tk.Label(
+            window,
+            text="Recent runs:",
+            font=("Arial", 10),
+            bg=self.colors['bg_dark'],
+            fg=self.colors['text']
+        ).pack(anchor='w')
+        
+        run_columns = ('time', 'key', 'wall', 'phases', 'peaks', 'exit')
+        runs_tree = ttk.Treeview(window, columns=run_columns, show='headings', style='Custom.Treeview')
+        for column, heading, width in zip(run_columns, ('Started', 'Run', 'Wall', 'Phases', 'Peak CPU/Memory/Disk', 'Exit'),
+                                          (120, 220, 70, 300, 200, 50)):
+            runs_tree.heading(column, text=heading)
+            runs_tree.column(column, width=width, stretch=(column == 'phases'))
+        runs_tree.pack(fill='both', expand=True, pady=(2, 0))
+        for record in reversed(self.build_history.load(self.working_dir)[-500:]):
+            phases = ', '.join(f"{phase} {format_duration(seconds)}"
+                               for phase, seconds in record.get('phases', {}).items())
+            peaks = record.get('peaks')
+            peaks = (f"{peaks['cpu']}% / {format_size(peaks['rss'])} / "
+                     f"{format_rate(peaks['read_rate'] + peaks['write_rate'])}") if peaks else ''
+            runs_tree.insert('', 'end', values=(
+                format_time(record['time']), run_key(record), format_duration(record['wall']), phases, peaks,
+                '' if record.get('exit') is None else record['exit']
+            ))
+
+    def on_max_jobs_change(self):
+        """Apply a new concurrency limit from the spinbox"""
+        try:
+            self.scheduler.set_max_concurrency(self.max_jobs_var.get())
+        except (tk.TclError, ValueError):
+            return  # Ignore partial input while the user is typing
+        self.ensure_pump()
+
+    def on_job_changed(self, job):
+        """Insert or update a job's row in the job list"""
+        phase = (job.parser.phase or '') if job.parser else ''
+        values = (job.name, job.kind, job.agent or 'this machine', job.state, phase, format_duration(job.elapsed),
+                  *self.resource_columns(job), '' if job.returncode is None else job.returncode)
+        iid = str(job.id)
+        if self.jobs_tree.exists(iid):
+            self.jobs_tree.item(iid, values=values)
+        else:
+            self.jobs_tree.insert('', 'end', iid=iid, values=values)
+
+    def resource_columns(self, job):
+        """CPU, memory and disk cells of a job: live values with peaks while running, peaks after"""
+        peaks = job.resource_peaks
+        if not peaks:
+            if job.agent is None and job.started_at is not None and not monitoring_available():
+                return 'no monitor available', '', ''  # no /proc and psutil is not installed
+            return '', '', ''
+        if job.finished or job.resources is None:
+            return (f"{peaks['cpu']:.0f}%", format_size(peaks['rss']),
+                    format_rate(peaks['read_rate'] + peaks['write_rate']))
+        live = job.resources
+        return (f"{live.cpu:.0f}% ({peaks['cpu']:.0f}%)",
+                f"{format_size(live.rss)} ({format_size(peaks['rss'])})",
+                f"{format_rate(live.read_rate + live.write_rate)} "
+                f"({format_rate(peaks['read_rate'] + peaks['write_rate'])})")
+
+    def on_job_selected(self, event=None):
+        """Show the selected job's log"""
+        selection = self.jobs_tree.selection()
+        for job in self.scheduler.jobs:
+            if selection and str(job.id) == selection[0]:
+                self.job_output_area.show(job.log)
+
+    def cancel_shown_job(self, view):
+        """Cancel the unfinished job whose log an output area is showing"""
+        for job in self.scheduler.jobs:
+            if job.log is view.spool and not job.finished:
+                self.scheduler.cancel(job)
+                self.ensure_pump()
+                return
+    
+    def cancel_selected_job(self):
+        """Cancel the job selected in the job list"""
+        selection = self.jobs_tree.selection()
+        for job in self.scheduler.jobs:
+            if selection and str(job.id) == selection[0]:
+                self.scheduler.cancel(job)
+                self.ensure_pump()
+    
+    def clear_finished_jobs(self):
+        """Remove finished jobs from the list and discard their logs"""
+        for job in self.scheduler.remove_finished():
+            for view in (self.output_area, self.package_output_area, self.job_output_area):
+                if view.spool is job.log:
+                    view.clear()
+            self.jobs_tree.delete(str(job.id))
+            job.log.close()
+
+    def browse_project(self):
+        """Browse for .uproject file"""
+        project_file = filedialog.askopenfilename(
+            initialdir=self.working_dir if self.working_dir else None,
+            title="Select .uproject file",
+            filetypes=[("Unreal Project", "*.uproject")]
+        )
+        if project_file:
+            self.package_params['Project'].set(project_file)
+            self.update_package_command()
+
+    def current_package_settings(self):
+        """Current package parameters as a plain settings dict"""
+        return {param: var.get() for param, var in self.package_params.items()}
+
+    def tuned_package_settings(self, settings):
+        """Settings with -cookprocesscount tuned from this directory's run history, plus the reason"""
+        return apply_cook_tuning(settings, self.build_history.load(self.working_dir))
+
+    def on_matrix_toggle(self, param):
+        """Store the checked matrix platforms or configurations in their setting"""
+        checked = [value for value, var in self.matrix_vars[param].items() if var.get()]
+        self.package_params[param].set(','.join(checked))
+
+    def sync_matrix_checkboxes(self, param):
+        """Check the matrix checkboxes listed in a setting"""
+        selected = split_list(self.package_params[param].get())
+        for value, var in self.matrix_vars[param].items():
+            var.set(value in selected)
+
+    def update_package_command(self):
+        """Update the package command display based on parameters"""
+        if not self.working_dir:
+            command = "Please select a working directory first"
+        else:
+            settings = self.current_package_settings()
+            if not settings['Project']:
+                command = "Please select a project file"
+            elif settings['Matrix']:
+                concurrency, reason, jobs = plan_matrix(settings)
+                if not jobs:
+                    command = "Please select at least one matrix platform and configuration"
+                else:
+                    lines = [f"# {len(jobs)} jobs, {concurrency} at a time (limited by {reason})"]
+                    lines += [command for job in jobs for command in package_run_commands(self.working_dir, job)]
+                    command = '\n'.join(lines)
+            else:
+                settings, reason = self.tuned_package_settings(settings)
+                command = '\n'.join(package_run_commands(self.working_dir, settings))
+                if pipelined(settings):
+                    command = f"# Pipelined: compile and cook run at once, then stage\n{command}"
+                if reason:
+                    command = f"# -cookprocesscount={get_cook_process_count(settings['CookerOptions'])}: {reason}\n{command}"
+        
+        # Update display
+        self.package_command_display.config(state='normal')
+        self.package_command_display.delete(1.0, tk.END)
+        self.package_command_display.insert(1.0, command)
+        self.package_command_display.config(state='disabled')
+
+    def toggle_package_output(self):
+        """Toggle package output visibility"""
+        self.package_output_visible = not self.package_output_visible
+        if self.package_output_visible:
+            self.package_toggle_button.config(text="▼ Hide Output")
+            self.package_output_container.pack(fill='both', expand=True)
+        else:
+            self.package_toggle_button.config(text="▶ Show Output")
+            self.package_output_container.pack_forget()
+
+    def run_package(self):
+        """Run the package command"""
+        if not self.working_dir:
+            messagebox.showwarning("Warning", "Please select a working directory first")
+            return
+            
+        if not self.package_params['Project'].get():
+            messagebox.showwarning("Warning", "Please select a project file")
+            return
+        
+        settings = self.current_package_settings()
+        try:
+            self.scheduler.agents.configure(split_list(settings['Agents']))
+        except ValueError:
+            messagebox.showwarning("Warning", "Agents must be host or host:port entries separated by commas")
+            return
+        if settings['Matrix']:
+            concurrency, reason, jobs = plan_matrix(settings)
+            if not jobs:
+                messagebox.showwarning("Warning", "Please select at least one matrix platform and configuration")
+                return
+            
+            # Matrix jobs share a group so they never exceed the planned concurrency,
+            # and the overall limit is raised if it would hold them back
+            group = f"matrix-{len(self.scheduler.group_limits) + 1}"
+            # Pipelined runs compile and cook at once, and DDC fills run while the runs compile
+            slots = concurrency * (2 if pipelined(settings) or prewarms(settings) else 1)
+            self.scheduler.group_limits[group] = slots
+            header = (f"Running packaging command ({len(jobs)} job matrix, "
+                      f"{concurrency} at a time, limited by {reason})...\n\n")
+            if self.scheduler.max_concurrency < slots:
+                note = f"Max jobs raised from {self.scheduler.max_concurrency} to {slots} for this matrix"
+                header += f"{note}\n\n"
+                self.package_status_var.set(note)
+                self.max_jobs_var.set(slots)
+        else:
+            settings, reason = self.tuned_package_settings(settings)
+            header = "Running packaging command...\n\n"
+            if reason:
+                cook_processes = get_cook_process_count(settings['CookerOptions'])
+                header = f"Running packaging command with -cookprocesscount={cook_processes} ({reason})...\n\n"
+            jobs, group = [settings], None
+            if (pipelined(settings) or prewarms(settings)) and self.scheduler.max_concurrency < 2:
+                steps = "compile and cook steps" if pipelined(settings) else "compile and DDC fill"
+                note = f"Max jobs raised from 1 to 2 so the {steps} can run at once"
+                header += f"{note}\n\n"
+                self.package_status_var.set(note)
+                self.max_jobs_var.set(2)
+            if pipelined(settings) and not settings['IsolateJobs']:
+                header += "Without IsolateJobs the compile and cook steps take turns on AutomationTool's mutex\n\n"
+        
+        if settings['AutoSkip'] or settings['ArtifactCache']:
+            # Hashing changed inputs can take a while, so it happens off the UI thread
+            self.package_status_var.set("Checking which project inputs changed since the last successful run...")
+            threading.Thread(target=self.prepare_package_runs, args=(jobs, group, header), daemon=True).start()
+        else:
+            self.queue_package_jobs([(settings, header, None, None, None) for settings in jobs], group)
+
+    def run_prewarm(self):
+        """Fill the Derived Data Cache for the selected project and platform(s) in the background"""
+        if not self.working_dir:
+            messagebox.showwarning("Warning", "Please select a working directory first")
+            return
+        if not self.package_params['Project'].get():
+            messagebox.showwarning("Warning", "Please select a project file")
+            return
+        
+        settings = self.current_package_settings()
+        platforms = split_list(settings['MatrixPlatforms']) if settings['Matrix'] else [settings['Platform']]
+        for platform in platforms:
+            job = prewarm_job(self.working_dir, dict(settings, Platform=platform))
+            self.submit_job(job, self.package_output_area,
+                            f"Pre-warming the Derived Data Cache for {platform}: {job.command}\n\n")
+
+    def fingerprint_index(self, project_file):
+        """Fingerprint index of a project, kept next to the profiles file"""
+        key = os.path.normcase(os.path.abspath(project_file))
+        if key not in self.fingerprint_indexes:
+            cache_dir = os.path.join(os.path.dirname(os.path.abspath(self.profiles_file)), 'fingerprints')
+            self.fingerprint_indexes[key] = FingerprintIndex(cache_dir, project_file, self.hasher)
+        return self.fingerprint_indexes[key]
+
+    def prepare_package_runs(self, jobs, group, header):
+        """Scan the project's inputs in the background, apply auto-skip and restore cached builds
+
+        Hands (settings, header, fingerprints, artifact, restored message) per job
+        to queue_package_jobs on the UI thread.
+        """
+        try:
+            index = self.fingerprint_index(jobs[0]['Project'])
+            fingerprints = index.scan()
+        except OSError as e:
+            header += f"Could not fingerprint project inputs, running every step: {e}\n\n"
+            self.root.after(0, self.queue_package_jobs,
+                            [(settings, header, None, None, None) for settings in jobs], group)
+            return
+        header += f"Fingerprinted project inputs ({fingerprints['hashed']} changed files hashed)\n"
+        
+        runs = []
+        for settings in jobs:
+            notes = []
+            if settings['AutoSkip']:
+                settings, notes = index.auto_skip(settings, fingerprints)
+            artifact = restored = None
+            try:
+                store, key, restored = restore_cached_build(self.working_dir, settings, fingerprints, self.hasher)
+                if store:
+                    artifact = (store, key)
+            except OSError as e:
+                notes.append(f"Could not restore from the artifact cache, running UAT: {e}")
+            job_header = header + ''.join(f"{note}\n" for note in notes) + "\n"
+            runs.append((settings, job_header, (index, fingerprints), artifact, restored))
+        self.root.after(0, self.queue_package_jobs, runs, group)
+
+    def queue_package_jobs(self, runs, group):
+        """Queue package jobs, or just report builds that were restored from the artifact cache"""
+        fills = {}  # (project, platform) -> DDC fill the runs of that platform share
+        for settings, header, fingerprints, artifact, restored in runs:
+            if restored:
+                self.package_output_area.clear()
+                self.package_output_area.write(f"{header}{restored}\n")
+                self.package_status_var.set(restored)
+                continue
+            jobs = self.pipeline_jobs(settings) if pipelined(settings) else [self.package_job(settings)]
+            jobs = with_prewarm(self.working_dir, settings, jobs, fills)
+            # Only the last step stages and archives, so only it stores the build
+            jobs[-1].artifact = artifact
+            for job in jobs:
+                job.group = group
+                job.fingerprints = fingerprints
+                step_header = header
+                if job.depends_on or job.after:
+                    waits = ' and '.join(other.name for other in job.depends_on + job.after)
+                    step_header += f"Waiting for {waits}...\n\n"
+                # The cook is usually the longest step, so its log is the one shown
+                self.submit_job(job, self.package_output_area, step_header,
+                                show=job.kind == 'package' and job.params.get('PipelineStep') in (None, 'cook'))
+
+    def pipeline_jobs(self, settings):
+        """Compile, cook and stage jobs of a pipelined run; stage starts once both others succeed"""
+        compile_job, cook_job, stage_job = jobs = [self.package_job(step) for step in pipeline_steps(settings)]
+        stage_job.depends_on = [compile_job, cook_job]
+        for job in jobs:
+            job.local = True  # the steps share this machine's project tree
+        return jobs
+
+    def package_job(self, settings):
+        """Package job for a set of settings, with output parsing and its run parameters"""
+        settings = isolate_settings(settings)
+        name = f"Package {settings['Platform']} {settings['Configuration']}"
+        if settings.get('PipelineStep'):
+            name += f" ({settings['PipelineStep']})"
+        job = Job(name, build_package_command(self.working_dir, settings), self.working_dir, kind='package')
+        job.params = run_params(settings)
+        job.parser = UATOutputParser()
+        return follow_package_logs(isolate_job(job, self.working_dir))
+
+    def browse_archive_directory(self):
+        """Browse for archive directory"""
+        archive_dir = filedialog.askdirectory(
+            initialdir=self.working_dir if self.working_dir else None,
+            title="Select Archive Directory"
+        )
+        if archive_dir:
+            self.package_params['ArchiveDirectory'].set(archive_dir)
+            self.update_package_command()
+
+    def on_frame_configure(self, event=None):
+        """Reset the scroll region to encompass the inner frame"""
+        self.package_canvas.configure(scrollregion=self.package_canvas.bbox('all'))
+
+    def on_canvas_configure(self, event=None):
+        """When the canvas is resized, resize the inner frame to match"""
+        if event is not None:
+            self.package_canvas.itemconfig(self.canvas_frame, width=event.width)
+
+    def on_package_param_change(self, param_name):
+        """Handle package parameter changes"""
+        if self.applying_settings:  # apply_package_settings rebuilds and saves once at the end
+            return
+        if self.working_dir:  # Only save if we have a working directory
+            # Update the command display
+            self.update_package_command()
+            
+            # Save to profile; the store coalesces rapid edits into one write
+            with self.profile_store.transaction():
+                if 'package_settings' not in self.profiles[self.working_dir]:
+                    self.profiles[self.working_dir]['package_settings'] = {}
+                self.profiles[self.working_dir]['package_settings'][param_name] = self.package_params[param_name].get()
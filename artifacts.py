@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+
+from fingerprint import COOKED_PLATFORMS
+from jobs import format_size
+from uat import package_params, COOK_PROCESS_COUNT
+
+STORE_DIR = '.uecmd-artifacts'
+
+# Switches that decide how UAT gets to the output, not what the output is
+KEY_IGNORED_SWITCHES = {'-build', '-cook', '-skipcook', '-archive'}
+# Written by every engine release and update, e.g. its version and changelist
+ENGINE_VERSION_FILE = 'Engine/Build/Build.version'
+
+
+def engine_identity(working_dir):
+    """Engine directory and a digest of its Build.version, or None for the digest if it has none"""
+    try:
+        with open(os.path.join(working_dir, ENGINE_VERSION_FILE), 'rb') as f:
+            version = hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        version = None
+    return os.path.normcase(os.path.abspath(working_dir)), version
+
+
+def artifact_key(working_dir, settings, fingerprints):
+    """Cache key of a packaged build: engine, project, platform, configuration, flags and input fingerprints
+
+    A build from another engine, or from this one before an update, never
+    matches, since the engine directory and its Build.version are part of it.
+    """
+    params = []
+    for param in package_params(settings):
+        if param in KEY_IGNORED_SWITCHES or param.startswith('-archivedirectory='):
+            continue
+        if param.startswith('-AdditionalCookerOptions='):
+            # The cook worker count changes speed, not output
+            param = ' '.join(COOK_PROCESS_COUNT.sub('', param).split())
+        params.append(param)
+    engine, engine_version = engine_identity(working_dir)
+    key = {
+        'engine': engine,
+        'engine_version': engine_version,
+        'project': os.path.normcase(os.path.abspath(settings['Project'])),
+        'platform': settings['Platform'],
+        'configuration': settings['Configuration'],
+        'params': params,
+        'build': fingerprints['build'],
+        'cook': fingerprints['cook']
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def cacheable(settings):
+    """Only runs that stage, package and archive somewhere leave a complete build to cache"""
+    return bool(settings['Stage'] and settings['Package'] and settings['Archive']
+                and settings['ArchiveDirectory'].strip())
+
+
+def walk_tree(root):
+    """Yield (relative path with '/' separators, absolute path) for every file under root"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            yield os.path.relpath(path, root).replace(os.sep, '/'), path
+
+
+def link_or_copy(src, dst):
+    """Hard-link src at dst, or copy it where that fails (e.g. across volumes); True if linked
+
+    dst is replaced through a temp name, so a half-written file never looks
+    complete and a file dst named before is never written to.
+    """
+    tmp_path = f'{dst}.{os.getpid()}.tmp'
+    try:
+        os.remove(tmp_path)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, tmp_path)
+        linked = True
+    except OSError:
+        shutil.copyfile(src, tmp_path)
+        linked = False
+    os.replace(tmp_path, dst)
+    return linked
+
+
+def write_atomic(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class ArtifactStore:
+    """Content-addressed store of archived builds, deduplicated per file
+
+    Lives in <ArchiveDirectory>/.uecmd-artifacts: objects/ holds one copy of
+    every distinct file by digest, builds/ one manifest per cache key.
+    Objects are hard links to the archived files where the volume allows
+    it, so an object changes with an archived file rewritten in place; they
+    are therefore checked against their digest (through the hash cache, so
+    only changed ones are read) before they are trusted.
+    """
+
+    def __init__(self, archive_dir, hasher):
+        self.archive_dir = archive_dir
+        self.root = os.path.join(archive_dir, STORE_DIR)
+        self.hasher = hasher
+
+    def object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], digest)
+
+    def manifest_path(self, key):
+        return os.path.join(self.root, 'builds', f'{key}.json')
+
+    def lookup(self, key):
+        """Manifest of a complete cached build, or None"""
+        try:
+            with open(self.manifest_path(key), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        for digest, size in manifest['files'].values():
+            try:
+                if os.path.getsize(self.object_path(digest)) != size:
+                    return None
+            except OSError:
+                return None
+        objects = {self.object_path(digest): digest for digest, _ in manifest['files'].values()}
+        current, _ = self.hasher.hash_files(list(objects))
+        if any(current.get(path) != digest for path, digest in objects.items()):
+            return None
+        return manifest
+
+    def platform_output(self, settings):
+        """Folder UAT archived this platform's build into, or None"""
+        candidates = [os.path.join(self.archive_dir, name)
+                      for name in COOKED_PLATFORMS.get(settings['Platform'], [settings['Platform']])]
+        existing = [path for path in candidates if os.path.isdir(path)]
+        return max(existing, key=os.path.getmtime) if existing else None
+
+    def ingest(self, key, settings):
+        """Store the build UAT just archived under key; returns (files, bytes, new bytes copied, bytes linked)"""
+        output = self.platform_output(settings)
+        if output is None:
+            raise OSError(f"No archived {settings['Platform']} build found in {self.archive_dir}")
+
+        files = list(walk_tree(output))
+        digests, _ = self.hasher.hash_files([path for _, path in files])
+        objects = [self.object_path(digest) for digest in set(digests.values())]
+        current, _ = self.hasher.hash_files([path for path in objects if os.path.exists(path)])
+        manifest_files = {}
+        total_bytes = new_bytes = linked_bytes = 0
+        for rel_path, path in files:
+            digest = digests.get(path)
+            if digest is None:
+                raise OSError(f"Could not read {path}")
+            size = os.path.getsize(path)
+            manifest_files[rel_path] = [digest, size]
+            total_bytes += size
+            object_path = self.object_path(digest)
+            if current.get(object_path) != digest:  # missing, or changed since it was stored
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                if link_or_copy(path, object_path):
+                    linked_bytes += size
+                else:
+                    new_bytes += size
+                current[object_path] = digest
+
+        manifest = {
+            'key': key,
+            'created': time.time(),
+            'platform_dir': os.path.basename(output),
+            'params': {param: settings[param] for param in ('Project', 'Platform', 'Configuration')},
+            'files': manifest_files
+        }
+        write_atomic(self.manifest_path(key), json.dumps(manifest, separators=(',', ':')))
+        return len(files), total_bytes, new_bytes, linked_bytes
+
+    def restore(self, manifest):
+        """Recreate a cached build in the archive directory; returns (files restored, of them linked, files already current)
+
+        Files that already match by digest are left alone and files that are not
+        part of the build are removed, so the folder ends up exactly as archived.
+        """
+        destination = os.path.join(self.archive_dir, manifest['platform_dir'])
+        existing = dict(walk_tree(destination)) if os.path.isdir(destination) else {}
+        current, _ = self.hasher.hash_files(list(existing.values()))
+
+        copied = linked = unchanged = 0
+        for rel_path, (digest, size) in manifest['files'].items():
+            path = os.path.join(destination, *rel_path.split('/'))
+            if current.get(existing.get(rel_path)) == digest:
+                unchanged += 1
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            linked += link_or_copy(self.object_path(digest), path)
+            copied += 1
+
+        for rel_path, path in existing.items():
+            if rel_path not in manifest['files']:
+                os.remove(path)
+        return copied, linked, unchanged
+
+
+def restore_cached_build(working_dir, settings, fingerprints, hasher):
+    """Look a run up in its archive directory's cache and restore the build on a hit
+
+    Returns (store, key, message). message is set when the build was restored
+    and UAT does not need to run; store is None when the run is not cached.
+    """
+    if not (settings['ArtifactCache'] and cacheable(settings)):
+        return None, None, None
+    store = ArtifactStore(settings['ArchiveDirectory'].strip(), hasher)
+    key = artifact_key(working_dir, settings, fingerprints)
+    manifest = store.lookup(key)
+    if manifest is None:
+        return store, key, None
+    copied, linked, unchanged = store.restore(manifest)
+    size = sum(file_size for _, file_size in manifest['files'].values())
+    destination = os.path.join(store.archive_dir, manifest['platform_dir'])
+    return store, key, (f"Restored {settings['Platform']} {settings['Configuration']} from the artifact cache "
+                        f"into {destination} ({len(manifest['files'])} files, {format_size(size)}; "
+                        f"{copied} restored, {linked} of them hard-linked; {unchanged} already up to date)")
+
+
+def store_build(store, key, settings):
+    """Add a finished run's archived build to the cache and describe what it took"""
+    files, size, new_bytes, linked_bytes = store.ingest(key, settings)
+    message = (f"Stored {settings['Platform']} {settings['Configuration']} in the artifact cache "
+               f"({files} files, {format_size(size)}; {format_size(new_bytes)} new after deduplication")
+    if linked_bytes:
+        message += f", {format_size(linked_bytes)} more hard-linked to the archived files"
+    return message + ")"
@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import time
+import hashlib
+import statistics
+
+# A run is flagged when it is this much slower than the recent median
+REGRESSION_THRESHOLD = 0.25
+REGRESSION_WINDOW = 10
+REGRESSION_MIN_RUNS = 3
+
+
+def run_key(record):
+    """What a run is compared against: Platform/Configuration (and pipeline step) for packages, else the command"""
+    if record.get('kind') == 'package':
+        params = record.get('params', {})
+        key = f"{params.get('Platform', '')} {params.get('Configuration', '')}"
+        return f"{key} {params['PipelineStep']}" if params.get('PipelineStep') else key
+    return record.get('command', '')
+
+
+def job_record(job):
+    """History record for a finished job"""
+    record = {
+        'time': round(job.started_at or job.queued_at, 1),
+        'kind': job.kind,
+        'name': job.name,
+        'command': job.command,
+        'params': job.params,
+        'wall': round(job.elapsed, 1),
+        'exit': job.returncode
+    }
+    if job.error:
+        record['error'] = job.error
+    if job.cancel_reason:
+        record['cancelled'] = job.cancel_reason
+    if job.agent:
+        record['agent'] = job.agent
+    if job.parser:
+        record['phases'] = {phase: round(seconds, 1) for phase, seconds in job.parser.durations.items()}
+        record['errors'] = job.parser.errors
+        record['warnings'] = job.parser.warnings
+    if job.resource_peaks:
+        record['peaks'] = {
+            'cpu': round(job.resource_peaks['cpu']),
+            'rss': job.resource_peaks['rss'],
+            'read_rate': round(job.resource_peaks['read_rate']),
+            'write_rate': round(job.resource_peaks['write_rate']),
+            'processes': job.resource_peaks['processes']
+        }
+    return record
+
+
+class BuildHistory:
+    """Append-only run records, one JSON Lines file per working directory"""
+
+    def __init__(self, root):
+        self.root = root
+        self.cache = {}
+
+    def path_for(self, working_dir):
+        """History file of a working directory, named after it plus a short hash"""
+        key = os.path.normcase(os.path.normpath(working_dir))
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+        name = re.sub(r'[^A-Za-z0-9]+', '_', os.path.basename(key.rstrip('\\/')))[:40] or 'root'
+        return os.path.join(self.root, f'{name}-{digest}.jsonl')
+
+    def load(self, working_dir):
+        """All records of a working directory, oldest first"""
+        path = self.path_for(working_dir)
+        if path not in self.cache:
+            records = []
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            records.append(json.loads(line))
+                        except ValueError:
+                            continue  # skip a line torn by a crash mid-append
+            except OSError:
+                pass
+            self.cache[path] = records
+        return self.cache[path]
+
+    def append(self, working_dir, record):
+        """Add a record to the end of a working directory's history"""
+        records = self.load(working_dir)
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.path_for(working_dir), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
+        records.append(record)
+
+    def record(self, job):
+        """Append a finished job's record and return any regression messages for it"""
+        record = job_record(job)
+        messages = self.check_regression(job.cwd, record)
+        self.append(job.cwd, record)
+        return messages
+
+    def previous_runs(self, working_dir, record, limit=REGRESSION_WINDOW):
+        """The most recent recorded successful runs with the same key, on the same machine"""
+        key = run_key(record)
+        matches = []
+        for other in reversed(self.load(working_dir)):
+            if (other.get('exit') != 0 or other.get('kind') != record.get('kind')
+                    or other.get('agent') != record.get('agent')):
+                continue
+            if run_key(other) == key:
+                matches.append(other)
+                if len(matches) == limit:
+                    break
+        return matches
+
+    def check_regression(self, working_dir, record):
+        """Messages for wall or phase times notably slower than the recent median"""
+        previous = self.previous_runs(working_dir, record)
+        if len(previous) < REGRESSION_MIN_RUNS or record.get('exit') != 0:
+            return []
+
+        messages = []
+        timings = [('wall time', record['wall'], [run['wall'] for run in previous])]
+        for phase, seconds in record.get('phases', {}).items():
+            history = [run['phases'][phase] for run in previous if phase in run.get('phases', {})]
+            if len(history) >= REGRESSION_MIN_RUNS:
+                timings.append((f'{phase} phase', seconds, history))
+
+        for label, seconds, history in timings:
+            median = statistics.median(history)
+            if median > 0 and seconds > median * (1 + REGRESSION_THRESHOLD):
+                messages.append(
+                    f"{label} {seconds:.0f}s is {(seconds / median - 1) * 100:.0f}% slower than the median "
+                    f"{median:.0f}s of the last {len(history)} {run_key(record)} runs"
+                )
+        return messages
+
+    def trends(self, working_dir):
+        """Per-key summary: run count, median and last wall time of successful runs"""
+        groups = {}
+        for record in self.load(working_dir):
+            if record.get('exit') == 0:
+                groups.setdefault((record.get('kind'), run_key(record)), []).append(record['wall'])
+
+        summary = []
+        for (kind, key), walls in groups.items():
+            recent = walls[-REGRESSION_WINDOW:]
+            median = statistics.median(recent)
+            summary.append({
+                'kind': kind,
+                'key': key,
+                'runs': len(walls),
+                'median': median,
+                'last': walls[-1],
+                'change': (walls[-1] / median - 1) if median else 0.0
+            })
+        return summary
+
+
+def format_time(timestamp):
+    """Local date and time of a record, for display"""
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(timestamp))
@@ -0,0 +1,396 @@
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import time
+
+from profiles import ProfileStore, read_profiles
+from jobs import Job, JobScheduler, DONE, FAILED, format_duration, format_size
+from procmon import ResourceMonitor, format_rate
+from agents import AgentPool, DEFAULT_AGENT_PORT, serve_agent
+from build_history import BuildHistory
+from fingerprint import FingerprintIndex
+from artifacts import restore_cached_build, store_build
+from copystage import sync_targets, sync_staged_build, format_progress
+from hashing import FileHasher, HashCache
+from uatparse import UATOutputParser, format_summary
+from uat import (DEFAULT_PACKAGE_SETTINGS, build_package_command, split_list, plan_matrix, run_params,
+                 get_cook_process_count, pipelined, pipeline_steps)
+from cooktune import apply_cook_tuning
+from ddcwarm import prewarm_job, prewarms, with_prewarm, prewarm_report
+from workspaces import isolate_settings, isolate_job
+from logfollow import follow_package_logs
+
+
+def find_profile(profiles, directory):
+    """Profile saved for a working directory, matching paths loosely"""
+    if directory in profiles:
+        return profiles[directory]
+    wanted = os.path.normcase(os.path.normpath(directory))
+    for saved_dir in profiles:
+        if saved_dir and os.path.normcase(os.path.normpath(saved_dir)) == wanted:
+            return profiles[saved_dir]
+    return {}
+
+
+def parse_setting(name, value):
+    """Convert a --set value to the type of the package setting it overrides"""
+    if name not in DEFAULT_PACKAGE_SETTINGS:
+        raise ValueError(f"Unknown package setting: {name}")
+    if isinstance(DEFAULT_PACKAGE_SETTINGS[name], bool):
+        if value.lower() in ('1', 'true', 'yes', 'on'):
+            return True
+        if value.lower() in ('0', 'false', 'no', 'off'):
+            return False
+        raise ValueError(f"{name} expects true or false, got {value!r}")
+    return value
+
+
+def package_settings(args):
+    """Package settings from the saved profile with command line overrides applied"""
+    profiles = read_profiles(args.profiles) if args.dry_run else ProfileStore(args.profiles).data
+    settings = dict(DEFAULT_PACKAGE_SETTINGS)
+    settings.update(find_profile(profiles, args.dir).get('package_settings', {}))
+
+    if args.project:
+        settings['Project'] = args.project
+    for item in args.set:
+        name, _, value = item.partition('=')
+        settings[name] = parse_setting(name, value)
+
+    # Several platforms or configurations turn the run into a matrix
+    for option, single, matrix in ((args.platform, 'Platform', 'MatrixPlatforms'),
+                                   (args.configuration, 'Configuration', 'MatrixConfigurations')):
+        if option:
+            values = split_list(option)
+            settings[single] = values[0]
+            settings[matrix] = option
+            if len(values) > 1:
+                settings['Matrix'] = True
+    if settings['Matrix']:
+        for single, matrix in (('Platform', 'MatrixPlatforms'), ('Configuration', 'MatrixConfigurations')):
+            if not split_list(settings[matrix]):
+                settings[matrix] = settings[single]
+    return settings
+
+
+def profiles_dir(args):
+    """Directory of the profiles file; run history and caches live next to it"""
+    return os.path.dirname(os.path.abspath(args.profiles))
+
+
+def history_for(args):
+    """Run history kept next to the profiles file, as the GUI does"""
+    return BuildHistory(os.path.join(profiles_dir(args), 'history'))
+
+
+def run_jobs(jobs, concurrency, history=None, signatures=None, timeout=None, agents=()):
+    """Run jobs with streamed output and return the worst exit code
+
+    With more than one job each output line is prefixed with the job's name.
+    signatures is the block digest cache used when delta syncing staged builds;
+    timeout is the minutes each job may run before it is cancelled; package
+    jobs are dispatched to the worker agents at the agents addresses.
+    Ctrl+C stops every job's whole process tree before returning.
+    """
+    prefixed = len(jobs) > 1
+
+    def on_output(job, batch):
+        prefix = f"[{job.name}] " if prefixed else ''
+        for tag, line in batch:
+            (sys.stderr if tag == 'stderr' else sys.stdout).write(prefix + line)
+            if job.parser and tag != 'log':  # followed log files repeat much of what UAT prints
+                job.parser.feed(line)
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+    def on_finish(job):
+        status = job.error or f"exit code {job.returncode} after {format_duration(job.elapsed)}"
+        if job.cancel_reason:
+            status = f"{job.cancel_reason} after {format_duration(job.elapsed)}"
+        if job.agent:
+            status += f" on agent {job.agent}"
+        if job.parser and not job.error:
+            job.parser.finish(job.finished_at)
+            status += f" | {format_summary(job.parser)}"
+        if job.resource_peaks:
+            peaks = job.resource_peaks
+            status += (f" | peak CPU {peaks['cpu']:.0f}%, memory {format_size(peaks['rss'])}, "
+                       f"disk {format_rate(peaks['read_rate'] + peaks['write_rate'])}")
+        print(f"[{job.name}] {job.state}: {status}", file=sys.stderr, flush=True)
+        # An agent's staged build and inputs are on that machine, not here
+        if job.fingerprints and job.state == DONE and not job.agent:
+            index, digests = job.fingerprints
+            index.record_success(job.params, digests)
+        if job.kind == 'package' and job.state == DONE and not job.agent and sync_targets(job.params):
+            try:
+                for message in sync_staged_build(job.params, signatures=signatures, on_progress=lambda stats: print(
+                        f"[{job.name}] syncing {format_progress(stats)}", file=sys.stderr, flush=True)):
+                    print(f"[{job.name}] {message}", file=sys.stderr, flush=True)
+            except OSError as e:
+                print(f"[{job.name}] Could not sync the staged build: {e}", file=sys.stderr)
+                job.state = FAILED
+        if job.artifact and job.state == DONE and not job.agent:
+            try:
+                print(f"[{job.name}] {store_build(*job.artifact, job.params)}", file=sys.stderr, flush=True)
+            except OSError as e:
+                print(f"[{job.name}] Could not store the build in the artifact cache: {e}", file=sys.stderr)
+        if history:
+            try:
+                for message in history.record(job):
+                    print(f"[{job.name}] slower than usual: {message}", file=sys.stderr, flush=True)
+                if job.kind == 'package':
+                    records = history.load(job.cwd)
+                    message = prewarm_report(records, records[-1])
+                    if message:
+                        print(f"[{job.name}] {message}", file=sys.stderr, flush=True)
+            except OSError as e:
+                print(f"Could not save run history: {e}", file=sys.stderr)
+
+    scheduler = JobScheduler(max_concurrency=concurrency)
+    scheduler.monitor = ResourceMonitor()
+    scheduler.agents = AgentPool(agents)
+    for job in jobs:
+        job.on_output = on_output
+        job.on_finish = on_finish
+        if timeout:
+            job.timeout = timeout * 60
+        scheduler.submit(job)
+    try:
+        while scheduler.poll():
+            time.sleep(0.02)
+    except KeyboardInterrupt:
+        # The jobs run in their own process groups, so Ctrl+C does not reach them by itself
+        print("Interrupted, stopping jobs...", file=sys.stderr, flush=True)
+        scheduler.shutdown()
+        return 130
+    finally:
+        scheduler.monitor.stop()
+
+    failed = [job for job in jobs if job.state != DONE]
+    if not failed:
+        return 0
+    return next((job.returncode for job in failed if job.returncode), 1)
+
+
+def package_job(directory, settings):
+    """Package job for one set of settings"""
+    settings = isolate_settings(settings)
+    name = f"{settings['Platform']} {settings['Configuration']}"
+    if settings.get('PipelineStep'):
+        name += f" {settings['PipelineStep']}"
+    job = Job(name, build_package_command(directory, settings), directory, kind='package')
+    job.params = run_params(settings)
+    job.parser = UATOutputParser()
+    return follow_package_logs(isolate_job(job, directory))
+
+
+def package_jobs(directory, settings):
+    """Job of a package run, or its compile, cook and stage jobs when pipelined"""
+    if not pipelined(settings):
+        return [package_job(directory, settings)]
+    compile_job, cook_job, stage_job = jobs = [package_job(directory, step) for step in pipeline_steps(settings)]
+    stage_job.depends_on = [compile_job, cook_job]
+    for job in jobs:
+        job.local = True  # the steps share this machine's project tree
+    return jobs
+
+
+def cmd_package(args):
+    """Build the BuildCookRun command(s) from a profile and run them"""
+    try:
+        settings = package_settings(args)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if not settings['Project']:
+        print("No project file set; pass --project or save one in the profile", file=sys.stderr)
+        return 2
+
+    if not settings['Matrix']:
+        settings, reason = apply_cook_tuning(settings, history_for(args).load(args.dir))
+        if reason:
+            print(f"# -cookprocesscount={get_cook_process_count(settings['CookerOptions'])}: {reason}", flush=True)
+        concurrency, matrix = 1, [settings]
+    else:
+        concurrency, reason, matrix = plan_matrix(settings)
+        if args.jobs:
+            concurrency, reason = args.jobs, '--jobs'
+        print(f"# {len(matrix)} jobs, {concurrency} at a time (limited by {reason})", flush=True)
+    if split_list(settings['Agents']):
+        print(f"# Dispatching to agents {settings['Agents']} while any is reachable", flush=True)
+
+    fingerprints = None
+    if settings['AutoSkip'] or settings['ArtifactCache']:
+        hasher = FileHasher(HashCache(os.path.join(profiles_dir(args), 'hash_cache.json')))
+        index = FingerprintIndex(os.path.join(profiles_dir(args), 'fingerprints'), settings['Project'], hasher)
+        fingerprints = (index, index.scan())
+        print(f"# Fingerprinted project inputs ({fingerprints[1]['hashed']} changed files hashed)", flush=True)
+
+    jobs = []
+    fills = {}  # (project, platform) -> DDC fill the runs of that platform share
+    for job_settings in matrix:
+        name = f"{job_settings['Platform']} {job_settings['Configuration']}"
+        artifact = None
+        if fingerprints:
+            if job_settings['AutoSkip']:
+                job_settings, notes = fingerprints[0].auto_skip(job_settings, fingerprints[1])
+                for note in notes:
+                    print(f"# {name}: {note}", flush=True)
+            if job_settings['ArtifactCache'] and not args.dry_run:
+                try:
+                    store, key, restored = restore_cached_build(args.dir, job_settings, fingerprints[1], hasher)
+                except OSError as e:
+                    store, restored = None, None
+                    print(f"# {name}: Could not restore from the artifact cache, running UAT: {e}", flush=True)
+                if restored:
+                    print(f"# {restored}", flush=True)
+                    continue
+                if store:
+                    artifact = (store, key)
+        run = with_prewarm(args.dir, job_settings, package_jobs(args.dir, job_settings), fills)
+        for job in run:
+            job.fingerprints = fingerprints
+        run[-1].artifact = artifact
+        jobs.extend(run)
+
+    if any(job.depends_on or job.after or job.kind == 'ddc' for job in jobs):
+        if args.jobs:
+            concurrency = args.jobs
+        else:
+            concurrency *= 2  # each pipelined run compiles and cooks, or fills the DDC while it compiles
+        print(f"# Steps run as their inputs are ready, {concurrency} jobs at a time", flush=True)
+        if pipelined(settings) and not settings['IsolateJobs']:
+            print("# Without IsolateJobs the compile and cook steps take turns on AutomationTool's mutex",
+                  flush=True)
+    for job in jobs:
+        print(job.command, flush=True)
+    if args.dry_run or not jobs:
+        return 0
+    signatures = HashCache(os.path.join(profiles_dir(args), 'block_signatures.json'), max_entries=20000)
+    return run_jobs(jobs, concurrency, history_for(args), signatures, args.timeout, split_list(settings['Agents']))
+
+
+def cmd_run(args):
+    """Run a shell command in the working directory"""
+    if len(args.command) == 1:
+        command = args.command[0]  # already a single shell command line
+    elif os.name == 'nt':
+        command = subprocess.list2cmdline(args.command)
+    else:
+        command = shlex.join(args.command)
+    if not command:
+        print("No command given", file=sys.stderr)
+        return 2
+    return run_jobs([Job(command, command, args.dir, kind='cmd')], 1, history_for(args), timeout=args.timeout)
+
+
+def cmd_prewarm(args):
+    """Fill the Derived Data Cache for a profile's project and platform(s), e.g. from a nightly schedule"""
+    try:
+        settings = package_settings(args)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if not settings['Project']:
+        print("No project file set; pass --project or save one in the profile", file=sys.stderr)
+        return 2
+    platforms = split_list(settings['MatrixPlatforms']) if settings['Matrix'] else [settings['Platform']]
+    jobs = [prewarm_job(args.dir, dict(settings, Platform=platform)) for platform in platforms]
+    for job in jobs:
+        print(job.command, flush=True)
+    if args.dry_run:
+        return 0
+    return run_jobs(jobs, 1, history_for(args), timeout=args.timeout)
+
+
+def cmd_agent(args):
+    """Run a worker agent that package jobs can be dispatched to"""
+    return serve_agent(args.host, args.port, args.slots)
+
+
+def cmd_import_profiles(args):
+    """Add or replace profiles from a JSON profiles file"""
+    store = ProfileStore(args.profiles)
+    try:
+        count = store.import_json(args.file)
+    except (OSError, ValueError) as e:
+        print(f"Could not import {args.file}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+    print(f"Imported {count} profiles from {args.file} into {store.path}")
+    return 0
+
+
+def cmd_export_profiles(args):
+    """Write every profile to a JSON profiles file"""
+    store = ProfileStore(args.profiles)
+    try:
+        count = store.export_json(args.file)
+    except OSError as e:
+        print(f"Could not export to {args.file}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+    print(f"Exported {count} profiles from {store.path} to {args.file}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='main.py', description="Run UECmd profiles without the GUI")
+    parser.add_argument('--profiles', default='command_profiles.json',
+                        help="profiles database, or the JSON file it is imported from (default: %(default)s)")
+    subparsers = parser.add_subparsers(dest='subcommand', required=True)
+
+    package = subparsers.add_parser('package', help="run BuildCookRun with a directory's package settings")
+    package.add_argument('--dir', required=True, help="working (engine) directory of the profile")
+    package.add_argument('--project', help="override the .uproject file")
+    package.add_argument('--platform', help="platform, or a comma separated list for a matrix")
+    package.add_argument('--configuration', help="configuration, or a comma separated list for a matrix")
+    package.add_argument('--set', action='append', default=[], metavar='SETTING=VALUE',
+                         help="override any package setting, e.g. --set Archive=false")
+    package.add_argument('--jobs', type=int, help="matrix jobs to run at once (default: sized to the machine)")
+    package.add_argument('--timeout', type=float, metavar='MINUTES', help="cancel jobs running longer than this")
+    package.add_argument('--dry-run', action='store_true', help="print the command(s) without running them")
+    package.set_defaults(func=cmd_package)
+
+    run = subparsers.add_parser('run', help="run a shell command in a working directory")
+    run.add_argument('--dir', required=True, help="working directory")
+    run.add_argument('--timeout', type=float, metavar='MINUTES', help="cancel the command after this long")
+    run.add_argument('command', nargs=argparse.REMAINDER, help="command line to run")
+    run.set_defaults(func=cmd_run)
+
+    prewarm = subparsers.add_parser('prewarm', help="fill the Derived Data Cache ahead of the next cook")
+    prewarm.add_argument('--dir', required=True, help="working (engine) directory of the profile")
+    prewarm.add_argument('--project', help="override the .uproject file")
+    prewarm.add_argument('--platform', help="platform, or a comma separated list")
+    prewarm.add_argument('--configuration', help=argparse.SUPPRESS)
+    prewarm.add_argument('--set', action='append', default=[], metavar='SETTING=VALUE', help="override a package setting")
+    prewarm.add_argument('--timeout', type=float, metavar='MINUTES', help="cancel the fill after this long")
+    prewarm.add_argument('--dry-run', action='store_true', help="print the command(s) without running them")
+    prewarm.set_defaults(func=cmd_prewarm)
+
+    agent = subparsers.add_parser('agent', help="run a worker agent that UECmd can dispatch package jobs to")
+    agent.add_argument('--host', default='127.0.0.1',
+                       help="address to listen on, e.g. 0.0.0.0 for all (default: %(default)s)")
+    agent.add_argument('--port', type=int, default=DEFAULT_AGENT_PORT, help="port to listen on (default: %(default)s)")
+    agent.add_argument('--slots', type=int, default=1, help="jobs to run at once (default: %(default)s)")
+    agent.set_defaults(func=cmd_agent)
+
+    import_profiles = subparsers.add_parser('import-profiles', help="add or replace profiles from a JSON file")
+    import_profiles.add_argument('file', help="JSON profiles file, as written by export-profiles")
+    import_profiles.set_defaults(func=cmd_import_profiles)
+
+    export_profiles = subparsers.add_parser('export-profiles', help="write all profiles to a JSON file")
+    export_profiles.add_argument('file', help="JSON file to write")
+    export_profiles.set_defaults(func=cmd_export_profiles)
+
+    return parser
+
+
+def run_cli(argv):
+    """Entry point for headless runs; returns the process exit code"""
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,76 @@
+import time
+import bisect
+
+# Commands kept per working directory; the lowest-ranked are evicted beyond this
+MAX_COMMANDS = 1000
+# A use counts half as much after this many seconds
+HALF_LIFE = 7 * 24 * 3600
+# Commands offered in the dropdown
+MAX_SUGGESTIONS = 50
+
+
+class CommandHistory:
+    """Frecency-ranked command history of one working directory
+
+    Use counts and last-used times live in the profile under 'command_stats'
+    as {command: [count, last used]}; 'commands' keeps the ranked list so
+    older versions and the CLI still read a plain history. Completion uses
+    a sorted list of lowercased commands, so a prefix lookup is a bisect
+    instead of a scan.
+    """
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.stats = profile.setdefault('command_stats', {})
+        commands = profile.setdefault('commands', [])
+        # Histories saved before stats were tracked: once each, in their stored order
+        for age, command in enumerate(commands):
+            self.stats.setdefault(command, [1, -age])
+        self.index = None  # sorted (lowercased command, command) pairs, built on first completion
+
+    def score(self, command, now=None):
+        """Use count weighted by how recently the command was last used"""
+        now = time.time() if now is None else now
+        count, last_used = self.stats[command]
+        return count * 0.5 ** (max(0.0, now - last_used) / HALF_LIFE)
+
+    def ranked(self, now=None):
+        """All commands, highest frecency first"""
+        now = time.time() if now is None else now
+        return sorted(self.stats, key=lambda command: (-self.score(command, now), -self.stats[command][1]))
+
+    def record(self, command, now=None):
+        """Count one use of a command, evicting the lowest-ranked entries beyond MAX_COMMANDS"""
+        now = time.time() if now is None else now
+        entry = self.stats.get(command)
+        if entry is None:
+            self.stats[command] = [1, now]
+        else:
+            entry[0] += 1
+            entry[1] = now
+        ranked = self.ranked(now)
+        for stale in ranked[MAX_COMMANDS:]:
+            del self.stats[stale]
+        self.profile['commands'] = ranked[:MAX_COMMANDS]
+        self.index = None
+
+    def complete(self, text, limit=MAX_SUGGESTIONS, now=None):
+        """Commands starting with text, then commands containing it, each ranked by frecency"""
+        if not text.strip():
+            return self.profile['commands'][:limit]
+        now = time.time() if now is None else now
+        if self.index is None:
+            self.index = sorted((command.lower(), command) for command in self.stats)
+        needle = text.lower()
+        start = bisect.bisect_left(self.index, (needle,))
+        prefixed = []
+        for key, command in self.index[start:]:
+            if not key.startswith(needle):
+                break
+            prefixed.append(command)
+        matches = sorted(prefixed, key=lambda command: -self.score(command, now))
+        if len(matches) < limit:
+            seen = set(prefixed)
+            contained = [command for key, command in self.index if needle in key and command not in seen]
+            matches += sorted(contained, key=lambda command: -self.score(command, now))
+        return matches[:limit]
@@ -0,0 +1,97 @@
+import statistics
+
+from jobs import format_duration
+from resources import GIB, cpu_count, available_memory
+from uat import get_cook_process_count, set_cook_process_count
+
+# Starting point before any runs are measured: one cook worker per two cores and 4 GiB
+CORES_PER_COOK_WORKER = 2
+MEMORY_PER_COOK_WORKER = 4 * GIB
+MAX_COOK_WORKERS = 32
+# Share of available memory the cook may plan to use
+MEMORY_HEADROOM = 0.9
+# A failed run that peaked above this share of available memory is treated as out of memory
+OOM_FRACTION = 0.85
+# Recent runs of a Platform/Configuration that are taken into account
+TUNE_WINDOW = 20
+
+
+def hardware_cook_processes(cores=None, memory=None):
+    """(cook process count, reason) from the machine's cores and free memory alone"""
+    cores = cpu_count() if cores is None else cores
+    memory = available_memory() if memory is None else memory
+    limits = [(cores // CORES_PER_COOK_WORKER, f'{cores} cores'), (MAX_COOK_WORKERS, 'maximum')]
+    if memory is not None:
+        limits.append((int(memory * MEMORY_HEADROOM // MEMORY_PER_COOK_WORKER), f'{memory / GIB:.1f} GiB free'))
+    count, reason = min(limits, key=lambda limit: limit[0])
+    return max(1, count), reason
+
+
+def cook_runs(records, settings):
+    """(cook process count, record) of recent package runs here with the same Platform/Configuration"""
+    runs = []
+    for record in records:
+        params = record.get('params', {})
+        if (record.get('kind') != 'package' or record.get('cancelled') or record.get('agent')
+                or params.get('Platform') != settings['Platform']
+                or params.get('Configuration') != settings['Configuration']):
+            continue
+        count = get_cook_process_count(params.get('CookerOptions', ''))
+        if count is not None:
+            runs.append((count, record))
+    return runs[-TUNE_WINDOW:]
+
+
+def tune_cook_processes(settings, records, cores=None, memory=None):
+    """(cook process count, reason) for a run, learned from earlier runs of the same profile
+
+    Starts from the hardware estimate, caps the count at what measured peak
+    memory per worker allows and below any count that ran out of memory,
+    then hill-climbs: the fastest measured count is used, unless it is the
+    highest or lowest tried so far and the next step beyond it is untested.
+    """
+    cores = cpu_count() if cores is None else cores
+    memory = available_memory() if memory is None else memory
+    base, reason = hardware_cook_processes(cores, memory)
+    runs = cook_runs(records, settings)
+    if not runs:
+        return base, f"{reason}, no measured runs yet"
+
+    ceiling, ceiling_reason = min(cores, MAX_COOK_WORKERS), f'{cores} cores'
+    if memory is not None:
+        per_worker = max((record['peaks']['rss'] / count for count, record in runs if record.get('peaks')),
+                         default=None)
+        if per_worker:
+            memory_limit = int(memory * MEMORY_HEADROOM // per_worker)
+            if memory_limit < ceiling:
+                ceiling, ceiling_reason = memory_limit, f'{per_worker / GIB:.1f} GiB peak per worker'
+        for count, record in runs:
+            peaks = record.get('peaks')
+            if record.get('exit') != 0 and peaks and peaks['rss'] >= memory * OOM_FRACTION and count - 1 < ceiling:
+                ceiling, ceiling_reason = count - 1, f'{count} ran out of memory'
+    ceiling = max(1, ceiling)
+
+    cook_times = {}
+    for count, record in runs:
+        if record.get('exit') == 0 and 'cook' in record.get('phases', {}) and count <= ceiling:
+            cook_times.setdefault(count, []).append(record['phases']['cook'])
+    if not cook_times:
+        return min(base, ceiling), (f"{reason}, capped by {ceiling_reason}" if base > ceiling else reason)
+
+    medians = {count: statistics.median(times) for count, times in cook_times.items()}
+    best = min(medians, key=medians.get)
+    step = max(1, best // 4)
+    fastest = f"{best} was fastest ({format_duration(medians[best])} cook)"
+    if best == max(medians) and best + step <= ceiling and best + step not in medians:
+        return best + step, f"trying more workers, {fastest}"
+    if best == min(medians) and best - step >= 1 and best - step not in medians:
+        return best - step, f"trying fewer workers, {fastest}"
+    return best, f"fastest measured: {format_duration(medians[best])} cook, at most {ceiling} ({ceiling_reason})"
+
+
+def apply_cook_tuning(settings, records, cores=None, memory=None):
+    """Settings with the tuned -cookprocesscount when AutoCookProcesses is on, plus the reason"""
+    if not settings['AutoCookProcesses']:
+        return settings, None
+    count, reason = tune_cook_processes(settings, records, cores, memory)
+    return dict(settings, CookerOptions=set_cook_process_count(settings['CookerOptions'], count)), reason
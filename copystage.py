@@ -0,0 +1,272 @@
+import os
+import sys
+import time
+import errno
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fingerprint import COOKED_PLATFORMS
+from deltasync import wants_delta, delta_copy, recover_tree
+from jobs import format_duration, format_size
+from uat import split_list
+
+# Bytes handed to one copy_file_range/sendfile call, and read per buffered copy
+COPY_CHUNK = 64 * 1024 * 1024
+READ_CHUNK = 1024 * 1024
+
+# Errors meaning the kernel copy is unsupported for these files, not that the copy failed
+KERNEL_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP}
+
+# One lock per normalized destination, so syncs into the same folder never overlap
+DESTINATION_LOCKS = {}
+DESTINATION_LOCKS_GUARD = threading.Lock()
+
+
+def staged_build_dir(settings):
+    """Folder UAT staged a run's build into, or None"""
+    staged_root = (settings.get('StagingDirectory')
+                   or os.path.join(os.path.dirname(os.path.abspath(settings['Project'])), 'Saved', 'StagedBuilds'))
+    candidates = [os.path.join(staged_root, name)
+                  for name in COOKED_PLATFORMS.get(settings['Platform'], [settings['Platform']])]
+    existing = [path for path in candidates if os.path.isdir(path)]
+    return max(existing, key=os.path.getmtime) if existing else None
+
+
+def destination_lock(destination):
+    """Lock held while a build is synced into a destination folder"""
+    key = os.path.normcase(os.path.abspath(destination))
+    with DESTINATION_LOCKS_GUARD:
+        return DESTINATION_LOCKS.setdefault(key, threading.Lock())
+
+
+def kernel_copy(infd, outfd, size, progress):
+    """Copy size bytes between file descriptors without going through user space
+
+    Returns False if neither copy_file_range nor sendfile works for these
+    files, in which case nothing was written.
+    """
+    calls = []
+    if hasattr(os, 'copy_file_range'):
+        calls.append(lambda offset, count: os.copy_file_range(infd, outfd, count, offset))
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        calls.append(lambda offset, count: os.sendfile(outfd, infd, offset, count))
+
+    for call in calls:
+        copied = 0
+        try:
+            while copied < size:
+                sent = call(copied, min(COPY_CHUNK, size - copied))
+                if sent == 0:
+                    break
+                copied += sent
+                progress(sent)
+            return True
+        except OSError as e:
+            if copied or e.errno not in KERNEL_COPY_UNSUPPORTED:
+                raise
+    return False
+
+
+def copy_file(src, dst, progress=lambda count: None):
+    """Copy a file and its timestamps through a temp file, zero-copy where the OS allows it"""
+    tmp_path = f'{dst}.uecmd-tmp'
+    with open(src, 'rb') as fsrc, open(tmp_path, 'wb') as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        if not kernel_copy(fsrc.fileno(), fdst.fileno(), size, progress):
+            for chunk in iter(lambda: fsrc.read(READ_CHUNK), b''):
+                fdst.write(chunk)
+                progress(len(chunk))
+    shutil.copystat(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+class CopyStats:
+    """Running totals of a sync, safe to read from another thread"""
+
+    def __init__(self):
+        self.files = 0
+        self.copied = 0
+        self.skipped = 0
+        self.removed = 0
+        self.bytes_total = 0  # bytes that need copying
+        self.bytes_copied = 0  # bytes copied or compared so far
+        self.bytes_written = 0
+        self.delta_files = 0
+        self.delta_bytes = 0  # size of the files updated by delta sync
+        self.delta_written = 0  # bytes delta sync wrote, its journal included
+        self.recovered = 0  # interrupted delta updates put back before the sync
+        self.started = time.time()
+        self.finished = None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def rate(self):
+        """Copy throughput in MB/s"""
+        return self.bytes_copied / 1e6 / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def format_progress(stats):
+    """Progress line of a running sync"""
+    return (f"{format_size(stats.bytes_copied)} of {format_size(stats.bytes_total)} copied "
+            f"({stats.copied}/{stats.files - stats.skipped} files) at {stats.rate:.0f} MB/s")
+
+
+def format_copy_summary(stats, destination):
+    """One-line result of a finished sync"""
+    summary = (f"Copied {stats.copied} files ({format_size(stats.bytes_copied)}) to {destination} "
+               f"in {format_duration(stats.elapsed)} at {stats.rate:.0f} MB/s; "
+               f"{stats.skipped} unchanged files skipped")
+    if stats.removed:
+        summary += f", {stats.removed} stale files removed"
+    if stats.recovered:
+        summary += f", {stats.recovered} interrupted updates rolled back first"
+    if stats.delta_files:
+        summary += (f"; delta sync updated {stats.delta_files} containers ({format_size(stats.delta_bytes)}) "
+                    f"writing {format_size(stats.delta_written)}, journal included")
+        if stats.delta_written < stats.delta_bytes:
+            summary += f", {format_size(stats.delta_bytes - stats.delta_written)} less than copying them"
+    return summary
+
+
+class CopyStage:
+    """Mirror a directory tree with parallel copies, skipping files that already match
+
+    A destination file matches when its size and mtime equal the source's; when
+    only the size matches, both are hashed and identical files just get their
+    mtime fixed, so the next sync skips them without reading them.
+    """
+
+    def __init__(self, hasher=None, workers=8, on_progress=None, progress_interval=0.5, delta=False,
+                 signatures=None):
+        self.hasher = hasher
+        self.delta = delta  # update large containers block by block instead of copying them
+        self.signatures = signatures  # HashCache of destination block digests, for delta sync
+        self.workers = workers
+        self.on_progress = on_progress  # on_progress(CopyStats), from a worker thread
+        self.progress_interval = progress_interval
+        self.lock = threading.Lock()
+        self.last_progress = 0.0
+
+    def plan(self, source, destination, stats):
+        """(source, destination, size) of every file that needs copying, plus stale destination files"""
+        pending = []
+        maybe_same = []
+        wanted = set()
+        for dirpath, dirnames, filenames in os.walk(source):
+            target_dir = os.path.normpath(os.path.join(destination, os.path.relpath(dirpath, source)))
+            for filename in filenames:
+                src = os.path.join(dirpath, filename)
+                dst = os.path.join(target_dir, filename)
+                wanted.add(os.path.normcase(os.path.normpath(dst)))
+                src_stat = os.stat(src)
+                stats.files += 1
+                try:
+                    dst_stat = os.stat(dst)
+                except OSError:
+                    dst_stat = None
+                if dst_stat is None or dst_stat.st_size != src_stat.st_size:
+                    pending.append((src, dst, src_stat.st_size))
+                elif dst_stat.st_mtime_ns == src_stat.st_mtime_ns:
+                    stats.skipped += 1
+                else:
+                    maybe_same.append((src, dst, src_stat))
+
+        if maybe_same and self.hasher:
+            digests, _ = self.hasher.hash_files([path for item in maybe_same for path in item[:2]])
+            for src, dst, src_stat in maybe_same:
+                if digests.get(src) is not None and digests.get(src) == digests.get(dst):
+                    os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+                    stats.skipped += 1
+                else:
+                    pending.append((src, dst, src_stat.st_size))
+        else:
+            pending.extend((src, dst, src_stat.st_size) for src, dst, src_stat in maybe_same)
+
+        stale = []
+        if os.path.isdir(destination):
+            for dirpath, dirnames, filenames in os.walk(destination):
+                stale.extend(os.path.join(dirpath, filename) for filename in filenames
+                             if os.path.normcase(os.path.normpath(os.path.join(dirpath, filename))) not in wanted)
+        return pending, stale
+
+    def sync(self, source, destination):
+        """Make destination an exact copy of source and return the CopyStats"""
+        stats = CopyStats()
+        if os.path.isdir(destination):
+            stats.recovered = recover_tree(destination)
+        pending, stale = self.plan(source, destination, stats)
+        stats.bytes_total = sum(size for _, _, size in pending)
+
+        def progress(count):
+            with self.lock:
+                stats.bytes_copied += count
+                now = time.time()
+                if self.on_progress is None or now - self.last_progress < self.progress_interval:
+                    return
+                self.last_progress = now
+            self.on_progress(stats)
+
+        def copy_one(item):
+            src, dst, size = item
+            if self.delta and wants_delta(src, dst, size):
+                written = delta_copy(src, dst, self.signatures, progress)
+                with self.lock:
+                    stats.delta_files += 1
+                    stats.delta_bytes += size
+                    stats.delta_written += written
+            else:
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                copy_file(src, dst, progress)
+                written = size
+            with self.lock:
+                stats.copied += 1
+                stats.bytes_written += written
+
+        # Largest first, so one huge pak does not start last and run alone
+        pending.sort(key=lambda item: item[2], reverse=True)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(copy_one, pending))
+
+        for path in stale:
+            os.remove(path)
+            stats.removed += 1
+        stats.finished = time.time()
+        if self.signatures:
+            self.signatures.save()
+        return stats
+
+
+def fast_archive(settings):
+    """True when UECmd, not UAT, copies this run's build into the archive directory"""
+    return bool(settings['FastArchive'] and settings['Archive'] and settings['ArchiveDirectory'].strip())
+
+
+def sync_targets(settings):
+    """Directories UECmd copies a run's staged build into itself"""
+    targets = [settings['ArchiveDirectory'].strip()] if fast_archive(settings) else []
+    return targets + split_list(settings['SyncDirectories'])
+
+
+def sync_staged_build(settings, hasher=None, signatures=None, on_progress=None):
+    """Copy a run's staged build into every sync target and return a summary line per target
+
+    Runs finishing together (e.g. Development and Shipping of one platform)
+    mirror into the same <target>/<platform> folder, and each sync deletes
+    what is not in its own source, so syncs into one destination take turns.
+    """
+    source = staged_build_dir(settings)
+    if source is None:
+        raise OSError(f"No staged {settings['Platform']} build found under "
+                      f"{settings.get('StagingDirectory') or 'Saved/StagedBuilds'}")
+    messages = []
+    for target in sync_targets(settings):
+        destination = os.path.join(target, os.path.basename(source))
+        stage = CopyStage(hasher, on_progress=on_progress, delta=settings['DeltaSync'], signatures=signatures)
+        with destination_lock(destination):
+            stats = stage.sync(source, destination)
+        messages.append(format_copy_summary(stats, destination))
+    return messages
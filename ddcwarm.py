@@ -0,0 +1,117 @@
+import os
+import statistics
+
+from fingerprint import COOKED_PLATFORMS
+from jobs import Job, format_duration
+
+# Command line editors tried in order; UE5 first, then UE4
+EDITOR_COMMANDS = [
+    'Engine/Binaries/Win64/UnrealEditor-Cmd.exe',
+    'Engine/Binaries/Win64/UE4Editor-Cmd.exe',
+    'Engine/Binaries/Linux/UnrealEditor-Cmd',
+    'Engine/Binaries/Mac/UnrealEditor-Cmd'
+]
+# Un-warmed cooks a pre-warmed cook is compared against
+SAVINGS_WINDOW = 10
+
+
+def editor_cmd_path(working_dir):
+    """Command line editor of an engine directory"""
+    for rel_path in EDITOR_COMMANDS:
+        path = os.path.join(working_dir, rel_path)
+        if os.path.isfile(path):
+            return path
+    return os.path.join(working_dir, EDITOR_COMMANDS[0])
+
+
+def ddc_target_platform(settings, editor):
+    """Cook platform name the fill commandlet expects, e.g. Windows (UE5) or WindowsNoEditor (UE4)"""
+    names = COOKED_PLATFORMS.get(settings['Platform'], [settings['Platform']])
+    if 'UE4Editor' in os.path.basename(editor) and len(names) > 1:
+        return names[1]
+    return names[0]
+
+
+def ddc_fill_command(working_dir, settings):
+    """Command that fills the Derived Data Cache (and shader cache) for a project and platform"""
+    editor = editor_cmd_path(working_dir)
+    return (f'"{editor}" "{settings["Project"]}" -run=DerivedDataCache -fill '
+            f'-targetplatform={ddc_target_platform(settings, editor)} -unattended -nop4 -nosplash')
+
+
+def prewarm_job(working_dir, settings):
+    """Job running the DDC fill for a set of package settings"""
+    job = Job(f"DDC fill {settings['Platform']}", ddc_fill_command(working_dir, settings), working_dir, kind='ddc')
+    job.params = {'Project': settings['Project'], 'Platform': settings['Platform']}
+    job.local = True  # fills this machine's cache
+    return job
+
+
+def prewarms(settings):
+    """True when a run fills the DDC while it compiles"""
+    return bool(settings['PrewarmDDC'] and settings['Cook'] == 'cook')
+
+
+def with_prewarm(working_dir, settings, jobs, fills):
+    """A run's jobs, preceded by a DDC fill when PrewarmDDC is on and the run cooks
+
+    fills maps (project, platform) to the fill queued for an earlier run of
+    the same batch, e.g. the Development half of a matrix, which later runs
+    of that platform share instead of filling again. The fill runs
+    alongside the compile: a pipelined run's cook step waits for it, and
+    starts even if the fill failed since it only warms a cache, while a run
+    that compiles and cooks in one BuildCookRun never waits for it.
+    """
+    if not prewarms(settings):
+        return jobs
+    key = (os.path.normcase(os.path.abspath(settings['Project'])), settings['Platform'])
+    prewarm = fills.get(key)
+    queued = prewarm is None
+    if queued:
+        prewarm = fills[key] = prewarm_job(working_dir, settings)
+    cook_job = next(job for job in jobs if job.params.get('PipelineStep') in (None, 'cook'))
+    if cook_job.params.get('PipelineStep') == 'cook':
+        cook_job.after.append(prewarm)
+    cook_job.local = True  # the fill warms this machine's cache
+    return [prewarm] + jobs if queued else jobs
+
+
+def prewarm_report(records, record):
+    """How much time a DDC pre-warm saved the cook in record, or None if it was not pre-warmed
+
+    A cook counts as pre-warmed when its run had PrewarmDDC on or a fill of
+    its platform (e.g. a nightly one) succeeded since the previous cook of
+    that platform. The time of the fills since then, failed ones included,
+    is added to the cook's, and the total is compared with the median of
+    recent cooks of the platform that were not pre-warmed. A fill shared by
+    several runs is charged to the first cook after it.
+    """
+    platform = record.get('params', {}).get('Platform')
+    cooks = []  # (cook seconds, fill seconds, pre-warmed, record) of the platform's cooks, oldest first
+    fill = 0.0
+    filled = False
+    for other in records:
+        if other.get('params', {}).get('Platform') != platform:
+            continue
+        if other.get('kind') == 'ddc':
+            fill += other.get('wall', 0.0)
+            filled = filled or other.get('exit') == 0
+        elif other.get('kind') == 'package' and other.get('exit') == 0 and 'cook' in other.get('phases', {}):
+            warmed = filled or bool(other['params'].get('PrewarmDDC'))
+            cooks.append((other['phases']['cook'], fill, warmed, other))
+            fill = 0.0
+            filled = False
+    if not cooks or cooks[-1][3] is not record or not cooks[-1][2]:
+        return None
+
+    cook, fill = cooks[-1][:2]
+    spent = f"{format_duration(fill)} filling the DDC + {format_duration(cook)} cooking"
+    cold = [seconds for seconds, _, warm, _ in cooks[:-1] if not warm][-SAVINGS_WINDOW:]
+    if not cold:
+        return f"DDC pre-warm run: {spent}; no un-warmed cook to compare with yet"
+    baseline = statistics.median(cold)
+    if cook + fill >= baseline:
+        return (f"DDC pre-warm did not pay off: {spent}, no faster than the "
+                f"{format_duration(baseline)} median cook without it")
+    return (f"DDC pre-warm saved {format_duration(baseline - cook - fill)} "
+            f"({spent} vs a {format_duration(baseline)} median cook without it)")
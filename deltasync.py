@@ -0,0 +1,162 @@
+import os
+import shutil
+import struct
+import hashlib
+
+# Container files that usually change in only a few places between builds
+DELTA_EXTENSIONS = ('.pak', '.ucas', '.utoc')
+# Smaller files are cheaper to copy outright than to compare
+DELTA_MIN_SIZE = 4 * 1024 * 1024
+BLOCK_SIZE = 1024 * 1024
+
+# Old contents of the blocks an update overwrites, kept next to the file until it is complete
+JOURNAL_SUFFIX = '.uecmd-journal'
+JOURNAL_HEADER = struct.Struct('<QQ')  # size and mtime (ns) of the file before the update
+JOURNAL_RECORD = struct.Struct('<QI')  # block index and length of the old data that follows
+# Changed blocks backed up (and synced to disk) at a time before any of them is overwritten
+JOURNAL_BATCH = 32
+
+
+def wants_delta(src, dst, size):
+    """True for large container files that already have an older copy at the destination
+
+    A destination with other hard links (e.g. an artifact cache object) is
+    replaced rather than patched, so the other names keep their contents.
+    """
+    if size < DELTA_MIN_SIZE or not src.lower().endswith(DELTA_EXTENSIONS):
+        return False
+    try:
+        return os.stat(dst).st_nlink == 1
+    except OSError:
+        return False
+
+
+def block_digest(data):
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def read_signatures(path):
+    """Digest of every BLOCK_SIZE block of a file"""
+    with open(path, 'rb') as f:
+        return [block_digest(block) for block in iter(lambda: f.read(BLOCK_SIZE), b'')]
+
+
+def journal_path(path):
+    return path + JOURNAL_SUFFIX
+
+
+def recover(path):
+    """Undo an interrupted delta update of path from its journal; True if there was one
+
+    Only blocks whose backup reached the journal in full can have been
+    overwritten, so a torn last record is ignored.
+    """
+    try:
+        journal = open(journal_path(path), 'rb')
+    except FileNotFoundError:
+        return False
+    with journal:
+        header = journal.read(JOURNAL_HEADER.size)
+        if len(header) == JOURNAL_HEADER.size and os.path.isfile(path):
+            size, mtime_ns = JOURNAL_HEADER.unpack(header)
+            with open(path, 'r+b') as f:
+                for record in iter(lambda: journal.read(JOURNAL_RECORD.size), b''):
+                    if len(record) < JOURNAL_RECORD.size:
+                        break
+                    index, length = JOURNAL_RECORD.unpack(record)
+                    data = journal.read(length)
+                    if len(data) < length:
+                        break
+                    f.seek(index * BLOCK_SIZE)
+                    f.write(data)
+                f.truncate(size)
+                f.flush()
+                os.fsync(f.fileno())
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+    os.remove(journal_path(path))
+    return True
+
+
+def recover_tree(root):
+    """Undo every interrupted delta update under root; returns how many there were"""
+    recovered = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(JOURNAL_SUFFIX):
+                recovered += recover(os.path.join(dirpath, filename[:-len(JOURNAL_SUFFIX)]))
+    return recovered
+
+
+def delta_copy(src, dst, signatures=None, progress=lambda count: None):
+    """Update dst in place to match src, writing only the blocks that differ
+
+    Blocks are compared at the same offsets, so this pays off when containers
+    are rebuilt with a stable layout. signatures is a HashCache holding the
+    block digests of files this wrote before; without a current entry the
+    destination is read once to compute them. Before a batch of blocks is
+    overwritten, their old contents go to a journal next to dst and are
+    synced to disk, so recover() can put back an update that was
+    interrupted; the journal is removed once dst is complete and synced.
+    Returns the bytes written, the journal's included.
+    """
+    recover(dst)
+    dst_stat = os.stat(dst)
+    old = signatures.get(dst, dst_stat) if signatures else None
+    if old is None:
+        old = read_signatures(dst)
+    if signatures:
+        signatures.forget(dst)
+
+    written = 0
+    new = []
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'r+b') as fdst, open(journal_path(dst), 'wb') as journal:
+            journal.write(JOURNAL_HEADER.pack(dst_stat.st_size, dst_stat.st_mtime_ns))
+            written += JOURNAL_HEADER.size
+            changed = []  # (index, new block or None to only back it up) not written yet
+
+            def patch():
+                nonlocal written
+                for index, _ in changed:
+                    fdst.seek(index * BLOCK_SIZE)
+                    data = fdst.read(BLOCK_SIZE)
+                    journal.write(JOURNAL_RECORD.pack(index, len(data)))
+                    journal.write(data)
+                    written += JOURNAL_RECORD.size + len(data)
+                journal.flush()
+                os.fsync(journal.fileno())
+                for index, block in changed:
+                    if block is not None:
+                        fdst.seek(index * BLOCK_SIZE)
+                        fdst.write(block)
+                        written += len(block)
+                changed.clear()
+
+            index = 0
+            for block in iter(lambda: fsrc.read(BLOCK_SIZE), b''):
+                digest = block_digest(block)
+                new.append(digest)
+                if index >= len(old) or old[index] != digest:
+                    changed.append((index, block))
+                    if len(changed) >= JOURNAL_BATCH:
+                        patch()
+                progress(len(block))
+                index += 1
+            # Blocks past the new end are cut off, so they are backed up too
+            changed.extend((index, None) for index in range(len(new), len(old)))
+            patch()
+            fdst.truncate(fsrc.tell())
+            fdst.flush()
+            os.fsync(fdst.fileno())
+        shutil.copystat(src, dst)
+    except BaseException:
+        try:
+            recover(dst)
+        except OSError:
+            pass  # the journal stays, and the next sync puts the old blocks back
+        raise
+    os.remove(journal_path(dst))
+
+    if signatures:
+        signatures.put(dst, os.stat(dst), new)
+    return written
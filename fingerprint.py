@@ -0,0 +1,153 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+import threading
+
+# Cooked output folder names UAT uses for each platform (UE5 names first, then UE4)
+COOKED_PLATFORMS = {
+    'Win64': ['Windows', 'WindowsNoEditor', 'WindowsClient'],
+    'Linux': ['Linux', 'LinuxNoEditor', 'LinuxClient'],
+    'Mac': ['Mac', 'MacNoEditor', 'MacClient'],
+    'PS5': ['PS5'],
+    'XSX': ['XSX']
+}
+
+# Folders that are outputs or caches, never inputs
+SKIPPED_DIRS = {'Binaries', 'Intermediate', 'Saved', 'DerivedDataCache', '.git', '.vs'}
+
+
+def classify(rel_path):
+    """Which fingerprints ('build', 'cook') a project-relative path feeds into"""
+    parts = rel_path.split('/')
+    if parts[0] == 'Source':
+        return ('build',)
+    if parts[0] == 'Content':
+        return ('cook',)
+    if parts[0] == 'Config' or rel_path.endswith('.uproject'):
+        return ('build', 'cook')
+    if parts[0] == 'Plugins':
+        if 'Source' in parts:
+            return ('build',)
+        if 'Content' in parts:
+            return ('cook',)
+        if 'Config' in parts or rel_path.endswith('.uplugin'):
+            return ('build', 'cook')
+    return ()
+
+
+def walk_files(project_dir):
+    """Yield (relative path, os.stat_result) for every input file of a project"""
+    for entry in os.scandir(project_dir):
+        if entry.is_file() and entry.name.endswith('.uproject'):
+            yield entry.name, entry.stat()
+
+    stack = [name for name in ('Source', 'Config', 'Content', 'Plugins')
+             if os.path.isdir(os.path.join(project_dir, name))]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            entries = list(os.scandir(os.path.join(project_dir, rel_dir)))
+        except OSError:
+            continue
+        for entry in entries:
+            rel_path = f'{rel_dir}/{entry.name}'
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in SKIPPED_DIRS:
+                    stack.append(rel_path)
+            elif entry.is_file():
+                yield rel_path, entry.stat()
+
+
+def run_key(settings):
+    """Runs with the same key produce the same build and cook outputs"""
+    return f"{settings['Platform']}|{settings['Configuration']}"
+
+
+class FingerprintIndex:
+    """Build and cook input fingerprints of a project and those of its last successful runs"""
+
+    def __init__(self, cache_dir, project_file, hasher):
+        self.project_dir = os.path.dirname(os.path.abspath(project_file))
+        key = os.path.normcase(self.project_dir)
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+        name = re.sub(r'[^A-Za-z0-9]+', '_', os.path.basename(self.project_dir))[:40] or 'project'
+        self.path = os.path.join(cache_dir, f'{name}-{digest}.json')
+        self.hasher = hasher  # FileHasher; its cache means only changed files are read
+        self.lock = threading.Lock()
+        self.last_success = {}  # run key -> {'build': digest, 'cook': digest}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.last_success = data.get('last_success', {})
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        """Write the index through a temp file so it is never left half written"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        content = json.dumps({'last_success': self.last_success}, separators=(',', ':'))
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, self.path)
+
+    def scan(self):
+        """Fingerprint the project's build and cook inputs as they are now
+
+        Returns {'build': digest, 'cook': digest, 'hashed': files re-hashed}.
+        """
+        files = sorted(walk_files(self.project_dir), key=lambda item: item[0])
+        digests, stats = self.hasher.hash_files(
+            [(os.path.join(self.project_dir, rel_path), stat) for rel_path, stat in files])
+
+        fingerprints = {'build': hashlib.blake2b(digest_size=16), 'cook': hashlib.blake2b(digest_size=16)}
+        for rel_path, _ in files:
+            digest = digests.get(os.path.join(self.project_dir, rel_path))
+            if digest is None:
+                continue
+            for kind in classify(rel_path):
+                fingerprints[kind].update(f'{rel_path}\0{digest}\n'.encode('utf-8'))
+        result = {kind: digest.hexdigest() for kind, digest in fingerprints.items()}
+        result['hashed'] = stats.hashed
+        return result
+
+    def record_success(self, settings, fingerprints):
+        """Remember the inputs a successful run built and/or cooked from"""
+        with self.lock:
+            entry = self.last_success.setdefault(run_key(settings), {})
+            if settings['Build']:
+                entry['build'] = fingerprints['build']
+            if settings['Cook'] == 'cook':
+                entry['cook'] = fingerprints['cook']
+            self.save()
+
+    def outputs_exist(self, settings):
+        """(binaries exist, cooked content exists) for a run's platform"""
+        binaries = os.path.isdir(os.path.join(self.project_dir, 'Binaries', settings['Platform']))
+        cooked_root = os.path.join(self.project_dir, 'Saved', 'Cooked')
+        cooked = any(os.path.isdir(os.path.join(cooked_root, name))
+                     for name in COOKED_PLATFORMS.get(settings['Platform'], [settings['Platform']]))
+        return binaries, cooked
+
+    def auto_skip(self, settings, fingerprints):
+        """Settings with -skipcook / no -build where nothing relevant changed, plus notes
+
+        A step is only skipped when the last successful run with the same
+        Platform/Configuration used identical inputs and its output is still on disk.
+        """
+        settings = dict(settings)
+        notes = []
+        previous = self.last_success.get(run_key(settings), {})
+        binaries, cooked = self.outputs_exist(settings)
+        if settings['Build'] and binaries and previous.get('build') == fingerprints['build']:
+            settings['Build'] = False
+            notes.append("Source and Config unchanged since the last successful build, skipping -build")
+        if settings['Cook'] == 'cook' and cooked and previous.get('cook') == fingerprints['cook']:
+            settings['Cook'] = 'skipcook'
+            notes.append("Content and Config unchanged since the last successful cook, using -skipcook")
+        return settings, notes
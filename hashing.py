@@ -0,0 +1,156 @@
+import os
+import json
+import mmap
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Files at least this big are hashed through mmap instead of buffered reads
+MMAP_THRESHOLD = 4 * 1024 * 1024
+# Slice size fed to the hash; large slices let hashlib release the GIL for longer
+HASH_SLICE = 8 * 1024 * 1024
+READ_CHUNK = 1024 * 1024
+
+
+def hash_file(path):
+    """Content digest (blake2b-128 hex) of a file"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, size, HASH_SLICE):
+                        digest.update(view[offset:offset + HASH_SLICE])
+                finally:
+                    view.release()
+        else:
+            for chunk in iter(lambda: f.read(READ_CHUNK), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashCache:
+    """Persistent (path, size, mtime) -> digest cache, evicting least recently used entries"""
+
+    def __init__(self, path, max_entries=500000):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = {}  # normalised path -> [size, mtime_ns, digest], oldest use first
+        self.dirty = False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def get(self, path, stat):
+        """Cached digest if the file's size and mtime still match, else None"""
+        key = self.key(path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != stat.st_size or entry[1] != stat.st_mtime_ns:
+                return None
+            self.entries[key] = self.entries.pop(key)  # mark as recently used
+            return entry[2]
+
+    def put(self, path, stat, digest):
+        with self.lock:
+            key = self.key(path)
+            self.entries.pop(key, None)
+            self.entries[key] = [stat.st_size, stat.st_mtime_ns, digest]
+            while len(self.entries) > self.max_entries:
+                del self.entries[next(iter(self.entries))]
+            self.dirty = True
+
+    def forget(self, path):
+        """Drop a file's entry, e.g. while the file is being rewritten"""
+        with self.lock:
+            if self.entries.pop(self.key(path), None) is not None:
+                self.dirty = True
+
+    def save(self):
+        """Write the cache through a temp file and os.replace, if it changed"""
+        with self.lock:
+            if not self.dirty:
+                return
+            content = json.dumps(self.entries, separators=(',', ':'))
+            self.dirty = False
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.hash_cache-', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, self.path)
+
+
+class HashStats:
+    """What one hash_files call had to do"""
+
+    def __init__(self):
+        self.files = 0
+        self.cached = 0
+        self.hashed = 0
+        self.bytes_hashed = 0
+        self.failed = 0
+
+
+class FileHasher:
+    """Hash many files in parallel, skipping files the cache already knows"""
+
+    def __init__(self, cache=None, workers=None):
+        self.cache = cache
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+
+    def hash_files(self, files):
+        """Digest of every file, given as paths or (path, os.stat_result) pairs
+
+        Returns ({path: digest}, HashStats). Unreadable files are left out.
+        """
+        stats = HashStats()
+        digests = {}
+        misses = []
+        for item in files:
+            path, stat = item if isinstance(item, tuple) else (item, None)
+            stats.files += 1
+            try:
+                stat = stat or os.stat(path)
+            except OSError:
+                stats.failed += 1
+                continue
+            digest = self.cache.get(path, stat) if self.cache else None
+            if digest is None:
+                misses.append((path, stat))
+            else:
+                digests[path] = digest
+                stats.cached += 1
+
+        if misses:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = pool.map(self._hash_one, misses)
+                for (path, stat), digest in zip(misses, results):
+                    if digest is None:
+                        stats.failed += 1
+                        continue
+                    digests[path] = digest
+                    stats.hashed += 1
+                    stats.bytes_hashed += stat.st_size
+                    if self.cache:
+                        self.cache.put(path, stat, digest)
+            if self.cache:
+                self.cache.save()
+        return digests, stats
+
+    @staticmethod
+    def _hash_one(item):
+        try:
+            return hash_file(item[0])
+        except (OSError, ValueError):
+            return None
@@ -0,0 +1,358 @@
+import os
+import signal
+import subprocess
+import time
+from itertools import count
+
+from streaming import ProcessOutputStream
+from logfollow import LogFollower, FollowedOutputStream, written_log_dirs
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+def start_process(command, cwd, env=None):
+    """Start a shell command in cwd with line-buffered, piped text output
+
+    The command gets its own process group (a new session on POSIX) so it and
+    everything it spawns can be stopped together. env holds variables to set
+    on top of this process's environment.
+    """
+    if os.name == 'nt':
+        group = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        group = {'start_new_session': True}
+    return subprocess.Popen(
+        command,
+        shell=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors='replace',
+        bufsize=1,
+        cwd=cwd,
+        env=dict(os.environ, **env) if env else None,
+        **group
+    )
+
+
+def terminate_tree(process, force=False):
+    """Ask a process and its whole group to stop, or kill them all when force is set"""
+    if os.name == 'nt':
+        if force:
+            # taskkill /T follows the parent chain, which the process group alone does not cover
+            subprocess.Popen(['taskkill', '/T', '/F', '/PID', str(process.pid)],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            process.send_signal(signal.CTRL_BREAK_EVENT)
+        return
+    os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+
+
+def format_duration(seconds):
+    """Format seconds as H:MM:SS, or M:SS under an hour"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def format_size(size):
+    """Format a byte count with a binary unit, e.g. 1.5 GiB"""
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024 or unit == 'GiB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class Job:
+    """A shell command waiting for, or holding, a scheduler slot"""
+
+    _ids = count(1)
+
+    def __init__(self, name, command, cwd, kind='cmd'):
+        self.id = next(self._ids)
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.kind = kind
+        self.params = {}  # settings the command was built from, kept with its history record
+        self.group = None  # jobs sharing a group also share that group's slot limit
+        self.state = QUEUED
+        self.process = None
+        self.stream = None
+        self.returncode = None
+        self.error = None
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.log = None  # where the caller keeps this job's output, e.g. a LogSpool
+        self.parser = None  # optional UATOutputParser fed with the job's output
+        self.fingerprints = None  # (FingerprintIndex, digests) of the inputs when the job was queued
+        self.artifact = None  # (ArtifactStore, key) the archived build is stored under on success
+        self.resources = None  # latest ResourceSample of the process tree, set by a ResourceMonitor
+        self.resource_peaks = None  # {'cpu', 'rss', 'read_rate', 'write_rate', 'processes'} peaks so far
+        self.timeout = None  # seconds the job may run before it is cancelled
+        self.cancel_reason = None
+        self.agent = None  # address of the worker agent running the job, None when it runs here
+        self.local = False  # run on this machine even when agents are configured
+        self.depends_on = []  # jobs that must succeed before this one starts
+        self.after = []  # jobs that must finish, successfully or not, before this one starts
+        self.env = None  # extra environment variables for the process
+        self.make_dirs = []  # folders created right before the process starts here
+        self.locks = set()  # shared resources no other running job may hold at the same time
+        self.shared_locks = set()  # resources other jobs may share but no job may hold alone meanwhile
+        self.lock_phases = {}  # lock -> parser phase after which the job lets go of it
+        self.log_dirs = []  # directories whose log files are tailed into the job's output when it runs here
+        self.warm_shell = None  # setup command of the warm shell session to run in, None for a new process
+
+        # Optional callbacks, invoked from whichever thread calls JobScheduler.poll
+        self.on_start = None  # on_start(job)
+        self.on_output = None  # on_output(job, [(tag, line), ...])
+        self.on_finish = None  # on_finish(job)
+
+    @property
+    def elapsed(self):
+        """Seconds spent running so far, or in total once finished"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def finished(self):
+        return self.state in (DONE, FAILED, CANCELLED)
+
+
+class JobScheduler:
+    """Run queued jobs in submission order, at most max_concurrency at a time"""
+
+    def __init__(self, max_concurrency=2, kill_grace=10.0):
+        self.max_concurrency = max_concurrency
+        self.kill_grace = kill_grace  # seconds a cancelled job gets to exit before it is killed
+        self.jobs = []
+        self.terminating = []  # (job, kill deadline) of cancelled jobs whose processes may still run
+        self.group_limits = {}  # group -> max running jobs of that group
+        self.monitor = None  # optional ResourceMonitor told about every started job
+        self.agents = None  # optional AgentPool that package jobs are dispatched to
+        self.shells = None  # optional ShellSessions that cmd jobs asking for a warm shell run in
+        self.on_change = None  # on_change(job) after any state change
+
+    @property
+    def running(self):
+        return [job for job in self.jobs if job.state == RUNNING]
+
+    @property
+    def queued(self):
+        return [job for job in self.jobs if job.state == QUEUED]
+
+    @property
+    def active(self):
+        """True while any job is queued or running, or a cancelled one is still being stopped"""
+        return bool(self.terminating) or any(not job.finished for job in self.jobs)
+
+    def submit(self, job):
+        """Queue a job and start it right away if a slot is free"""
+        self.jobs.append(job)
+        self.notify(job)
+        self.start_ready()
+        return job
+
+    def set_max_concurrency(self, max_concurrency):
+        """Change the number of slots, starting queued jobs if it grew"""
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.start_ready()
+
+    def start_ready(self):
+        """Start queued jobs until every slot is taken
+
+        Jobs the agent pool accepts do not use local slots or group limits;
+        they start as soon as an agent has a free slot of its own. A lock a
+        queued job waits for is kept from the jobs queued after it, so a
+        stream of jobs sharing a lock cannot starve one that needs it alone.
+        """
+        running = [job for job in self.running if job.agent is None]
+        free = self.max_concurrency - len(running)
+        group_running = {}
+        held = set()
+        shared = set()
+        waited_for = set()
+        for job in running:
+            group_running[job.group] = group_running.get(job.group, 0) + 1
+            held |= job.locks
+            shared |= job.shared_locks
+
+        for job in self.queued:
+            if (any(dependency.state != DONE for dependency in job.depends_on)
+                    or any(not other.finished for other in job.after)):
+                continue
+            if self.agents and self.agents.accepts(job):
+                self.start(job)
+                continue
+            if free <= 0:
+                continue
+            busy = job.locks & (held | shared) | job.shared_locks & held
+            if busy or (job.locks | job.shared_locks) & waited_for:
+                waited_for |= busy
+                continue
+            limit = self.group_limits.get(job.group)
+            if limit is not None and group_running.get(job.group, 0) >= limit:
+                continue
+            self.start(job)
+            if job.state == RUNNING:
+                free -= 1
+                group_running[job.group] = group_running.get(job.group, 0) + 1
+                held |= job.locks
+                shared |= job.shared_locks
+
+    def start(self, job):
+        """Launch a job's process, here or on a free agent, and begin streaming its output"""
+        job.started_at = time.time()
+        try:
+            if self.agents and self.agents.accepts(job):
+                remote = self.agents.start(job)
+                if remote is None:  # still connecting, or every agent is busy; try again on the next poll
+                    job.started_at = None
+                    return
+                job.process = job.stream = remote
+                job.agent = remote.agent.address
+            elif self.shells and self.shells.accepts(job):
+                job.process = job.stream = self.shells.start(job)
+            else:
+                for directory in job.make_dirs:
+                    os.makedirs(directory, exist_ok=True)
+                job.process = start_process(job.command, job.cwd, job.env)
+                job.stream = ProcessOutputStream(job.process)
+                if job.log_dirs:
+                    follower = LogFollower(job.log_dirs, job.process, job.started_at,
+                                           shared=lambda directory: self.shares_log_dir(job, directory))
+                    job.stream = FollowedOutputStream(job.stream, follower)
+        except Exception as e:
+            job.error = str(e)
+            self.finish(job, FAILED)
+            return
+        job.state = RUNNING
+        if self.monitor and job.agent is None:
+            self.monitor.watch(job)
+        if job.on_start:
+            job.on_start(job)
+        self.notify(job)
+
+    def release_locks(self, job):
+        """Let go of the locks whose last phase the job's parser, fed by on_output, saw end"""
+        if not job.lock_phases or job.parser is None:
+            return
+        for lock, phase in list(job.lock_phases.items()):
+            if phase in job.parser.durations and job.parser.phase != phase:
+                del job.lock_phases[lock]
+                job.locks.discard(lock)
+                job.shared_locks.discard(lock)
+
+    def shares_log_dir(self, job, directory):
+        """True while another job running here may write logs into directory"""
+        directory = os.path.normcase(os.path.abspath(directory))
+        return any(other is not job and other.agent is None and directory in written_log_dirs(other)
+                   for other in self.running)
+
+    def finish(self, job, state):
+        """Record a job's final state and hand its slot to the next one"""
+        job.state = state
+        job.finished_at = time.time()
+        if job.on_finish:
+            job.on_finish(job)
+        self.notify(job)
+        if state != DONE:
+            self.fail_dependents(job)
+
+    def fail_dependents(self, job):
+        """Fail fast: cancel jobs waiting on a job that did not succeed, and whatever else they wait on"""
+        for dependent in self.jobs:
+            if job not in dependent.depends_on or dependent.finished:
+                continue
+            self.cancel(dependent, f"Skipped, {job.name} {job.state}")
+            for sibling in dependent.depends_on:
+                if not sibling.finished:
+                    self.cancel(sibling, f"Cancelled, {job.name} {job.state}")
+
+    def cancel(self, job, reason='Cancelled'):
+        """Stop a queued or running job and free its slot right away
+
+        A running job's process group is asked to stop; if it is still alive
+        kill_grace seconds later, poll kills the whole tree.
+        """
+        if job.finished:
+            return
+        job.cancel_reason = reason
+        if job.state == QUEUED and self.agents:
+            self.agents.forget(job)
+        if job.state == RUNNING:
+            self.stop(job)
+            self.terminating.append((job, time.time() + self.kill_grace))
+        self.finish(job, CANCELLED)
+        self.start_ready()
+
+    def stop(self, job, force=False):
+        """Ask a running job's process tree to stop, here or through its agent or shell session"""
+        if not isinstance(job.process, subprocess.Popen):
+            job.process.cancel(force)
+            return
+        try:
+            terminate_tree(job.process, force)
+        except OSError:
+            pass  # already gone
+
+    def reap_terminating(self, now=None):
+        """Kill cancelled process trees whose grace period ran out and forget exited ones"""
+        now = time.time() if now is None else now
+        still_running = []
+        for job, deadline in self.terminating:
+            job.stream.drain()  # discard late output so the end-of-pipe markers are seen
+            if job.process.poll() is not None and job.stream.finished:
+                continue
+            if now >= deadline:
+                self.stop(job, force=True)
+                continue
+            still_running.append((job, deadline))
+        self.terminating = still_running
+
+    def shutdown(self, grace=3.0):
+        """Cancel every job and wait up to grace seconds before killing what is left"""
+        self.kill_grace = grace
+        for job in list(self.jobs):
+            if not job.finished:
+                self.cancel(job, 'Cancelled on exit')
+        deadline = time.time() + grace
+        while self.terminating and time.time() < deadline:
+            time.sleep(0.05)
+            self.reap_terminating()
+        self.reap_terminating(now=deadline)
+
+    def poll(self, max_lines=5000):
+        """Drain output of running jobs, retire finished ones and fill free slots"""
+        for job in self.running:
+            if job.timeout and job.elapsed > job.timeout:
+                self.cancel(job, f"Timed out (limit {format_duration(job.timeout)})")
+                continue
+            batch = job.stream.drain(max_lines)
+            if batch and job.on_output:
+                job.on_output(job, batch)
+            self.release_locks(job)
+            if job.stream.finished:
+                job.returncode = job.process.returncode
+                self.finish(job, DONE if job.returncode == 0 else FAILED)
+        self.reap_terminating()
+        self.start_ready()
+        return self.active
+
+    def remove_finished(self):
+        """Forget jobs that are done, failed or cancelled and return them"""
+        finished = [job for job in self.jobs if job.finished]
+        self.jobs = [job for job in self.jobs if not job.finished]
+        return finished
+
+    def notify(self, job):
+        if self.on_change:
+            self.on_change(job)
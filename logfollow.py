@@ -0,0 +1,265 @@
+import os
+import sys
+import time
+import queue
+import select
+import struct
+import fnmatch
+import threading
+import ctypes
+import ctypes.util
+
+from workspaces import UAT_LOG_FOLDER_ENV
+
+# Where UAT writes its logs (and the logs of the commandlets it runs) unless uebp_LogFolder is set
+UAT_LOG_DIR = 'Engine/Programs/AutomationTool/Saved/Logs'
+LOG_PATTERNS = ('*.log', '*.txt')
+# Seconds between scans when inotify is unavailable, and between checks for directories that do not exist yet
+POLL_INTERVAL = 0.5
+# Bytes read from a log file at a time, which bounds how far the queue can overshoot max_queued_lines
+READ_CHUNK = 64 * 1024
+
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, length of the name that follows
+
+
+def package_log_dirs(job):
+    """Directories UAT and the editor/cooker write a package job's logs to"""
+    uat_dir = (job.env or {}).get(UAT_LOG_FOLDER_ENV) or os.path.join(job.cwd, UAT_LOG_DIR)
+    project_dir = os.path.dirname(os.path.abspath(job.params['Project']))
+    return [uat_dir, os.path.join(project_dir, 'Saved', 'Logs')]
+
+
+def written_log_dirs(job):
+    """Normalized directories a job may write logs to, whether or not anything follows them"""
+    if job.kind == 'package':
+        directories = package_log_dirs(job)
+    elif job.params.get('Project'):  # e.g. a DDC fill, which runs the editor
+        directories = package_log_dirs(job)[1:]
+    else:
+        directories = []
+    return {os.path.normcase(os.path.abspath(directory)) for directory in directories}
+
+
+def follow_package_logs(job):
+    """Have the scheduler tail a package job's log files into its output when FollowLogs is on"""
+    if job.params.get('FollowLogs'):
+        job.log_dirs = package_log_dirs(job)
+    return job
+
+
+class Inotify:
+    """Linux inotify through ctypes; open() returns None where it is not available"""
+
+    def __init__(self, libc, fd):
+        self.libc = libc
+        self.fd = fd
+        self.directories = {}  # watch descriptor -> directory
+
+    @classmethod
+    def open(cls):
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        return cls(libc, fd) if fd >= 0 else None
+
+    def watch(self, directory):
+        """Watch a directory for written, created and moved-in files; False if it cannot be watched"""
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            return False
+        self.directories[wd] = directory
+        return True
+
+    def read(self, timeout):
+        """(directory, file name, mask) of the events that arrive within timeout seconds"""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            directory = self.directories.get(wd)
+            if mask & IN_IGNORED:
+                self.directories.pop(wd, None)  # the directory was removed
+            events.append((directory, name, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class LogFollower:
+    """Tail the log files under some directories into a queue of (tag, line) pairs
+
+    Each file is read incrementally from the byte offset it was last read
+    to, and only up to its last complete line. Files last written before
+    since are read from their end; files replaced under the same name
+    (rotated logs) are read from the start, and a renamed file carries on
+    where it was, since offsets are kept per file rather than per name.
+    While the queue is full, new lines stay on disk. Changes are picked up
+    with inotify where available and by scanning every POLL_INTERVAL
+    seconds otherwise. Once process has exited, the follower reads what is
+    left and stops.
+
+    shared(directory) tells whether another running job may be writing logs
+    into a directory too (e.g. the project's Saved/Logs during a matrix);
+    while it does, what is written there is skipped rather than mixed in.
+    """
+
+    def __init__(self, directories, process, since=None, shared=None, tag='log', max_queued_lines=20000):
+        self.directories = list(dict.fromkeys(directories))
+        self.process = process
+        self.tag = tag
+        self.max_queued_lines = max_queued_lines
+        self.lines = queue.Queue()
+        self.offsets = {}  # (device, inode) -> bytes read, so a renamed file carries on where it was
+        self.since = time.time() if since is None else since  # files last written before this are old logs
+        self.behind = False  # some file was left unread because the queue was full
+        self.shared = shared
+        self.skipping = set()  # directories skipped while other jobs write to them
+        self.done = False
+        self.scan(self.directories)
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        notifier = Inotify.open()
+        try:
+            unwatched = list(self.directories)
+            while self.process.poll() is None:
+                if notifier is None:
+                    time.sleep(POLL_INTERVAL)
+                    self.scan(self.directories)
+                    continue
+                # Logs folders are often only created once the run writes its first log
+                for directory in [directory for directory in unwatched if os.path.isdir(directory)]:
+                    if notifier.watch(directory):
+                        unwatched.remove(directory)
+                        self.scan([directory])
+                events = notifier.read(POLL_INTERVAL)
+                if self.behind or any(mask & (IN_Q_OVERFLOW | IN_IGNORED) for _, _, mask in events):
+                    self.scan(self.directories)
+                    unwatched = [directory for directory in self.directories
+                                 if directory not in notifier.directories.values()]
+                    continue
+                for directory, name, _ in events:
+                    if directory and self.matches(name):
+                        self.update(os.path.join(directory, name))
+            self.scan(self.directories, final=True)
+        finally:
+            if notifier is not None:
+                notifier.close()
+            self.done = True
+
+    @staticmethod
+    def matches(name):
+        return any(fnmatch.fnmatch(name.lower(), pattern) for pattern in LOG_PATTERNS)
+
+    def scan(self, directories, final=False):
+        """Read what was added to every log file in directories"""
+        self.behind = False
+        for directory in directories:
+            try:
+                entries = [entry.path for entry in os.scandir(directory) if entry.is_file() and self.matches(entry.name)]
+            except OSError:
+                continue
+            for path in entries:
+                self.update(path, final)
+
+    def update(self, path, final=False):
+        """Queue the complete lines added to one log file since it was last read
+
+        With final set, a last line without a newline is queued too.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        key = (stat.st_dev, stat.st_ino)
+        offset = self.offsets.get(key)
+        if offset is None:
+            offset = stat.st_size if stat.st_mtime < self.since else 0
+        elif stat.st_size < offset:
+            offset = 0  # truncated and rewritten
+        self.offsets[key] = offset
+
+        directory = os.path.dirname(path)
+        if self.shared is not None and self.shared(directory):
+            if directory not in self.skipping:
+                self.skipping.add(directory)
+                self.lines.put((self.tag, f"[UECmd] Not following {directory} while other jobs write logs there\n"))
+            self.offsets[key] = stat.st_size
+            return
+        if directory in self.skipping:
+            self.skipping.discard(directory)
+            self.lines.put((self.tag, f"[UECmd] Following {directory} again\n"))
+
+        label = f"[{os.path.basename(path)}] "
+        while stat.st_size > offset:
+            if not final and self.lines.qsize() >= self.max_queued_lines:
+                self.behind = True  # the rest stays on disk until the queue is drained
+                return
+            try:
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    data = f.read(READ_CHUNK)
+            except OSError:
+                return
+            end = len(data) if final and len(data) < READ_CHUNK else data.rfind(b'\n') + 1
+            if end <= 0:
+                return  # only part of a line so far
+            text = data[:end]
+            if offset == 0 and text.startswith(b'\xef\xbb\xbf'):
+                text = text[3:]
+            offset = self.offsets[key] = offset + end
+            for line in text.decode('utf-8', errors='replace').splitlines():
+                self.lines.put((self.tag, label + line + '\n'))
+
+    def drain(self, max_lines=5000):
+        """Return up to max_lines queued (tag, line) pairs without blocking"""
+        batch = []
+        while len(batch) < max_lines:
+            try:
+                batch.append(self.lines.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @property
+    def finished(self):
+        """True once the process has exited and every log line read after it was drained"""
+        return self.done and self.lines.empty()
+
+
+class FollowedOutputStream:
+    """A process's output stream with the lines of the logs it writes merged in"""
+
+    def __init__(self, stream, follower):
+        self.stream = stream
+        self.follower = follower
+
+    def drain(self, max_lines=5000):
+        batch = self.stream.drain(max_lines)
+        return batch + self.follower.drain(max_lines - len(batch))
+
+    @property
+    def finished(self):
+        return self.stream.finished and self.follower.finished
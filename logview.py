@@ -0,0 +1,492 @@
+import tkinter as tk
+from tkinter import ttk
+import os
+import re
+import mmap
+import bisect
+import tempfile
+from array import array
+
+from uatparse import classify_line
+
+# Severity filters offered in the filter bar, in order
+SEVERITY_FILTERS = {'Errors': 'error', 'Warnings': 'warning', 'Display': 'display'}
+ALL_LINES = 'All lines'
+
+
+class LogSpool:
+    """Append-only on-disk log with a sparse line index, read back through mmap
+
+    While lines are appended they are also indexed by severity and by UE log
+    category, so filters and "next error" jumps never scan the log itself.
+    """
+
+    # Only every Nth line offset is kept, so the index stays small on huge logs
+    INDEX_STRIDE = 64
+    # Bytes searched at a time when looking backwards
+    SEARCH_CHUNK = 4 * 1024 * 1024
+
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(prefix='uecmd-', suffix='.log')
+        self.file = os.fdopen(fd, 'w+b')
+        self.size = 0
+        self.line_count = 0
+        self.line_index = array('Q')
+        self.tag_starts = []  # start line of each tagged run, for bisect
+        self.tag_runs = []  # [tag, start, end) runs of lines with a non-default tag
+        self.map = None
+        self.mapped_size = 0
+        self.dirty = False
+        self.severity_lines = {severity: array('I') for severity in SEVERITY_FILTERS.values()}
+        self.category_lines = {}  # 'LogCook' -> array of line numbers
+        self.partial = {}  # tag -> start of a line still waiting for its newline, per stream
+
+    def append(self, lines, tag=None):
+        """Append lines with an optional tag
+
+        Text after the last newline is held back until the rest of its line
+        arrives with the same tag, so a line another stream appends in the
+        meantime never lands in the middle of it; end_lines() terminates it.
+        """
+        if not lines:
+            return
+        if tag in self.partial or any(not line.endswith('\n') for line in lines):
+            parts = (self.partial.pop(tag, '') + ''.join(lines)).split('\n')
+            if parts[-1]:
+                self.partial[tag] = parts[-1]
+            lines = [part + '\n' for part in parts[:-1]]
+            if not lines:
+                return
+        first = self.line_count
+        chunks = []
+        for line in lines:
+            if self.line_count % self.INDEX_STRIDE == 0:
+                self.line_index.append(self.size)
+            severity, category = classify_line(line)
+            if severity:
+                self.severity_lines[severity].append(self.line_count)
+            if category:
+                if category not in self.category_lines:
+                    self.category_lines[category] = array('I')
+                self.category_lines[category].append(self.line_count)
+            data = line.encode('utf-8', 'replace')
+            chunks.append(data)
+            self.size += len(data)
+            self.line_count += 1
+        self.file.write(b''.join(chunks))
+        self.dirty = True
+
+        if tag:
+            if self.tag_runs and self.tag_runs[-1][0] == tag and self.tag_runs[-1][2] == first:
+                self.tag_runs[-1][2] = self.line_count
+            else:
+                self.tag_starts.append(first)
+                self.tag_runs.append([tag, first, self.line_count])
+
+    def append_batch(self, batch):
+        """Append (tag, line) pairs, keeping runs of the same tag together"""
+        start = 0
+        for i in range(1, len(batch) + 1):
+            if i == len(batch) or batch[i][0] != batch[start][0]:
+                tag = batch[start][0]
+                self.append([line for _, line in batch[start:i]], None if tag == 'stdout' else tag)
+                start = i
+
+    def end_lines(self):
+        """Terminate the lines held back for a newline, e.g. once the process exited"""
+        for tag, text in list(self.partial.items()):
+            del self.partial[tag]
+            self.append([text + '\n'], tag)
+
+    def write(self, text, tag=None):
+        """Append free-form text on lines of its own, terminating the last line if needed"""
+        if not text:
+            return
+        self.end_lines()
+        if not text.endswith('\n'):
+            text += '\n'
+        self.append(text.splitlines(keepends=True), tag)
+
+    def _ensure_mapped(self):
+        """Flush pending writes and remap the file if it grew since the last read"""
+        if self.dirty:
+            self.file.flush()
+            self.dirty = False
+        if self.mapped_size < self.size:
+            if self.map is not None:
+                self.map.close()
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.mapped_size = len(self.map)
+
+    def _offset_of(self, line):
+        """Byte offset of the start of a line"""
+        if line >= self.line_count:
+            return self.size
+        offset = self.line_index[line // self.INDEX_STRIDE]
+        for _ in range(line % self.INDEX_STRIDE):
+            offset = self.map.find(b'\n', offset) + 1
+        return offset
+
+    def read(self, start, end):
+        """Return the text of lines [start, end)"""
+        start = max(0, start)
+        end = min(end, self.line_count)
+        if start >= end:
+            return ''
+        self._ensure_mapped()
+        return self.map[self._offset_of(start):self._offset_of(end)].decode('utf-8', 'replace')
+
+    def read_line(self, line):
+        """Text of a single line"""
+        return self.read(line, line + 1)
+
+    def line_at(self, offset):
+        """Line number containing a byte offset"""
+        block = bisect.bisect_right(self.line_index, offset) - 1
+        return block * self.INDEX_STRIDE + self.map[self.line_index[block]:offset].count(b'\n')
+
+    def matching_lines(self, name):
+        """Live array of the lines a filter-bar choice selects: a severity filter or a log category"""
+        if name in SEVERITY_FILTERS:
+            return self.severity_lines[SEVERITY_FILTERS[name]]
+        return self.category_lines.get(name, array('I'))
+
+    def search(self, pattern, line, column=0, backwards=False):
+        """Find a regex starting at (line, column), working in the mapped file, not the widget
+
+        Returns (line, start column, end column) of the match, or None.
+        Columns are character offsets within the line.
+        """
+        if not self.line_count:
+            return None
+        self._ensure_mapped()
+        regex = re.compile(pattern.encode('utf-8'), re.MULTILINE)
+        line_start = self._offset_of(line)
+        position = line_start + len(self.read_line(line)[:column].encode('utf-8'))
+        if backwards:
+            # Search line-aligned chunks from the position towards the start; the last match wins
+            match = None
+            end = position
+            while end > 0 and match is None:
+                start = self.map.rfind(b'\n', 0, max(0, end - self.SEARCH_CHUNK)) + 1
+                for match in regex.finditer(self.map, start, end):
+                    pass
+                end = start
+        else:
+            match = regex.search(self.map, position)
+            if match and match.end() == match.start() == position and position < self.size:
+                match = regex.search(self.map, position + 1)  # don't find the same empty match again
+        if match is None:
+            return None
+        found = self.line_at(match.start())
+        start = self._offset_of(found)
+        prefix = self.map[start:match.start()].decode('utf-8', 'replace')
+        matched = self.map[match.start():match.end()].decode('utf-8', 'replace').split('\n')[0]
+        return found, len(prefix), len(prefix) + len(matched)
+
+    def tags_between(self, start, end):
+        """Yield (tag, first, last) line ranges that intersect [start, end)"""
+        i = max(0, bisect.bisect_right(self.tag_starts, start) - 1)
+        while i < len(self.tag_runs) and self.tag_runs[i][1] < end:
+            tag, run_start, run_end = self.tag_runs[i]
+            if run_end > start:
+                yield tag, max(run_start, start), min(run_end, end)
+            i += 1
+
+    def close(self):
+        """Close and delete the spool file"""
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class LogView(tk.Frame):
+    """Read-only log view that keeps a bounded window of a LogSpool in a Text widget
+
+    A filter bar above the text narrows the view to one severity or log
+    category, using the spool's index, and runs regex searches against the
+    spool file rather than the widget contents.
+    """
+
+    def __init__(self, master, colors, window_lines=3000, height=12, font=("Consolas", 10)):
+        super().__init__(master, bg=colors['bg_dark'])
+        self.window_lines = window_lines
+        self.spool = LogSpool()
+        self.owns_spool = True
+        self.win_start = 0
+        self.win_end = 0
+        self.following = True
+        self.reposition_pending = False
+        self.filter_lines = None  # spool lines shown while filtered, else None
+        self.search_position = None  # (line, column) the next search continues from
+        self.colors = colors
+
+        self.setup_filter_bar()
+
+        self.text = tk.Text(
+            self,
+            height=height,
+            font=font,
+            wrap=tk.WORD,
+            bg=colors['bg_medium'],
+            fg=colors['text'],
+            insertbackground=colors['text'],
+            state='disabled',
+            yscrollcommand=self.on_text_scroll
+        )
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+        self.text.pack(side='left', fill='both', expand=True)
+
+        self.text.bind('<Control-End>', lambda e: self.see_end())
+        self.text.bind('<Control-Home>', lambda e: self.scroll_to_line(0))
+        self.text.bind('<Double-Button-1>', self.on_double_click)
+        self.text.bind('<Control-f>', lambda e: self.search_entry.focus_set())
+        self.text.tag_configure('search_match', background=colors['accent'])
+        self.bind('<Destroy>', lambda e: self.release_spool() if e.widget is self else None)
+
+    def setup_filter_bar(self):
+        """Severity/category filter and regex search controls above the text"""
+        bar = tk.Frame(self, bg=self.colors['bg_dark'])
+        bar.pack(side='top', fill='x', pady=(0, 2))
+
+        tk.Label(bar, text="Show:", font=("Arial", 9), bg=self.colors['bg_dark'],
+                 fg=self.colors['text']).pack(side='left')
+        self.filter_var = tk.StringVar(value=ALL_LINES)
+        self.filter_box = ttk.Combobox(bar, textvariable=self.filter_var, state='readonly', width=18,
+                                       postcommand=self.update_filter_choices, style='Custom.TCombobox')
+        self.filter_box.pack(side='left', padx=(5, 5))
+        self.filter_box.bind('<<ComboboxSelected>>', lambda e: self.set_filter(self.filter_var.get()))
+
+        self.search_status = tk.Label(bar, text="", font=("Arial", 9), bg=self.colors['bg_dark'],
+                                      fg=self.colors['text'])
+        self.search_status.pack(side='right')
+        for text, backwards in (("Next", False), ("Prev", True)):
+            tk.Button(bar, text=text, command=lambda b=backwards: self.find(b), font=("Arial", 8),
+                      bg=self.colors['bg_light'], fg=self.colors['text'], relief='flat',
+                      padx=6).pack(side='right', padx=(2, 0))
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(bar, textvariable=self.search_var, font=("Consolas", 9), width=30,
+                                     bg=self.colors['bg_light'], fg=self.colors['text'],
+                                     insertbackground=self.colors['text'])
+        self.search_entry.pack(side='right', padx=(5, 0))
+        self.search_entry.bind('<Return>', lambda e: self.find(False))
+        self.search_entry.bind('<Shift-Return>', lambda e: self.find(True))
+        self.search_var.trace_add('write', lambda *args: setattr(self, 'search_position', None))
+        tk.Label(bar, text="Find (regex):", font=("Arial", 9), bg=self.colors['bg_dark'],
+                 fg=self.colors['text']).pack(side='right')
+
+    def update_filter_choices(self):
+        """Offer the severities plus every log category seen so far"""
+        self.filter_box['values'] = [ALL_LINES, *SEVERITY_FILTERS, *sorted(self.spool.category_lines)]
+
+    def set_filter(self, name):
+        """Show only the lines of a severity or log category, or everything for ALL_LINES"""
+        self.filter_var.set(name)
+        self.filter_lines = None if name == ALL_LINES else self.spool.matching_lines(name)
+        self.search_status.config(text='' if self.filter_lines is None else f"{len(self.filter_lines)} lines")
+        self.reset()
+
+    def line_total(self):
+        """Number of lines the view can show: the whole spool, or the filtered lines"""
+        if self.filter_lines is not None:
+            return len(self.filter_lines)
+        return self.spool.line_count
+
+    def on_double_click(self, event):
+        """In a filtered view, jump to the clicked line in the full log"""
+        if self.filter_lines is None:
+            return None
+        index = self.win_start + int(self.text.index(f'@{event.x},{event.y}').split('.')[0]) - 1
+        if index < len(self.filter_lines):
+            line = self.filter_lines[index]
+            self.set_filter(ALL_LINES)
+            self.show_match(line, 0, len(self.spool.read_line(line).rstrip('\n')))
+        return 'break'
+
+    def find(self, backwards=False):
+        """Jump to the next (or previous) regex match in the full log"""
+        pattern = self.search_var.get()
+        if not pattern:
+            return
+        if self.search_position is None:
+            self.search_position = ((self.top_line() if self.filter_lines is None else 0), 0)
+        line, column = self.search_position
+        try:
+            found = self.spool.search(pattern, line, column, backwards)
+        except re.error as e:
+            self.search_status.config(text=f"Invalid regex: {e}")
+            return
+        if found is None:
+            self.search_status.config(text="No more matches")
+            return
+        if self.filter_lines is not None:
+            self.set_filter(ALL_LINES)
+        line, start, end = found
+        self.search_position = (line, start if backwards else end)
+        self.search_status.config(text=f"Line {line + 1}")
+        self.show_match(line, start, end)
+
+    def show_match(self, line, start, end):
+        """Scroll a few lines above a spool line and highlight columns [start, end) of it"""
+        self.scroll_to_line(max(0, line - 5))
+        text_line = line - self.win_start + 1
+        self.text.tag_remove('search_match', 1.0, tk.END)
+        self.text.tag_add('search_match', f'{text_line}.{start}', f'{text_line}.{max(end, start + 1)}')
+        self.text.see(f'{text_line}.{start}')
+
+    def tag_configure(self, tag, **options):
+        """Configure a text tag used for lines written with that tag"""
+        self.text.tag_configure(tag, **options)
+
+    def release_spool(self):
+        """Close the current spool if this view created it"""
+        if self.owns_spool:
+            self.spool.close()
+
+    def show(self, spool):
+        """Display another spool, e.g. a job's log, and follow its tail"""
+        if spool is self.spool:
+            return
+        self.release_spool()
+        self.spool = spool
+        self.owns_spool = False
+        self.search_position = None
+        self.set_filter(ALL_LINES)
+
+    def clear(self):
+        """Discard all output and start a fresh spool"""
+        self.release_spool()
+        self.spool = LogSpool()
+        self.owns_spool = True
+        self.search_position = None
+        self.set_filter(ALL_LINES)
+
+    def reset(self):
+        """Reload the window from the end of the current spool"""
+        self.win_start = self.win_end = 0
+        self.following = True
+        self.text.config(state='normal')
+        self.text.delete(1.0, tk.END)
+        self.text.config(state='disabled')
+        if self.line_total():
+            self.load_window(self.line_total())
+            self.text.see(tk.END)
+        self.update_scrollbar()
+
+    def write(self, text, tag=None):
+        """Append free-form text to the spool and show it"""
+        self.spool.write(text, tag)
+        self.refresh()
+
+    def append_lines(self, batch):
+        """Append (tag, line) pairs to the spool and show them"""
+        self.spool.append_batch(batch)
+        self.refresh()
+
+    def refresh(self):
+        """Pick up lines added to the spool, extending the window while following"""
+        if self.following and self.line_total() - self.win_end > self.window_lines:
+            self.load_window(self.line_total())
+            self.text.see(tk.END)
+        elif self.following and self.win_end < self.line_total():
+            self.text.config(state='normal')
+            self.insert_range(self.win_end, self.line_total())
+            self.win_end = self.line_total()
+            overflow = (self.win_end - self.win_start) - self.window_lines
+            if overflow > 0:
+                self.text.delete(1.0, f'{overflow + 1}.0')
+                self.win_start += overflow
+            self.text.config(state='disabled')
+            self.text.see(tk.END)
+        self.update_scrollbar()
+
+    def insert_range(self, start, end):
+        """Insert view lines [start, end) at the end of the Text widget"""
+        base = int(self.text.index('end-1c').split('.')[0]) - start
+        if self.filter_lines is None:
+            self.text.insert('end-1c', self.spool.read(start, end))
+            for tag, first, last in self.spool.tags_between(start, end):
+                self.text.tag_add(tag, f'{first + base}.0', f'{last + base}.0')
+            return
+        lines = self.filter_lines[start:end]
+        self.text.insert('end-1c', ''.join(self.spool.read_line(line) for line in lines))
+        for index, line in enumerate(lines, start + base):
+            for tag, _, _ in self.spool.tags_between(line, line + 1):
+                self.text.tag_add(tag, f'{index}.0', f'{index + 1}.0')
+
+    def load_window(self, top_line):
+        """Replace the window so it surrounds top_line and scroll it to the top"""
+        total = self.line_total()
+        top_line = max(0, min(top_line, total - 1))
+        self.win_start = max(0, min(top_line - self.window_lines // 2, total - self.window_lines))
+        self.win_end = min(total, self.win_start + self.window_lines)
+        self.text.config(state='normal')
+        self.text.delete(1.0, tk.END)
+        self.insert_range(self.win_start, self.win_end)
+        self.text.config(state='disabled')
+        self.text.yview(f'{top_line - self.win_start + 1}.0')
+
+    def scroll_to_line(self, line):
+        """Show the given view line at the top of the view"""
+        self.following = False
+        self.load_window(line)
+        self.update_scrollbar()
+
+    def see_end(self):
+        """Jump to the end of the log and follow new output"""
+        self.following = True
+        if self.win_end != self.line_total():
+            self.load_window(self.line_total())
+        self.text.see(tk.END)
+        self.update_scrollbar()
+
+    def top_line(self):
+        """View line number currently shown at the top of the view"""
+        return self.win_start + int(self.text.index('@0,0').split('.')[0]) - 1
+
+    def update_scrollbar(self):
+        """Map the visible region onto the whole spool for the scrollbar"""
+        total = self.line_total()
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        first, last = self.text.yview()
+        window = self.win_end - self.win_start
+        self.scrollbar.set((self.win_start + first * window) / total,
+                           (self.win_start + last * window) / total)
+
+    def on_text_scroll(self, first, last):
+        """Page neighbouring regions in when the view nears either edge of the window"""
+        first, last = float(first), float(last)
+        if self.line_total():
+            self.update_scrollbar()
+        self.following = self.win_end == self.line_total() and last >= 0.999
+        near_top = first < 0.1 and self.win_start > 0
+        near_bottom = last > 0.9 and self.win_end < self.line_total()
+        if (near_top or near_bottom) and not self.reposition_pending:
+            self.reposition_pending = True
+            self.after_idle(self.reposition)
+
+    def reposition(self):
+        """Recentre the window on the current top line"""
+        self.reposition_pending = False
+        self.load_window(self.top_line())
+        self.update_scrollbar()
+
+    def on_scrollbar(self, *args):
+        """Handle drags and clicks on the spool-wide scrollbar"""
+        if args[0] == 'moveto':
+            line = int(float(args[1]) * self.line_total())
+            if self.win_start <= line and line + 50 < self.win_end:
+                self.text.yview(f'{line - self.win_start + 1}.0')
+            else:
+                self.load_window(line)
+            self.update_scrollbar()
+        else:
+            self.text.yview(*args)
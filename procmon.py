@@ -0,0 +1,198 @@
+import os
+import time
+import threading
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PROC_ROOT = '/proc'
+HAS_PROC = os.path.isfile(os.path.join(PROC_ROOT, 'self', 'stat'))
+
+if HAS_PROC:
+    CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def monitoring_available():
+    """True if process trees can be sampled on this machine"""
+    return HAS_PROC or psutil is not None
+
+
+def read_proc_stat(pid):
+    """(ppid, cpu seconds, rss bytes) of a process from /proc/<pid>/stat"""
+    with open(f'{PROC_ROOT}/{pid}/stat', 'rb') as f:
+        data = f.read()
+    # The command name is in parentheses and may itself contain spaces or parentheses
+    fields = data[data.rindex(b')') + 2:].split()
+    return int(fields[1]), (int(fields[11]) + int(fields[12])) / CLOCK_TICKS, int(fields[21]) * PAGE_SIZE
+
+
+def read_proc_io(pid):
+    """(bytes read, bytes written) from disk by a process, or (0, 0) if not permitted"""
+    read_bytes = write_bytes = 0
+    try:
+        with open(f'{PROC_ROOT}/{pid}/io', 'rb') as f:
+            for line in f:
+                if line.startswith(b'read_bytes:'):
+                    read_bytes = int(line.split()[1])
+                elif line.startswith(b'write_bytes:'):
+                    write_bytes = int(line.split()[1])
+    except OSError:
+        pass
+    return read_bytes, write_bytes
+
+
+def proc_tree_counters(root_pid):
+    """{pid: (cpu seconds, rss, read bytes, write bytes)} for a process and all its descendants"""
+    stats = {}
+    children = {}
+    for name in os.listdir(PROC_ROOT):
+        if not name.isdigit():
+            continue
+        try:
+            ppid, cpu, rss = read_proc_stat(name)
+        except (OSError, ValueError, IndexError):
+            continue  # exited while we were looking
+        pid = int(name)
+        stats[pid] = (cpu, rss)
+        children.setdefault(ppid, []).append(pid)
+
+    counters = {}
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        if pid not in stats:
+            continue
+        counters[pid] = stats[pid] + read_proc_io(pid)
+        stack.extend(children.get(pid, ()))
+    return counters
+
+
+def psutil_tree_counters(root_pid):
+    """Same as proc_tree_counters, through psutil on systems without /proc"""
+    counters = {}
+    try:
+        root = psutil.Process(root_pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return counters
+    for process in processes:
+        try:
+            with process.oneshot():
+                times = process.cpu_times()
+                rss = process.memory_info().rss
+                io = process.io_counters() if hasattr(process, 'io_counters') else None
+        except psutil.Error:
+            continue
+        counters[process.pid] = (times.user + times.system, rss,
+                                 io.read_bytes if io else 0, io.write_bytes if io else 0)
+    return counters
+
+
+def tree_counters(root_pid):
+    if HAS_PROC:
+        return proc_tree_counters(root_pid)
+    return psutil_tree_counters(root_pid)
+
+
+class ResourceSample:
+    """Resource use of a process tree over the last sampling interval"""
+
+    __slots__ = ('cpu', 'rss', 'read_rate', 'write_rate', 'processes')
+
+    def __init__(self, cpu, rss, read_rate, write_rate, processes):
+        self.cpu = cpu  # percent of one core, so 400 means four busy cores
+        self.rss = rss
+        self.read_rate = read_rate  # bytes per second
+        self.write_rate = write_rate
+        self.processes = processes
+
+
+class ProcessTreeSampler:
+    """Turn successive counter snapshots of a process tree into rates and peaks
+
+    Rates only count processes present in both snapshots, so a child that
+    exits between samples does not make CPU or I/O appear to go backwards.
+    """
+
+    def __init__(self, root_pid):
+        self.root_pid = root_pid
+        self.previous = None
+        self.previous_time = None
+        self.peaks = {'cpu': 0.0, 'rss': 0, 'read_rate': 0.0, 'write_rate': 0.0, 'processes': 0}
+
+    def sample(self, now=None):
+        """Take a snapshot and return a ResourceSample, or None on the first call"""
+        now = time.time() if now is None else now
+        counters = tree_counters(self.root_pid)
+        previous, previous_time = self.previous, self.previous_time
+        self.previous, self.previous_time = counters, now
+        if previous is None or now <= previous_time:
+            return None
+
+        interval = now - previous_time
+        cpu = read = write = 0.0
+        for pid, (cpu_seconds, _, read_bytes, write_bytes) in counters.items():
+            if pid in previous:
+                old = previous[pid]
+                cpu += max(0.0, cpu_seconds - old[0])
+                read += max(0, read_bytes - old[2])
+                write += max(0, write_bytes - old[3])
+        sample = ResourceSample(cpu / interval * 100, sum(entry[1] for entry in counters.values()),
+                                read / interval, write / interval, len(counters))
+        for name in self.peaks:
+            self.peaks[name] = max(self.peaks[name], getattr(sample, name))
+        return sample
+
+
+class ResourceMonitor:
+    """Background thread sampling the process tree of every running job
+
+    Each watched job gets .resources (the latest ResourceSample) and
+    .resource_peaks (a dict of peak values), both replaced, never mutated,
+    so readers on other threads always see a consistent value.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.samplers = {}  # job -> ProcessTreeSampler
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def watch(self, job):
+        """Start sampling a job whose process has just been started"""
+        if not monitoring_available() or job.process is None:
+            return
+        with self.lock:
+            self.samplers[job] = ProcessTreeSampler(job.process.pid)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            with self.lock:
+                samplers = list(self.samplers.items())
+            for job, sampler in samplers:
+                if job.finished:
+                    with self.lock:
+                        self.samplers.pop(job, None)
+                    continue
+                try:
+                    sample = sampler.sample()
+                except OSError:
+                    continue
+                if sample is not None:
+                    job.resources = sample
+                    job.resource_peaks = dict(sampler.peaks)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def format_rate(bytes_per_second):
+    """Disk throughput in MB/s"""
+    return f"{bytes_per_second / 1e6:.0f} MB/s"
@@ -0,0 +1,223 @@
+import os
+import json
+import atexit
+import sqlite3
+import tempfile
+import threading
+from urllib.request import pathname2url
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+
+SCHEMA = 'CREATE TABLE IF NOT EXISTS profiles (directory TEXT PRIMARY KEY, data TEXT NOT NULL)'
+# Updates the row in place, so directories keep the order they were first saved in
+UPSERT = ('INSERT INTO profiles (directory, data) VALUES (?, ?) '
+          'ON CONFLICT(directory) DO UPDATE SET data = excluded.data')
+
+
+def database_path(path):
+    """SQLite file behind a profiles path; a .json path maps to the .db file next to it"""
+    root, ext = os.path.splitext(path)
+    return root + '.db' if ext.lower() == '.json' else path
+
+
+def read_profiles(path):
+    """Every saved profile, read without creating, importing or writing anything (e.g. for a dry run)"""
+    db_path = database_path(path)
+    if os.path.exists(db_path):
+        connection = sqlite3.connect(f'file:{pathname2url(os.path.abspath(db_path))}?mode=ro', uri=True)
+        try:
+            rows = connection.execute('SELECT directory, data FROM profiles ORDER BY rowid').fetchall()
+        finally:
+            connection.close()
+        return {directory: json.loads(text) for directory, text in rows}
+    legacy_path = os.path.splitext(db_path)[0] + '.json'
+    if os.path.exists(legacy_path):
+        with open(legacy_path, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+class LazyProfiles(MutableMapping):
+    """Working directory -> profile dict, each profile read from the database on first access"""
+
+    def __init__(self, store, directories):
+        self.store = store
+        self.directories = dict.fromkeys(directories)  # saved directories, in order
+        self.loaded = {}
+        self.saved = {}  # directory -> JSON last read or written, to find the profiles that changed
+        self.deleted = set()
+
+    def __getitem__(self, directory):
+        if directory not in self.loaded:
+            if directory not in self.directories:
+                raise KeyError(directory)
+            text = self.store.read(directory)
+            self.loaded[directory] = json.loads(text) if text else {}
+            self.saved[directory] = text
+        return self.loaded[directory]
+
+    def __setitem__(self, directory, profile):
+        self.directories[directory] = None
+        self.loaded[directory] = profile
+        self.deleted.discard(directory)
+
+    def __delitem__(self, directory):
+        del self.directories[directory]
+        self.loaded.pop(directory, None)
+        self.saved.pop(directory, None)
+        self.deleted.add(directory)
+
+    def __contains__(self, directory):
+        return directory in self.directories
+
+    def __iter__(self):
+        return iter(list(self.directories))
+
+    def __len__(self):
+        return len(self.directories)
+
+    def changes(self):
+        """({directory: JSON} of changed profiles, deleted directories) since the last call"""
+        upserts = {}
+        for directory, profile in self.loaded.items():
+            text = json.dumps(profile)
+            if text != self.saved.get(directory):
+                upserts[directory] = text
+        deleted, self.deleted = self.deleted, set()
+        return upserts, deleted
+
+
+class ProfileStore:
+    """Profiles in SQLite, one row per working directory, with coalesced write-behind saves
+
+    data maps working directories to profile dicts as the JSON file used to,
+    but a profile is only read when first accessed and a save writes only the
+    rows whose profile changed, so neither grows with the number of profiles.
+    An existing JSON profiles file is imported when the database is created.
+    """
+
+    def __init__(self, path, flush_delay=1.0):
+        self.path = database_path(path)
+        self.flush_delay = flush_delay  # seconds of quiet before a pending save is written
+        self.lock = threading.RLock()
+        self.write_lock = threading.Lock()  # keeps concurrent flushes from reordering writes
+        self.db_lock = threading.Lock()  # one connection, shared by the UI and the flush timer
+        self.timer = None
+        self.dirty = False
+        self.depth = 0
+        created = not os.path.exists(self.path)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(SCHEMA)
+        rows = self.connection.execute('SELECT directory FROM profiles ORDER BY rowid').fetchall()
+        self.data = LazyProfiles(self, [row[0] for row in rows])
+        atexit.register(self.flush)
+
+        legacy_path = os.path.splitext(self.path)[0] + '.json'
+        if created and os.path.exists(legacy_path):
+            try:
+                self.import_json(legacy_path)
+            except (OSError, ValueError):
+                pass
+
+    def read(self, directory):
+        """Stored JSON of one directory's profile, or None"""
+        with self.db_lock:
+            row = self.connection.execute('SELECT data FROM profiles WHERE directory = ?', (directory,)).fetchone()
+        return row[0] if row else None
+
+    @contextmanager
+    def transaction(self):
+        """Group changes to data so they are saved together once the block ends"""
+        with self.lock:
+            self.depth += 1
+            try:
+                yield self.data
+            finally:
+                self.depth -= 1
+                self.dirty = True
+                if self.depth == 0:
+                    self.schedule_flush()
+
+    def mark_dirty(self):
+        """Record that data changed and schedule a save"""
+        with self.transaction():
+            pass
+
+    def schedule_flush(self):
+        """(Re)start the idle timer so a burst of changes produces one write"""
+        if self.timer is not None:
+            self.timer.cancel()
+        self.timer = threading.Timer(self.flush_delay, self.flush)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def flush(self):
+        """Write pending changes now"""
+        with self.write_lock:
+            self.write_pending()
+
+    def write_pending(self):
+        """Upsert the profiles that changed and delete removed ones in a single transaction"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.dirty:
+                return
+            upserts, deleted = self.data.changes()
+            self.dirty = False
+
+        try:
+            with self.db_lock, self.connection:
+                self.connection.executemany(UPSERT, upserts.items())
+                self.connection.executemany('DELETE FROM profiles WHERE directory = ?',
+                                            [(directory,) for directory in deleted])
+        except sqlite3.Error:
+            with self.lock:
+                self.data.deleted |= deleted
+                self.dirty = True
+            raise
+        with self.lock:
+            self.data.saved.update(upserts)
+
+    def import_json(self, path):
+        """Add or replace the profiles of a JSON profiles file and save them"""
+        with open(path, 'r') as f:
+            profiles = json.load(f)
+        if not isinstance(profiles, dict):
+            raise ValueError(f"{path} does not contain a profiles object")
+        with self.transaction():
+            for directory, profile in profiles.items():
+                self.data[directory] = profile
+        self.flush()
+        return len(profiles)
+
+    def export_json(self, path):
+        """Write every profile to a JSON file in the format import_json reads"""
+        self.flush()
+        with self.db_lock:
+            rows = self.connection.execute('SELECT directory, data FROM profiles ORDER BY rowid').fetchall()
+        content = json.dumps({directory: json.loads(text) for directory, text in rows}, indent=2)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.profiles-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return len(rows)
+
+    def close(self):
+        """Flush pending changes, stop the idle timer and close the database"""
+        self.flush()
+        atexit.unregister(self.flush)
+        with self.db_lock:
+            self.connection.close()
@@ -0,0 +1,64 @@
+import os
+import sys
+
+GIB = 1024 ** 3
+
+# Rough footprint of one BuildCookRun job (UBT, the cook director and its workers)
+CORES_PER_PACKAGE_JOB = 4
+MEMORY_PER_PACKAGE_JOB = 8 * GIB
+
+
+def cpu_count():
+    """Number of logical cores this process may use"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def available_memory():
+    """Bytes of physical memory currently available, or None if unknown"""
+    if sys.platform == 'win32':
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ('dwLength', ctypes.c_ulong),
+                ('dwMemoryLoad', ctypes.c_ulong),
+                ('ullTotalPhys', ctypes.c_ulonglong),
+                ('ullAvailPhys', ctypes.c_ulonglong),
+                ('ullTotalPageFile', ctypes.c_ulonglong),
+                ('ullAvailPageFile', ctypes.c_ulonglong),
+                ('ullTotalVirtual', ctypes.c_ulonglong),
+                ('ullAvailVirtual', ctypes.c_ulonglong),
+                ('ullAvailExtendedVirtual', ctypes.c_ulonglong)
+            ]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+        return None
+
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def package_concurrency(job_count, cores=None, memory=None):
+    """(concurrency, limiting resource) for running BuildCookRun jobs side by side"""
+    cores = cpu_count() if cores is None else cores
+    memory = available_memory() if memory is None else memory
+
+    limits = [(job_count, 'jobs'), (max(1, cores // CORES_PER_PACKAGE_JOB), f'{cores} cores')]
+    if memory is not None:
+        limits.append((max(1, memory // MEMORY_PER_PACKAGE_JOB), f'{memory / GIB:.1f} GiB free'))
+    concurrency, reason = min(limits, key=lambda limit: limit[0])
+    return max(1, concurrency), reason
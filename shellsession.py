@@ -0,0 +1,287 @@
+import os
+import queue
+import shlex
+import subprocess
+import tempfile
+import threading
+import uuid
+from collections import deque
+
+from jobs import terminate_tree
+
+# Idle sessions kept per working directory and setup; more are closed once their command ends
+MAX_IDLE_SESSIONS = 2
+
+
+def shell_args():
+    """Command line of a shell that reads commands from stdin without echoing them"""
+    if os.name == 'nt':
+        return ['cmd.exe', '/D', '/Q']
+    return ['/bin/sh']
+
+
+def ready_script(token):
+    """Shell input printing the end markers of a command that did nothing"""
+    if os.name == 'nt':
+        return f'echo {token} 0\r\necho {token} 1>&2\r\n'
+    return f'echo {token} 0; echo {token} >&2\n'
+
+
+def batch_file(command):
+    """Write a command to a temporary batch file that runs it inside setlocal, and return its path
+
+    The command is not quoted or escaped anywhere, so quotes in it are
+    passed on as typed; like any batch file line, for loop variables need %%.
+    """
+    fd, path = tempfile.mkstemp(prefix='uecmd-', suffix='.cmd')
+    with os.fdopen(fd, 'w', newline='\r\n') as f:
+        f.write(f'@echo off\nsetlocal\n{command}\n')
+    return path
+
+
+def command_script(command, token, setup=''):
+    """Shell input running command, then printing token and the exit code on stdout and token on stderr
+
+    The command runs with no input and cannot change what later commands
+    see: in a subshell on POSIX, and on Windows as a call of the batch file
+    it was written to (see batch_file), whose setlocal ends with it, so no
+    cmd.exe is started per command. Setup runs in the session itself, so
+    the environment it sets up is kept.
+    """
+    if os.name == 'nt':
+        lines = [f'{setup} < NUL'] if setup else []
+        path = batch_file(command)
+        lines += [f'call "{path}" < NUL', f'echo {token} %ERRORLEVEL%', f'del "{path}" > NUL 2>&1', f'echo {token} 1>&2']
+        return ''.join(line + '\r\n' for line in lines)
+    script = f'eval {shlex.quote(setup)} </dev/null; ' if setup else ''
+    return (script + f"( eval {shlex.quote(command)} ) </dev/null; "
+            f"printf '%s %d\\n' {token} $?; printf '%s\\n' {token} >&2\n")
+
+
+class ShellCommand:
+    """A command running in a ShellSession, with the process and output stream interface the scheduler uses"""
+
+    def __init__(self, session, discard=False, max_queued_lines=20000):
+        self.session = session
+        self.pid = session.process.pid
+        self.discard = discard  # output the shell prints before it is ready
+        self.returncode = None
+        self.lines = queue.Queue(maxsize=max_queued_lines)
+        self.ended = set()  # pipes whose end marker was seen
+        self.done = False
+        self.cancelled = False
+
+    def put(self, item):
+        """Queue a line unless it is discarded, dropping lines once cancelled"""
+        while not self.discard and not self.cancelled:
+            try:
+                self.lines.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                pass
+
+    def end(self, tag, returncode=None):
+        """Record the end marker of one pipe; True once both pipes ended"""
+        self.ended.add(tag)
+        if returncode is not None:
+            self.returncode = returncode
+        return self.ended == {'stdout', 'stderr'}
+
+    def poll(self):
+        return self.returncode if self.done else None
+
+    def cancel(self, force=False):
+        """Stop the command by stopping its whole session, which is not reused"""
+        self.cancelled = True
+        self.session.stop(force)
+
+    def drain(self, max_lines=5000):
+        """Return up to max_lines queued (tag, line) pairs without blocking"""
+        batch = []
+        while len(batch) < max_lines:
+            try:
+                batch.append(self.lines.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @property
+    def finished(self):
+        return self.done and self.lines.empty()
+
+
+class ShellSession:
+    """A shell kept running in a working directory that runs one command at a time
+
+    Each pipe is read by its own thread; a line holding the session's token
+    ends the current command on that pipe, and the stdout one carries its
+    exit code. The shell gets its own process group, like any job, so
+    cancelling a command stops the session with it.
+    """
+
+    def __init__(self, cwd, setup='', on_idle=None):
+        self.cwd = cwd
+        self.setup = setup.strip()
+        self.on_idle = on_idle  # on_idle(session) once a command has ended and the session is reusable
+        self.token = f"__UECMD_DONE_{uuid.uuid4().hex}__"
+        self.lock = threading.Lock()
+        self.pending = {'stdout': deque(), 'stderr': deque()}  # commands each pipe has not ended yet
+        self.commands = 0
+        self.closed = False
+        if os.name == 'nt':
+            group = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group = {'start_new_session': True}
+        self.process = subprocess.Popen(
+            shell_args(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors='replace',
+            bufsize=1,
+            cwd=cwd,
+            **group
+        )
+        for pipe, tag in ((self.process.stdout, 'stdout'), (self.process.stderr, 'stderr')):
+            threading.Thread(target=self._read_pipe, args=(pipe, tag), daemon=True).start()
+        # Whatever the shell prints on start-up (e.g. a banner) belongs to no command
+        self.send(ShellCommand(self, discard=True), ready_script(self.token))
+
+    @property
+    def alive(self):
+        return not self.closed and self.process.poll() is None
+
+    def run(self, command):
+        """Start a command and return its ShellCommand; the first one also runs the setup"""
+        setup = self.setup if self.commands == 0 else ''
+        self.commands += 1
+        shell_command = ShellCommand(self)
+        self.send(shell_command, command_script(command, self.token, setup))
+        return shell_command
+
+    def send(self, shell_command, text):
+        """Write the shell input of a command, after queueing it on both pipes"""
+        with self.lock:
+            self.pending['stdout'].append(shell_command)
+            self.pending['stderr'].append(shell_command)
+        try:
+            self.process.stdin.write(text)
+            self.process.stdin.flush()
+        except (OSError, ValueError):
+            self.closed = True
+            raise OSError(f"Shell session in {self.cwd} has exited")
+
+    def _read_pipe(self, pipe, tag):
+        """Hand each line to the command it belongs to until the shell exits"""
+        try:
+            for line in iter(pipe.readline, ''):
+                with self.lock:
+                    current = self.pending[tag][0] if self.pending[tag] else None
+                marker = line.find(self.token)
+                if marker < 0:
+                    if current is not None:
+                        current.put((tag, line))
+                    continue
+                if marker > 0 and current is not None:
+                    current.put((tag, line[:marker] + '\n'))  # output that did not end with a newline
+                if current is not None:
+                    returncode = None
+                    if tag == 'stdout':
+                        fields = line[marker + len(self.token):].split()
+                        returncode = int(fields[0]) if fields and fields[0].lstrip('-').isdigit() else 1
+                    self.end(tag, returncode)
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+            self.closed = True
+            self.end_all(tag)
+
+    def end(self, tag, returncode):
+        with self.lock:
+            shell_command = self.pending[tag].popleft()
+            if not shell_command.end(tag, returncode):
+                return
+            shell_command.done = True
+        if not shell_command.discard and self.on_idle:
+            self.on_idle(self)
+
+    def end_all(self, tag):
+        """The shell exited: end every command still waiting on this pipe"""
+        returncode = self.process.wait()
+        with self.lock:
+            while self.pending[tag]:
+                shell_command = self.pending[tag].popleft()
+                if shell_command.end(tag, returncode if returncode else -1):
+                    shell_command.done = True
+
+    def stop(self, force=False):
+        """Stop the shell and whatever it is running"""
+        self.closed = True
+        try:
+            terminate_tree(self.process, force)
+        except OSError:
+            pass
+
+    def close(self):
+        """Let an idle shell exit"""
+        self.closed = True
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+
+
+class ShellSessions:
+    """Warm shell sessions, per working directory and setup command, that cmd jobs run in
+
+    A job gets an idle session of its working directory and setup if there
+    is one, or a new session otherwise, so the setup (e.g. sourcing an SDK
+    environment script) is paid once per session instead of once per command.
+    """
+
+    def __init__(self):
+        self.idle = {}  # (cwd, setup) -> idle sessions
+        self.lock = threading.Lock()
+
+    def accepts(self, job):
+        return job.kind == 'cmd' and job.warm_shell is not None
+
+    def start(self, job):
+        """Run a job's command in a warm session and return its ShellCommand"""
+        key = (job.cwd, job.warm_shell.strip())
+        with self.lock:
+            sessions = self.idle.get(key, [])
+            while sessions:
+                session = sessions.pop()
+                if session.alive:
+                    break
+            else:
+                session = None
+        if session is not None:
+            try:
+                return session.run(job.command)
+            except OSError:
+                pass  # the shell exited while idle; start another
+        return ShellSession(job.cwd, job.warm_shell, self.release).run(job.command)
+
+    def release(self, session):
+        """Return a session whose command ended to the idle pool"""
+        with self.lock:
+            sessions = self.idle.setdefault((session.cwd, session.setup), [])
+            if session.alive and len(sessions) < MAX_IDLE_SESSIONS:
+                sessions.append(session)
+                return
+        session.close()
+
+    def close(self):
+        """Close every idle session"""
+        with self.lock:
+            sessions = [session for idle in self.idle.values() for session in idle]
+            self.idle = {}
+        for session in sessions:
+            session.close()
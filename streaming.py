@@ -0,0 +1,60 @@
+import queue
+import threading
+
+
+class ProcessOutputStream:
+    """Stream a process's stdout/stderr line by line through a bounded queue"""
+
+    def __init__(self, process, max_queued_lines=20000):
+        self.process = process
+        # Bounded so a slow consumer applies back-pressure to the child's pipes
+        # instead of letting memory grow with the length of the run
+        self.lines = queue.Queue(maxsize=max_queued_lines)
+        self.open_pipes = 0
+        for pipe, tag in ((process.stdout, 'stdout'), (process.stderr, 'stderr')):
+            if pipe is not None:
+                self.open_pipes += 1
+                threading.Thread(target=self._read_pipe, args=(pipe, tag), daemon=True).start()
+
+    def _read_pipe(self, pipe, tag):
+        """Push every line of a pipe into the queue, followed by an EOF marker"""
+        try:
+            for line in iter(pipe.readline, ''):
+                self.lines.put((tag, line))
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+            self.lines.put((tag, None))
+
+    def drain(self, max_lines=5000):
+        """Return up to max_lines queued (tag, line) pairs without blocking"""
+        batch = []
+        while len(batch) < max_lines:
+            try:
+                tag, line = self.lines.get_nowait()
+            except queue.Empty:
+                break
+            if line is None:
+                self.open_pipes -= 1
+            else:
+                batch.append((tag, line))
+        return batch
+
+    def __iter__(self):
+        """Yield (tag, line) pairs, blocking until both pipes are closed"""
+        while self.open_pipes:
+            tag, line = self.lines.get()
+            if line is None:
+                self.open_pipes -= 1
+            else:
+                yield tag, line
+
+    @property
+    def finished(self):
+        """True once both pipes are closed, fully drained and the process has exited"""
+        return self.open_pipes == 0 and self.lines.empty() and self.process.poll() is not None
+
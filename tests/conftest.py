@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository, next to main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uat import DEFAULT_PACKAGE_SETTINGS  # noqa: E402
+
+
+@pytest.fixture
+def settings():
+    """Package settings of a project, as the Package tab saves them"""
+    return dict(DEFAULT_PACKAGE_SETTINGS, Project=os.path.abspath('/projects/Game/Game.uproject'))
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from artifacts import ArtifactStore, ENGINE_VERSION_FILE, artifact_key, restore_cached_build, store_build
+from hashing import FileHasher, HashCache
+
+FINGERPRINTS = {'build': 'b1', 'cook': 'c1'}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    version = tmp_path / 'engine' / ENGINE_VERSION_FILE
+    version.parent.mkdir(parents=True)
+    version.write_text('{"Changelist": 1}')
+    return str(tmp_path / 'engine')
+
+
+@pytest.fixture
+def cached(settings, tmp_path):
+    """Settings of a cacheable run archiving into tmp_path/archive, with one archived Win64 build"""
+    build = tmp_path / 'archive' / 'Windows'
+    (build / 'Game' / 'Content' / 'Paks').mkdir(parents=True)
+    (build / 'Game.exe').write_bytes(b'exe')
+    (build / 'Game' / 'Content' / 'Paks' / 'Game.pak').write_bytes(b'pak' * 1000)
+    return dict(settings, ArtifactCache=True, ArchiveDirectory=str(tmp_path / 'archive'))
+
+
+@pytest.fixture
+def hasher(tmp_path):
+    return FileHasher(HashCache(str(tmp_path / 'hash_cache.json')))
+
+
+def test_the_key_ignores_how_the_build_is_produced(engine, settings):
+    key = artifact_key(engine, settings, FINGERPRINTS)
+    assert artifact_key(engine, dict(settings, CookerOptions='-cookprocesscount=12'), FINGERPRINTS) == key
+    assert artifact_key(engine, dict(settings, ArchiveDirectory='E:/Other'), FINGERPRINTS) == key
+    assert artifact_key(engine, dict(settings, Configuration='Shipping'), FINGERPRINTS) != key
+    assert artifact_key(engine, settings, dict(FINGERPRINTS, cook='c2')) != key
+
+
+def test_the_key_changes_with_the_engine(engine, settings, tmp_path):
+    key = artifact_key(engine, settings, FINGERPRINTS)
+    with open(os.path.join(engine, ENGINE_VERSION_FILE), 'w') as f:
+        f.write('{"Changelist": 2}')
+    assert artifact_key(engine, settings, FINGERPRINTS) != key
+    assert artifact_key(str(tmp_path), settings, FINGERPRINTS) != key
+
+
+def test_a_build_is_stored_and_restored(engine, cached, hasher, tmp_path):
+    store, key, message = restore_cached_build(engine, cached, FINGERPRINTS, hasher)
+    assert store is not None and message is None
+    assert 'Stored Win64 Development' in store_build(store, key, cached)
+
+    build = tmp_path / 'archive' / 'Windows'
+    (build / 'Game.exe').unlink()
+    (build / 'Game' / 'stale.txt').write_text('not part of the build')
+    _, _, message = restore_cached_build(engine, cached, FINGERPRINTS, hasher)
+    assert message and '1 restored' in message and '1 already up to date' in message
+    assert (build / 'Game.exe').read_bytes() == b'exe'
+    assert not (build / 'Game' / 'stale.txt').exists()
+
+
+def test_objects_are_hard_links_and_are_checked_before_use(engine, cached, hasher, tmp_path):
+    store = ArtifactStore(cached['ArchiveDirectory'], hasher)
+    key = artifact_key(engine, cached, FINGERPRINTS)
+    _, total, new_bytes, linked_bytes = store.ingest(key, cached)
+    assert linked_bytes == total and new_bytes == 0
+
+    # Rewriting an archived file in place changes its object through the link
+    pak = tmp_path / 'archive' / 'Windows' / 'Game' / 'Content' / 'Paks' / 'Game.pak'
+    assert os.stat(pak).st_nlink == 2
+    with open(pak, 'r+b') as f:
+        f.write(b'PAK')
+    assert store.lookup(key) is None
+
+    # The next archive writes a new file with the original contents; storing it puts the object right
+    pak.unlink()
+    pak.write_bytes(b'pak' * 1000)
+    store.ingest(key, cached)
+    assert store.lookup(key) is not None
+
+
+def test_runs_that_do_not_archive_are_not_cached(engine, cached, hasher):
+    assert restore_cached_build(engine, dict(cached, Archive=False), FINGERPRINTS, hasher) == (None, None, None)
+    assert restore_cached_build(engine, dict(cached, ArtifactCache=False), FINGERPRINTS, hasher) == (None, None, None)
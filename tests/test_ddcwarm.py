@@ -0,0 +1,79 @@
+import os
+
+from cli import package_jobs
+from ddcwarm import prewarm_report, with_prewarm
+
+ENGINE = os.path.abspath('/engine')
+
+
+def runs(settings, platforms=('Win64',), configurations=('Development', 'Shipping')):
+    """Jobs of a matrix batch, with the fills with_prewarm queued"""
+    fills = {}
+    jobs = []
+    for platform in platforms:
+        for configuration in configurations:
+            run_settings = dict(settings, Platform=platform, Configuration=configuration)
+            jobs += with_prewarm(ENGINE, run_settings, package_jobs(ENGINE, run_settings), fills)
+    return jobs, fills
+
+
+def test_runs_of_a_platform_share_one_fill(settings):
+    jobs, fills = runs(dict(settings, PrewarmDDC=True), platforms=('Win64', 'Linux'))
+    ddc = [job for job in jobs if job.kind == 'ddc']
+    assert [job.params['Platform'] for job in ddc] == ['Win64', 'Linux']
+    assert sorted(platform for _, platform in fills) == ['Linux', 'Win64']
+    assert all(job.local for job in jobs)
+
+
+def test_only_a_pipelined_cook_waits_for_the_fill(settings):
+    jobs, fills = runs(dict(settings, PrewarmDDC=True, Pipeline=True))
+    fill, = fills.values()
+    waiting = [job.params['PipelineStep'] for job in jobs if fill in job.after]
+    assert waiting == ['cook', 'cook']
+
+    # A run that compiles and cooks in one BuildCookRun starts right away
+    jobs, _ = runs(dict(settings, PrewarmDDC=True))
+    assert not any(job.after for job in jobs)
+
+
+def test_runs_that_do_not_cook_are_not_prewarmed(settings):
+    jobs, fills = runs(dict(settings, PrewarmDDC=True, Cook='skipcook'))
+    assert not fills and all(job.kind == 'package' for job in jobs)
+
+
+def cook(seconds, prewarm=False, exit_code=0):
+    return {'kind': 'package', 'exit': exit_code, 'phases': {'cook': seconds},
+            'params': {'Platform': 'Win64', 'PrewarmDDC': prewarm}}
+
+
+def fill(seconds, exit_code=0):
+    return {'kind': 'ddc', 'exit': exit_code, 'wall': seconds, 'params': {'Platform': 'Win64'}}
+
+
+def test_the_report_counts_the_fill_time():
+    history = [cook(600), cook(700), cook(800), fill(120)]
+    warm = cook(300, prewarm=True)
+    assert prewarm_report(history + [warm], warm) == (
+        'DDC pre-warm saved 4:40 (2:00 filling the DDC + 5:00 cooking vs a 11:40 median cook without it)')
+
+    slow = cook(600, prewarm=True)
+    assert prewarm_report(history + [slow], slow).startswith('DDC pre-warm did not pay off: 2:00 filling')
+
+
+def test_a_failed_fill_still_costs_its_time():
+    history = [cook(600), fill(200, exit_code=1)]
+    warm = cook(500, prewarm=True)
+    assert 'did not pay off: 3:20 filling the DDC + 8:20 cooking' in prewarm_report(history + [warm], warm)
+
+
+def test_a_fill_is_charged_to_the_first_cook_after_it():
+    first, second = cook(300, prewarm=True), cook(300, prewarm=True)
+    records = [cook(700), fill(120), first, second]
+    assert '2:00 filling' in prewarm_report(records[:3], first)
+    assert '0:00 filling' in prewarm_report(records, second)
+
+
+def test_cooks_that_were_not_prewarmed_get_no_report():
+    record = cook(600)
+    assert prewarm_report([cook(700), record], record) is None
+    assert prewarm_report([record, cook(700)], record) is None
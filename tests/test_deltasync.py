@@ -0,0 +1,130 @@
+import os
+
+import pytest
+
+import deltasync
+from copystage import CopyStage
+from deltasync import delta_copy, journal_path, recover, wants_delta
+from hashing import HashCache
+
+BLOCK = 1024
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(deltasync, 'BLOCK_SIZE', BLOCK)
+    monkeypatch.setattr(deltasync, 'JOURNAL_BATCH', 2)
+    monkeypatch.setattr(deltasync, 'DELTA_MIN_SIZE', BLOCK)
+
+
+def blocks(*fills):
+    return b''.join(bytes([fill]) * BLOCK for fill in fills)
+
+
+def write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_only_changed_blocks_are_written_and_backed_up(tmp_path):
+    src = write(tmp_path / 'new.pak', blocks(1, 2, 3, 4))
+    dst = write(tmp_path / 'old.pak', blocks(1, 9, 3, 4))
+    written = delta_copy(src, dst)
+    assert (tmp_path / 'old.pak').read_bytes() == blocks(1, 2, 3, 4)
+    header_and_record = deltasync.JOURNAL_HEADER.size + deltasync.JOURNAL_RECORD.size
+    assert written == header_and_record + 2 * BLOCK  # the old block in the journal, the new one in the file
+    assert not os.path.exists(journal_path(dst))
+    assert os.stat(dst).st_mtime_ns == os.stat(src).st_mtime_ns
+
+
+def test_files_grow_and_shrink(tmp_path):
+    dst = write(tmp_path / 'old.pak', blocks(1, 2))
+    delta_copy(write(tmp_path / 'longer.pak', blocks(1, 2, 3) + b'tail'), dst)
+    assert (tmp_path / 'old.pak').read_bytes() == blocks(1, 2, 3) + b'tail'
+    delta_copy(write(tmp_path / 'shorter.pak', blocks(1)), dst)
+    assert (tmp_path / 'old.pak').read_bytes() == blocks(1)
+
+
+def test_signatures_are_reused(tmp_path):
+    cache = HashCache(str(tmp_path / 'signatures.json'))
+    dst = write(tmp_path / 'old.pak', blocks(1, 2))
+    delta_copy(write(tmp_path / 'new.pak', blocks(1, 3)), dst, cache)
+    assert cache.get(dst, os.stat(dst)) == deltasync.read_signatures(dst)
+    assert delta_copy(write(tmp_path / 'same.pak', blocks(1, 3)), dst, cache) == deltasync.JOURNAL_HEADER.size
+
+
+def interrupt_after(count):
+    seen = []
+
+    def progress(size):
+        seen.append(size)
+        if len(seen) == count:
+            raise KeyboardInterrupt
+    return progress
+
+
+def test_an_interrupted_update_is_rolled_back(tmp_path):
+    old = blocks(1, 2, 3, 4, 5)
+    dst = write(tmp_path / 'old.pak', old)
+    mtime_ns = os.stat(dst).st_mtime_ns
+    with pytest.raises(KeyboardInterrupt):
+        delta_copy(write(tmp_path / 'new.pak', blocks(6, 7, 8, 9)), dst, progress=interrupt_after(3))
+    assert (tmp_path / 'old.pak').read_bytes() == old
+    assert os.stat(dst).st_mtime_ns == mtime_ns
+    assert not os.path.exists(journal_path(dst))
+
+
+def crash(src, dst, monkeypatch):
+    """Interrupt an update without the rollback, as a crash would leave it"""
+    monkeypatch.setattr(deltasync, 'recover', lambda path: False)
+    with pytest.raises(KeyboardInterrupt):
+        delta_copy(src, dst, progress=interrupt_after(3))
+    monkeypatch.setattr(deltasync, 'recover', recover)
+    assert os.path.exists(journal_path(dst))
+
+
+def test_a_crashed_update_is_rolled_back_from_its_journal(tmp_path, monkeypatch):
+    old = blocks(1, 2, 3, 4, 5)
+    dst = write(tmp_path / 'old.pak', old)
+    crash(write(tmp_path / 'new.pak', blocks(6, 7, 8, 9)), dst, monkeypatch)
+    assert (tmp_path / 'old.pak').read_bytes() != old
+    assert deltasync.recover_tree(str(tmp_path)) == 1
+    assert (tmp_path / 'old.pak').read_bytes() == old
+    assert not os.path.exists(journal_path(dst))
+
+
+def test_the_next_sync_rolls_back_a_crashed_update_first(tmp_path, monkeypatch):
+    source = tmp_path / 'source'
+    destination = tmp_path / 'destination'
+    source.mkdir()
+    destination.mkdir()
+    dst = write(destination / 'Game.pak', blocks(1, 2, 3, 4, 5))
+    src = write(source / 'Game.pak', blocks(6, 7, 8, 9, 5))
+    crash(src, dst, monkeypatch)
+
+    stats = CopyStage(delta=True).sync(str(source), str(destination))
+    assert stats.recovered == 1 and stats.delta_files == 1
+    assert (destination / 'Game.pak').read_bytes() == blocks(6, 7, 8, 9, 5)
+    assert sorted(os.listdir(destination)) == ['Game.pak']
+
+
+def test_a_torn_journal_record_is_ignored(tmp_path):
+    dst = write(tmp_path / 'old.pak', blocks(1, 2))
+    with open(journal_path(dst), 'wb') as journal:
+        journal.write(deltasync.JOURNAL_HEADER.pack(2 * BLOCK, os.stat(dst).st_mtime_ns))
+        journal.write(deltasync.JOURNAL_RECORD.pack(1, BLOCK) + b'half')
+    assert recover(dst)
+    assert (tmp_path / 'old.pak').read_bytes() == blocks(1, 2)
+    assert not recover(dst)
+
+
+def test_wants_delta(tmp_path):
+    src = str(tmp_path / 'new.pak')
+    dst = write(tmp_path / 'old.pak', blocks(1))
+    assert wants_delta(src, dst, BLOCK)
+    assert not wants_delta(src, dst, BLOCK - 1)
+    assert not wants_delta(str(tmp_path / 'new.txt'), dst, BLOCK)
+    assert not wants_delta(src, str(tmp_path / 'missing.pak'), BLOCK)
+    # A hard-linked destination (e.g. an artifact cache object) is replaced, not patched
+    os.link(dst, str(tmp_path / 'object'))
+    assert not wants_delta(src, dst, BLOCK)
@@ -0,0 +1,160 @@
+import sys
+import time
+
+from jobs import Job, JobScheduler, DONE, FAILED, CANCELLED, format_duration, format_size
+from uatparse import UATOutputParser
+
+
+def python_command(code):
+    return f'"{sys.executable}" -c "{code}"'
+
+
+def sleeper(name, seconds=0.3, exit_code=0, locks=(), shared_locks=()):
+    job = Job(name, python_command(f"import time, sys; time.sleep({seconds}); sys.exit({exit_code})"), '.')
+    job.locks = set(locks)
+    job.shared_locks = set(shared_locks)
+    return job
+
+
+def run(scheduler, jobs, timeout=20):
+    """Submit jobs and poll until every one finished; returns [(event, job name)] in order"""
+    events = []
+    for job in jobs:
+        job.on_start = lambda job: events.append(('start', job.name))
+        job.on_finish = lambda job: events.append(('finish', job.name))
+        scheduler.submit(job)
+    deadline = time.time() + timeout
+    while scheduler.poll():
+        assert time.time() < deadline, f"jobs still running: {events}"
+        time.sleep(0.01)
+    return events
+
+
+def most_running(events):
+    running = peak = 0
+    for event, _ in events:
+        running += 1 if event == 'start' else -1
+        peak = max(peak, running)
+    return peak
+
+
+def overlapped(events, first, second):
+    """True if second started before first finished"""
+    return events.index(('start', second)) < events.index(('finish', first))
+
+
+def test_format_helpers():
+    assert format_duration(75) == '1:15'
+    assert format_duration(3725) == '1:02:05'
+    assert format_size(512) == '512 B'
+    assert format_size(1536) == '1.5 KiB'
+
+
+def test_jobs_never_exceed_the_slots():
+    jobs = [sleeper(f'job{i}') for i in range(4)]
+    events = run(JobScheduler(max_concurrency=2), jobs)
+    assert most_running(events) == 2
+    assert all(job.state == DONE and job.returncode == 0 for job in jobs)
+
+
+def test_group_limits():
+    scheduler = JobScheduler(max_concurrency=4)
+    scheduler.group_limits['matrix'] = 1
+    jobs = [sleeper(f'job{i}') for i in range(3)]
+    for job in jobs:
+        job.group = 'matrix'
+    assert most_running(run(scheduler, jobs)) == 1
+
+
+def test_exclusive_locks_take_turns():
+    events = run(JobScheduler(max_concurrency=4), [sleeper('a', locks={'cook:x'}), sleeper('b', locks={'cook:x'}),
+                                                   sleeper('c', locks={'cook:y'})])
+    assert not overlapped(events, 'a', 'b')
+    assert overlapped(events, 'a', 'c')
+
+
+def test_shared_locks_run_together_but_not_with_the_exclusive_holder():
+    events = run(JobScheduler(max_concurrency=4), [
+        sleeper('stage1', shared_locks={'cook:x'}),
+        sleeper('stage2', shared_locks={'cook:x'}),
+        sleeper('cook', locks={'cook:x'}),
+        sleeper('stage3', shared_locks={'cook:x'}),
+    ])
+    assert overlapped(events, 'stage1', 'stage2')
+    assert not overlapped(events, 'stage1', 'cook') and not overlapped(events, 'stage2', 'cook')
+    # The waiting cook goes before the stage step queued after it
+    assert events.index(('start', 'stage3')) > events.index(('finish', 'cook'))
+
+
+def test_a_lock_a_job_waits_for_does_not_hold_back_its_other_locks():
+    events = run(JobScheduler(max_concurrency=4), [
+        sleeper('first', locks={'build:x', 'cook:x'}),
+        sleeper('second', seconds=0, locks={'cook:x', 'build:y'}),
+        sleeper('third', locks={'build:y'}),
+    ])
+    assert overlapped(events, 'first', 'third')
+
+
+def test_locks_are_released_once_their_last_phase_ended():
+    code = ("import time; "
+            "print('********** BUILD COMMAND STARTED **********', flush=True); "
+            "print('********** BUILD COMMAND COMPLETED **********', flush=True); "
+            "print('********** COOK COMMAND STARTED **********', flush=True); time.sleep(1.5)")
+    first = Job('first', python_command(code), '.', kind='package')
+    first.locks = {'build:engine', 'cook:win64'}
+    first.lock_phases = {'build:engine': 'build', 'cook:win64': 'stage'}
+    first.parser = UATOutputParser()
+    first.on_output = lambda job, batch: [job.parser.feed(line) for _, line in batch]
+    second = sleeper('second', locks={'build:engine'})
+    third = sleeper('third', locks={'cook:win64'})
+
+    events = run(JobScheduler(max_concurrency=4), [first, second, third])
+    assert overlapped(events, 'first', 'second')  # compiles while the first run cooks
+    assert not overlapped(events, 'first', 'third')
+    assert first.locks == {'cook:win64'}
+
+
+def test_depends_on_waits_for_success():
+    build = sleeper('build')
+    stage = sleeper('stage', seconds=0)
+    stage.depends_on = [build]
+    events = run(JobScheduler(max_concurrency=4), [build, stage])
+    assert events.index(('start', 'stage')) > events.index(('finish', 'build'))
+    assert stage.state == DONE
+
+
+def test_a_failed_dependency_cancels_its_dependents_and_their_other_dependencies():
+    compile_step = sleeper('compile', seconds=0, exit_code=3)
+    cook_step = sleeper('cook', seconds=5)
+    stage_step = sleeper('stage', seconds=0)
+    stage_step.depends_on = [compile_step, cook_step]
+    run(JobScheduler(max_concurrency=4), [compile_step, cook_step, stage_step])
+    assert compile_step.state == FAILED and compile_step.returncode == 3
+    assert stage_step.state == CANCELLED and stage_step.cancel_reason.startswith('Skipped')
+    assert cook_step.state == CANCELLED
+
+
+def test_after_waits_for_any_outcome():
+    fill = sleeper('fill', seconds=0.1, exit_code=1)
+    cook = sleeper('cook', seconds=0)
+    cook.after = [fill]
+    events = run(JobScheduler(max_concurrency=4), [fill, cook])
+    assert events.index(('start', 'cook')) > events.index(('finish', 'fill'))
+    assert fill.state == FAILED and cook.state == DONE
+
+
+def test_timeout_cancels_the_job():
+    job = sleeper('slow', seconds=30)
+    job.timeout = 0.2
+    started = time.time()
+    run(JobScheduler(max_concurrency=1, kill_grace=2), [job])
+    assert job.state == CANCELLED and job.cancel_reason.startswith('Timed out')
+    assert time.time() - started < 10
+
+
+def test_output_is_streamed_with_stream_tags():
+    job = Job('echo', python_command("import sys; print('out'); print('err', file=sys.stderr)"), '.')
+    lines = []
+    job.on_output = lambda job, batch: lines.extend(batch)
+    run(JobScheduler(), [job])
+    assert ('stdout', 'out\n') in lines and ('stderr', 'err\n') in lines
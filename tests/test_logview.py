@@ -0,0 +1,85 @@
+import pytest
+
+pytest.importorskip('tkinter')
+
+from logview import LogSpool  # noqa: E402
+
+
+@pytest.fixture
+def spool():
+    spool = LogSpool()
+    yield spool
+    spool.close()
+
+
+def lines(spool):
+    return spool.read(0, spool.line_count).splitlines()
+
+
+def test_append_and_read_back_across_index_strides(spool):
+    spool.append([f'line {i}\n' for i in range(200)])
+    assert spool.line_count == 200
+    assert spool.read_line(130) == 'line 130\n'
+    assert spool.read(63, 66) == 'line 63\nline 64\nline 65\n'
+    assert spool.read(190, 500).count('\n') == 10
+
+
+def test_partial_lines_wait_for_their_newline(spool):
+    spool.append(['Cooking pack'])
+    assert spool.line_count == 0
+    spool.append(['age 1\nCooking package 2\n'])
+    assert lines(spool) == ['Cooking package 1', 'Cooking package 2']
+
+
+def test_a_partial_line_is_not_split_by_another_stream(spool):
+    spool.append(['LogCook: Warning: half'])
+    spool.append(['ERROR: from stderr\n'], 'stderr')
+    spool.append([' of a warning\n'])
+    assert lines(spool) == ['ERROR: from stderr', 'LogCook: Warning: half of a warning']
+    assert list(spool.tags_between(0, 2)) == [('stderr', 0, 1)]
+    assert list(spool.severity_lines['warning']) == [1]
+    assert list(spool.severity_lines['error']) == [0]
+
+
+def test_one_chunk_with_several_lines_is_split(spool):
+    spool.append_batch([('stdout', 'a\nb\nc'), ('stdout', '\n')])
+    assert lines(spool) == ['a', 'b', 'c']
+
+
+def test_end_lines_terminates_what_was_held_back(spool):
+    spool.append(['no newline at exit'], 'stderr')
+    spool.end_lines()
+    assert lines(spool) == ['no newline at exit']
+    assert list(spool.tags_between(0, 1)) == [('stderr', 0, 1)]
+    assert not spool.partial
+
+
+def test_write_puts_text_after_pending_output(spool):
+    spool.append(['Packaging'])
+    spool.write('Job finished', 'info')
+    assert lines(spool) == ['Packaging', 'Job finished']
+    assert list(spool.tags_between(0, 2)) == [('info', 1, 2)]
+
+
+def test_tag_runs_merge_consecutive_lines(spool):
+    spool.append_batch([('stdout', 'a\n'), ('stderr', 'b\n'), ('stderr', 'c\n'), ('stdout', 'd\n')])
+    spool.append(['e\n'], 'stderr')
+    assert spool.tag_runs == [['stderr', 1, 3], ['stderr', 4, 5]]
+    assert list(spool.tags_between(2, 5)) == [('stderr', 2, 3), ('stderr', 4, 5)]
+
+
+def test_matching_lines(spool):
+    spool.append(['LogCook: Display: one\n', 'LogInit: Error: two\n', 'plain\n', 'LogCook: Warning: three\n'])
+    assert list(spool.matching_lines('Errors')) == [1]
+    assert list(spool.matching_lines('Warnings')) == [3]
+    assert list(spool.matching_lines('LogCook')) == [0, 3]
+    assert list(spool.matching_lines('LogMissing')) == []
+
+
+def test_search_forwards_and_backwards(spool):
+    spool.append([f'line {i}\n' for i in range(100)])
+    spool.append(['needle here\n', 'x\n', 'another needle\n'])
+    assert spool.search('needle', 0) == (100, 0, 6)
+    assert spool.search('needle', 100, 1) == (102, 8, 14)
+    assert spool.search('needle', 102, 0, backwards=True) == (100, 0, 6)
+    assert spool.search('missing', 0) is None
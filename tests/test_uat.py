@@ -0,0 +1,79 @@
+from uat import (build_package_command, package_params, pipelined, pipeline_steps, plan_matrix,
+                 get_cook_process_count, set_cook_process_count, matrix_settings)
+
+
+def test_package_params_default_run(settings):
+    params = package_params(settings)
+    assert params[:3] == [f'-project="{settings["Project"]}"', '-platform=Win64', '-configuration=Development']
+    assert '-build' in params and '-cook' in params and '-archive' in params
+    assert '-AdditionalCookerOptions=-cookprocesscount=4' in params
+
+
+def test_fast_archive_drops_archive_only_with_a_directory(settings):
+    assert '-archive' in package_params(dict(settings, FastArchive=True))
+    params = package_params(dict(settings, FastArchive=True, ArchiveDirectory='D:/Builds'))
+    assert '-archive' not in params
+    assert '-archivedirectory="D:/Builds"' in params
+
+
+def test_pipelined_only_with_pipeline_build_and_cook(settings):
+    assert not pipelined(settings)
+    assert pipelined(dict(settings, Pipeline=True))
+    assert not pipelined(dict(settings, Pipeline=True, Build=False))
+    assert not pipelined(dict(settings, Pipeline=True, Cook='skipcook'))
+    assert not pipelined(dict(settings, IsolateJobs=True))
+
+
+def test_pipeline_steps(settings):
+    compile_step, cook_step, stage_step = pipeline_steps(dict(settings, Pipeline=True, ArchiveDirectory='D:/Builds'))
+    assert [step['PipelineStep'] for step in (compile_step, cook_step, stage_step)] == ['compile', 'cook', 'stage']
+
+    params = package_params(compile_step)
+    assert '-build' in params and '-cook' not in params and '-stage' not in params
+    assert not any(param.startswith('-archivedirectory') for param in params)
+
+    params = package_params(cook_step)
+    assert '-cook' in params and '-build' not in params and '-archive' not in params
+
+    params = package_params(stage_step)
+    assert '-skipbuild' in params and '-skipcook' in params
+    assert '-stage' in params and '-archive' in params and '-archivedirectory="D:/Builds"' in params
+    assert not any(param.startswith('-AdditionalCookerOptions') for param in params)
+
+
+def test_only_runs_that_are_not_isolated_wait_on_the_uat_mutex(settings):
+    assert ' -WaitMutex BuildCookRun ' in build_package_command('/engine', settings)
+    assert '-WaitMutex' not in build_package_command('/engine', dict(settings, IsolateJobs=True))
+
+
+def test_cook_process_count_helpers():
+    assert get_cook_process_count('-foo -cookprocesscount=6') == 6
+    assert get_cook_process_count('-foo') is None
+    assert set_cook_process_count('-cookprocesscount=6 -foo', 3) == '-cookprocesscount=3 -foo'
+    assert set_cook_process_count('', 3) == '-cookprocesscount=3'
+
+
+def test_matrix_settings(settings):
+    jobs = matrix_settings(dict(settings, MatrixPlatforms='Win64, Linux', MatrixConfigurations='Development,Shipping'))
+    assert [(job['Platform'], job['Configuration']) for job in jobs] == [
+        ('Win64', 'Development'), ('Win64', 'Shipping'), ('Linux', 'Development'), ('Linux', 'Shipping')]
+
+
+def test_plan_matrix_runs_jobs_that_are_not_isolated_one_at_a_time(settings):
+    matrix = dict(settings, Matrix=True, MatrixPlatforms='Win64,Linux', CookerOptions='-cookprocesscount=8')
+    concurrency, reason, jobs = plan_matrix(matrix, cores=64, memory=256 * 1024 ** 3)
+    assert concurrency == 1
+    assert 'mutex' in reason
+    assert all(get_cook_process_count(job['CookerOptions']) == 8 for job in jobs)
+
+
+def test_plan_matrix_sizes_isolated_jobs_to_the_machine(settings):
+    matrix = dict(settings, Matrix=True, IsolateJobs=True, MatrixPlatforms='Win64,Linux,Mac',
+                  CookerOptions='-cookprocesscount=8')
+    concurrency, reason, jobs = plan_matrix(matrix, cores=8, memory=256 * 1024 ** 3)
+    assert (concurrency, reason) == (2, '8 cores')
+    assert len(jobs) == 3
+    assert all(get_cook_process_count(job['CookerOptions']) == 4 for job in jobs)
+
+    concurrency, reason, _ = plan_matrix(matrix, cores=64, memory=20 * 1024 ** 3)
+    assert concurrency == 2 and 'GiB free' in reason
@@ -0,0 +1,62 @@
+from uatparse import UATOutputParser, classify_line, format_summary
+
+
+def feed(parser, lines, start=0.0):
+    events = []
+    for offset, line in enumerate(lines):
+        events.extend(parser.feed(line, now=start + offset * 10))
+    return events
+
+
+def test_phases_are_timed_from_their_markers():
+    parser = UATOutputParser()
+    events = feed(parser, [
+        '********** BUILD COMMAND STARTED **********',
+        '********** BUILD COMMAND COMPLETED **********',
+        '********** COOK COMMAND STARTED **********',
+        'AutomationTool exiting with ExitCode=0 (Success)',
+    ])
+    assert [(event.kind, event.phase) for event in events] == [
+        ('phase_start', 'build'), ('phase_end', 'build'), ('phase_start', 'cook'), ('phase_end', 'cook'),
+        ('exit', None)]
+    assert parser.durations == {'build': 10.0, 'cook': 10.0}
+    assert parser.exit_code == 0 and parser.phase is None
+
+
+def test_a_new_phase_closes_the_running_one():
+    parser = UATOutputParser()
+    feed(parser, ['********** COOK COMMAND STARTED **********', '********** STAGE COMMAND STARTED **********'])
+    assert parser.durations == {'cook': 10.0} and parser.phase == 'stage'
+
+
+def test_cook_progress_and_negative_exit_codes():
+    parser = UATOutputParser()
+    feed(parser, ['LogCook: Display: Cooked packages 1234 Packages Remain 56 Total 1290',
+                  'AutomationTool exiting with ExitCode=-1 (Error_Unknown)'])
+    assert parser.cook_progress == (1234, 1290)
+    assert parser.exit_code == -1
+
+
+def test_errors_and_warnings_are_counted_per_phase():
+    parser = UATOutputParser()
+    feed(parser, [
+        'Foo.cpp(12): warning C4996: deprecated',
+        '********** BUILD COMMAND STARTED **********',
+        'Foo.cpp(20): error C2065: undeclared identifier',
+        'ERROR: something broke',
+        'Compiling ErrorHandling.cpp',
+    ])
+    assert (parser.errors, parser.warnings) == (2, 1)
+    assert parser.phase_warnings == {'setup': 1}
+    assert parser.phase_errors == {'build': 2}
+    assert parser.first_error == 'Foo.cpp(20): error C2065: undeclared identifier'
+    assert 'build 0:' in format_summary(parser, now=50) and '2 errors, 1 warnings' in format_summary(parser)
+
+
+def test_classify_line():
+    assert classify_line('[2024.01.01-12.00.00:000][  0]LogCook: Display: Cooking') == ('display', 'LogCook')
+    assert classify_line('LogInit: Fatal: out of memory') == ('error', 'LogInit')
+    assert classify_line('LogShaders: Verbose: compiled') == (None, 'LogShaders')
+    assert classify_line('LogLinker: Loaded') == (None, 'LogLinker')
+    assert classify_line('Foo.cpp(1): warning C4100: unused') == ('warning', None)
+    assert classify_line('Compiling ErrorHandling.cpp') == (None, None)
@@ -0,0 +1,75 @@
+import os
+
+from jobs import Job
+from uat import pipeline_steps, run_params
+from workspaces import (UAT_LOG_FOLDER_ENV, UAT_MUTEX_NO_WAIT_ENV, isolate_settings, isolate_job, job_locks,
+                        workspace_dir)
+
+ENGINE = os.path.abspath('/engine')
+
+
+def lock_names(locks):
+    return {name.split(':')[0]: value for name, value in locks.items()}
+
+
+def test_isolate_settings_stages_into_the_workspace(settings):
+    assert isolate_settings(settings) is settings
+    isolated = isolate_settings(dict(settings, IsolateJobs=True, Platform='Linux', Configuration='Shipping'))
+    assert isolated['StagingDirectory'] == os.path.join(
+        os.path.dirname(settings['Project']), 'Saved', 'UECmd', 'Linux-Shipping', 'Staged')
+
+
+def test_a_full_run_holds_each_lock_through_its_last_phase(settings):
+    locks = lock_names(job_locks(ENGINE, dict(settings, ArchiveDirectory='D:/Builds')))
+    assert locks == {'build': (False, 'build'), 'cook': (False, 'stage'), 'archive': (False, 'archive')}
+
+
+def test_a_cook_without_staging_lets_go_after_the_cook(settings):
+    locks = lock_names(job_locks(ENGINE, dict(settings, Stage=False)))
+    assert locks['cook'] == (False, 'cook')
+
+
+def test_fast_archive_needs_no_archive_lock(settings):
+    locks = job_locks(ENGINE, dict(settings, ArchiveDirectory='D:/Builds', FastArchive=True))
+    assert 'archive' not in lock_names(locks)
+
+
+def test_pipeline_steps_take_only_their_own_locks(settings):
+    compile_step, cook_step, stage_step = pipeline_steps(dict(settings, Pipeline=True))
+    assert lock_names(job_locks(ENGINE, compile_step)) == {'build': (False, 'build')}
+    assert lock_names(job_locks(ENGINE, cook_step)) == {'cook': (False, 'cook')}
+    # Staging reads the cooked content, so it shares the cook lock instead of skipping it
+    assert lock_names(job_locks(ENGINE, stage_step)) == {'cook': (True, 'stage')}
+    assert set(job_locks(ENGINE, cook_step)) == set(job_locks(ENGINE, stage_step))
+
+
+def test_cook_locks_are_per_platform(settings):
+    win64 = job_locks(ENGINE, settings)
+    linux = job_locks(ENGINE, dict(settings, Platform='Linux'))
+    shipping = job_locks(ENGINE, dict(settings, Configuration='Shipping'))
+    assert {name for name in win64 if name.startswith('cook:')} == {
+        name for name in shipping if name.startswith('cook:')}
+    assert not {name for name in win64 if name.startswith('cook:')} & set(linux)
+
+
+def test_isolate_job_leaves_jobs_that_are_not_isolated_alone(settings):
+    job = Job('run', 'uat', ENGINE, kind='package')
+    job.params = run_params(settings)
+    isolate_job(job, ENGINE)
+    assert job.env is None and not job.locks and not job.make_dirs
+
+
+def test_isolate_job_sets_up_folders_locks_and_the_mutex_without_creating_anything(settings, tmp_path):
+    project = tmp_path / 'Game' / 'Game.uproject'
+    params = dict(settings, Project=str(project), IsolateJobs=True)
+    job = Job('run', 'uat', ENGINE, kind='package')
+    job.params = run_params(params)
+    isolate_job(job, ENGINE)
+
+    log_dir = os.path.join(workspace_dir(params), 'Logs', 'run')
+    assert job.env == {UAT_LOG_FOLDER_ENV: log_dir, UAT_MUTEX_NO_WAIT_ENV: '1'}
+    assert job.make_dirs == [log_dir]
+    assert not (tmp_path / 'Game').exists()
+    assert {lock.split(':')[0] for lock in job.locks} == {'build', 'cook'}
+    assert not job.shared_locks
+    assert sorted(job.lock_phases.values()) == ['build', 'stage']
@@ -0,0 +1,200 @@
+import os
+import re
+
+from resources import package_concurrency
+from workspaces import isolate_settings
+
+PLATFORMS = ['Win64', 'PS5', 'XSX', 'Linux', 'Mac']
+CONFIGURATIONS = ['Development', 'Shipping', 'DebugGame']
+
+# Package tab settings and their defaults, in the order they are saved
+DEFAULT_PACKAGE_SETTINGS = {
+    'Project': '',
+    'Platform': 'Win64',
+    'Configuration': 'Development',
+    'Cook': 'cook',
+    'NoXGE': True,
+    'NoCompileEditor': True,
+    'SkipBuildEditor': True,
+    'Prereqs': True,
+    'Build': True,
+    'Stage': True,
+    'Package': True,
+    'Archive': True,
+    'NoSndbsShaderCompile': True,
+    'NoRemoteShaderCompile': True,
+    'ArchiveDirectory': '',
+    'CookerOptions': '-cookprocesscount=4',
+    'AutoCookProcesses': False,
+    'Pipeline': False,
+    'PrewarmDDC': False,
+    'IsolateJobs': False,
+    'FollowLogs': False,
+    'Compressed': True,
+    'AutoSkip': False,
+    'ArtifactCache': False,
+    'FastArchive': False,
+    'DeltaSync': False,
+    'SyncDirectories': '',
+    'Agents': '',
+    'Matrix': False,
+    'MatrixPlatforms': 'Win64',
+    'MatrixConfigurations': 'Development'
+}
+
+# Boolean settings and the BuildCookRun switch each one enables, in command order
+FLAG_SWITCHES = [
+    ('Stage', '-stage'),
+    ('Package', '-package'),
+    ('Archive', '-archive'),
+    ('Prereqs', '-prereqs'),
+    ('NoXGE', '-NoXGE'),
+    ('NoCompileEditor', '-nocompileeditor'),
+    ('SkipBuildEditor', '-skipbuildeditor'),
+    ('NoSndbsShaderCompile', '-NoSndbsShaderCompile'),
+    ('NoRemoteShaderCompile', '-NoRemoteShaderCompile'),
+    ('Compressed', '-compressed')
+]
+
+COOK_PROCESS_COUNT = re.compile(r'-cookprocesscount=(\d+)', re.IGNORECASE)
+
+
+def runuat_path(working_dir):
+    """Path of the RunUAT batch file inside an engine directory"""
+    return os.path.join(working_dir, "Engine/Build/BatchFiles/RunUAT.bat")
+
+
+def package_params(settings):
+    """BuildCookRun arguments for a set of package settings"""
+    params = [
+        f'-project="{settings["Project"]}"',
+        f'-platform={settings["Platform"]}',
+        f'-configuration={settings["Configuration"]}'
+    ]
+
+    if settings['Build']:
+        params.append('-build')
+    elif settings.get('PipelineStep') == 'stage':
+        params.append('-skipbuild')  # the pipeline's compile step built the binaries
+
+    # Handle cook/skipcook
+    if settings['Cook'] == 'cook':
+        params.append('-cook')
+    elif settings['Cook'] == 'skipcook':
+        params.append('-skipcook')
+
+    for setting, switch in FLAG_SWITCHES:
+        if setting == 'Archive' and settings['FastArchive'] and settings['ArchiveDirectory'].strip():
+            continue  # UECmd copies the staged build to the archive directory itself
+        if settings[setting]:
+            params.append(switch)
+
+    # Add string parameters if they have values
+    archive_dir = settings['ArchiveDirectory'].strip()
+    if archive_dir:
+        params.append(f'-archivedirectory="{archive_dir}"')
+
+    # Set by workspaces.isolate_settings, so concurrent runs do not stage into the same folder
+    if settings.get('StagingDirectory'):
+        params.append(f'-stagingdirectory="{settings["StagingDirectory"]}"')
+
+    cooker_options = settings['CookerOptions'].strip()
+    if cooker_options:
+        params.append(f'-AdditionalCookerOptions={cooker_options}')
+
+    return params
+
+
+def build_package_command(working_dir, settings):
+    """Full RunUAT BuildCookRun command line for a set of package settings
+
+    AutomationTool exits when another instance of the engine's runs. Runs
+    that are not isolated share its log folder, so they pass -WaitMutex and
+    queue behind each other; isolated runs skip the mutex instead (see
+    workspaces.isolate_job).
+    """
+    wait_mutex = '' if settings['IsolateJobs'] else '-WaitMutex '
+    return f'{runuat_path(working_dir)} {wait_mutex}BuildCookRun {" ".join(package_params(settings))}'
+
+
+def pipelined(settings):
+    """True when a run is split into concurrent compile and cook steps followed by a stage step"""
+    return bool(settings['Pipeline'] and settings['Build'] and settings['Cook'] == 'cook')
+
+
+def pipeline_steps(settings):
+    """Settings of the compile, cook and stage steps of a pipelined run
+
+    Compile and cook only produce binaries and cooked content; the stage step
+    stages, packages and archives them with -skipbuild -skipcook, and is the
+    only step that syncs or archives the build.
+    """
+    outputs_off = {'Stage': False, 'Package': False, 'Archive': False, 'Prereqs': False,
+                   'ArchiveDirectory': '', 'FastArchive': False, 'SyncDirectories': ''}
+    return [
+        dict(settings, PipelineStep='compile', Cook='', CookerOptions='', **outputs_off),
+        dict(settings, PipelineStep='cook', Build=False, **outputs_off),
+        dict(settings, PipelineStep='stage', Build=False, Cook='skipcook', CookerOptions='')
+    ]
+
+
+def package_run_commands(working_dir, settings):
+    """Command line of a package run, or of each of its steps when it is pipelined"""
+    settings = isolate_settings(settings)
+    if pipelined(settings):
+        return [build_package_command(working_dir, step) for step in pipeline_steps(settings)]
+    return [build_package_command(working_dir, settings)]
+
+
+def run_params(settings):
+    """Settings that describe one package run, without the matrix selection"""
+    return {param: value for param, value in settings.items() if not param.startswith('Matrix')}
+
+
+def split_list(value):
+    """Split a comma separated setting into its non-empty items"""
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def matrix_settings(settings):
+    """Settings for every Platform x Configuration pair selected in matrix mode"""
+    return [
+        dict(settings, Platform=platform, Configuration=configuration)
+        for platform in split_list(settings['MatrixPlatforms'])
+        for configuration in split_list(settings['MatrixConfigurations'])
+    ]
+
+
+def get_cook_process_count(cooker_options):
+    """The -cookprocesscount value in a cooker options string, or None"""
+    match = COOK_PROCESS_COUNT.search(cooker_options)
+    return int(match.group(1)) if match else None
+
+
+def set_cook_process_count(cooker_options, count):
+    """Cooker options with -cookprocesscount replaced or added"""
+    if COOK_PROCESS_COUNT.search(cooker_options):
+        return COOK_PROCESS_COUNT.sub(f'-cookprocesscount={count}', cooker_options)
+    return f'{cooker_options} -cookprocesscount={count}'.strip()
+
+
+def plan_matrix(settings, cores=None, memory=None):
+    """Split a matrix run into per-job settings sized to the machine
+
+    Returns (concurrency, limiting resource, job settings). Each job's
+    -cookprocesscount is divided by the concurrency so the jobs running side
+    by side together use about as many cook workers as one job would. Jobs
+    that are not isolated take turns on AutomationTool's mutex (see
+    build_package_command), so they are planned one at a time and each
+    keeps every cook worker.
+    """
+    jobs = matrix_settings(settings)
+    if settings['IsolateJobs']:
+        concurrency, reason = package_concurrency(len(jobs), cores, memory)
+    else:
+        concurrency, reason = 1, "AutomationTool's mutex without IsolateJobs"
+    cook_processes = get_cook_process_count(settings['CookerOptions'])
+    if cook_processes is not None:
+        cooker_options = set_cook_process_count(settings['CookerOptions'], max(1, cook_processes // concurrency))
+        jobs = [dict(job, CookerOptions=cooker_options) for job in jobs]
+    return concurrency, reason, jobs
@@ -0,0 +1,160 @@
+import re
+import time
+
+from jobs import format_duration
+
+# "********** COOK COMMAND STARTED **********" and friends
+PHASE_MARKER = re.compile(r'\*{5,}\s*(\w+) COMMAND (STARTED|COMPLETED)', re.IGNORECASE)
+# "LogCook: Display: Cooked packages 1234 Packages Remain 56 Total 1290"
+COOK_PROGRESS = re.compile(r'Cooked packages (\d+) Packages Remain (\d+) Total (\d+)', re.IGNORECASE)
+# "AutomationTool exiting with ExitCode=0 (Success)"
+UAT_EXIT = re.compile(r'AutomationTool exiting with ExitCode=(-?\d+)', re.IGNORECASE)
+# "LogCook: Warning: ...", "Foo.cpp(12): warning C4996: ...", "ERROR: ..."
+SEVERITY = re.compile(r'(?:^|[\s:)])(error|warning)(?:\s+[A-Z]+\d+)?\s*:', re.IGNORECASE)
+# "[2024.01.01-12.00.00:000][  0]LogCook: Display: ..." -> category and optional verbosity
+LOG_LINE = re.compile(r'(?:^|[\]\s])(Log\w+): (?:(Fatal|Error|Warning|Display|Verbose|VeryVerbose): )?')
+
+# Verbosities the log index keeps, with Fatal counted as an error
+INDEXED_SEVERITIES = {'Fatal': 'error', 'Error': 'error', 'Warning': 'warning', 'Display': 'display'}
+
+
+def classify_line(line):
+    """(severity, log category) of an output line; either may be None"""
+    category = severity = None
+    if 'Log' in line:
+        match = LOG_LINE.search(line)
+        if match:
+            category = match.group(1)
+            severity = INDEXED_SEVERITIES.get(match.group(2))
+    if severity is None:
+        lowered = line.lower()
+        if 'error' in lowered or 'warning' in lowered:
+            match = SEVERITY.search(line)
+            if match:
+                severity = match.group(1).lower()
+    return severity, category
+
+
+class ParseEvent:
+    """Something notable recognised in BuildCookRun output"""
+
+    __slots__ = ('kind', 'time', 'phase', 'text', 'data')
+
+    def __init__(self, kind, time, phase, text, data=None):
+        self.kind = kind  # phase_start, phase_end, warning, error, progress or exit
+        self.time = time
+        self.phase = phase
+        self.text = text
+        self.data = data
+
+    def __repr__(self):
+        return f"ParseEvent({self.kind!r}, {self.phase!r}, {self.text!r})"
+
+
+class UATOutputParser:
+    """Incrementally recognise UAT phases, warnings, errors and cook progress
+
+    Lines are fed one at a time as they arrive, each is looked at once, and the
+    running totals are kept up to date so nothing ever re-scans earlier output.
+    """
+
+    def __init__(self):
+        self.phase = None
+        self.phase_started = None
+        self.durations = {}  # phase -> seconds, in the order the phases ran
+        self.errors = 0
+        self.warnings = 0
+        self.phase_errors = {}
+        self.phase_warnings = {}
+        self.cook_progress = None  # (cooked, total)
+        self.exit_code = None
+        self.started = None
+        self.first_error = None
+
+    def feed(self, line, now=None):
+        """Parse one line and return the events it produced"""
+        now = time.time() if now is None else now
+        if self.started is None:
+            self.started = now
+        events = []
+
+        # Cheap substring checks first; most lines match none of them
+        if '*****' in line:
+            match = PHASE_MARKER.search(line)
+            if match:
+                phase = match.group(1).lower()
+                if match.group(2).upper() == 'STARTED':
+                    events.extend(self.end_phase(now))
+                    self.phase = phase
+                    self.phase_started = now
+                    events.append(ParseEvent('phase_start', now, phase, line.strip()))
+                elif phase == self.phase:
+                    events.extend(self.end_phase(now))
+                return events
+
+        if 'ooked packages' in line:
+            match = COOK_PROGRESS.search(line)
+            if match:
+                cooked, total = int(match.group(1)), int(match.group(3))
+                self.cook_progress = (cooked, total)
+                events.append(ParseEvent('progress', now, self.phase, line.strip(), (cooked, total)))
+                return events
+
+        if 'ExitCode=' in line:
+            match = UAT_EXIT.search(line)
+            if match:
+                self.exit_code = int(match.group(1))
+                events.extend(self.end_phase(now))
+                events.append(ParseEvent('exit', now, None, line.strip(), self.exit_code))
+                return events
+
+        lowered = line.lower()
+        if 'error' in lowered or 'warning' in lowered:
+            match = SEVERITY.search(line)
+            if match:
+                kind = match.group(1).lower()
+                phase = self.phase or 'setup'
+                if kind == 'error':
+                    self.errors += 1
+                    self.phase_errors[phase] = self.phase_errors.get(phase, 0) + 1
+                    if self.first_error is None:
+                        self.first_error = line.strip()
+                else:
+                    self.warnings += 1
+                    self.phase_warnings[phase] = self.phase_warnings.get(phase, 0) + 1
+                events.append(ParseEvent(kind, now, self.phase, line.strip()))
+        return events
+
+    def end_phase(self, now):
+        """Close the running phase, if any, and record its duration"""
+        if self.phase is None:
+            return []
+        phase = self.phase
+        self.durations[phase] = self.durations.get(phase, 0.0) + (now - self.phase_started)
+        self.phase = None
+        self.phase_started = None
+        return [ParseEvent('phase_end', now, phase, f"{phase} finished", self.durations[phase])]
+
+    def finish(self, now=None):
+        """Close the running phase when the process exits"""
+        return self.end_phase(time.time() if now is None else now)
+
+    def phase_elapsed(self, now=None):
+        """Seconds spent in the running phase so far"""
+        if self.phase is None:
+            return 0.0
+        return (time.time() if now is None else now) - self.phase_started
+
+
+def format_summary(parser, now=None):
+    """One-line status: running phase, finished phase times, error and warning counts"""
+    parts = []
+    for phase, seconds in parser.durations.items():
+        parts.append(f"{phase} {format_duration(seconds)}")
+    if parser.phase:
+        running = f"{parser.phase} {format_duration(parser.phase_elapsed(now))}..."
+        if parser.phase == 'cook' and parser.cook_progress:
+            running += " (%d/%d packages)" % parser.cook_progress
+        parts.append(running)
+    parts.append(f"{parser.errors} errors, {parser.warnings} warnings")
+    return " | ".join(parts)
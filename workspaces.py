@@ -0,0 +1,67 @@
+import os
+
+# UAT writes its own logs and those of the commandlets it runs (e.g. the cook) here
+UAT_LOG_FOLDER_ENV = 'uebp_LogFolder'
+# Lets an AutomationTool start while another one of the same engine runs, instead of exiting
+UAT_MUTEX_NO_WAIT_ENV = 'uebp_UATMutexNoWait'
+
+
+def workspace_dir(settings):
+    """Folder a Platform/Configuration of a project stages and logs into when jobs are isolated"""
+    project_dir = os.path.dirname(os.path.abspath(settings['Project']))
+    return os.path.join(project_dir, 'Saved', 'UECmd', f"{settings['Platform']}-{settings['Configuration']}")
+
+
+def isolate_settings(settings):
+    """Settings that stage into the run's own workspace when IsolateJobs is on"""
+    if not settings['IsolateJobs']:
+        return settings
+    return dict(settings, StagingDirectory=os.path.join(workspace_dir(settings), 'Staged'))
+
+
+def job_locks(working_dir, params):
+    """Shared resources a package job uses, as {lock: (shared, last BuildCookRun phase that uses it)}
+
+    Only one UnrealBuildTool runs per engine. A cook writes
+    Saved/Cooked/<platform>, which staging reads, so a cook holds that lock
+    alone through its stage, while runs that only stage share it. UAT
+    archives every configuration of a platform into the same folder. A
+    FastArchive copy happens after the job, and copystage serializes those
+    per destination itself, so it needs no lock here. Everything else lives
+    in the job's workspace. The scheduler lets go of a lock once the job's
+    output shows its last phase ended, so one run compiles while another
+    cooks.
+    """
+    project = os.path.normcase(os.path.abspath(params['Project']))
+    cook_lock = f"cook:{project}:{params['Platform']}"
+    locks = {}
+    if params['Build']:
+        locks[f"build:{os.path.normcase(os.path.abspath(working_dir))}"] = (False, 'build')
+    if params['Cook'] == 'cook':
+        locks[cook_lock] = (False, 'stage' if params['Stage'] else 'cook')
+    elif params['Stage']:
+        locks[cook_lock] = (True, 'stage')  # stages what an earlier cook left there
+    if params['Archive'] and params['ArchiveDirectory'].strip() and not params['FastArchive']:
+        locks[f"archive:{os.path.normcase(os.path.abspath(params['ArchiveDirectory'].strip()))}:"
+              f"{params['Platform']}"] = (False, 'archive')
+    return locks
+
+
+def isolate_job(job, working_dir):
+    """Give a package job its own UAT log folder and the locks of what it still shares
+
+    With those, the job no longer needs AutomationTool's own one-instance
+    mutex, so it is told not to wait on it. The folder is only created when
+    the job starts here, so building jobs (e.g. for a dry run) leaves the
+    project untouched.
+    """
+    if not job.params.get('IsolateJobs'):
+        return job
+    log_dir = os.path.join(workspace_dir(job.params), 'Logs', job.params.get('PipelineStep') or 'run')
+    job.env = {UAT_LOG_FOLDER_ENV: log_dir, UAT_MUTEX_NO_WAIT_ENV: '1'}
+    job.make_dirs = [log_dir]
+    locks = job_locks(working_dir, job.params)
+    job.locks = {lock for lock, (shared, _) in locks.items() if not shared}
+    job.shared_locks = {lock for lock, (shared, _) in locks.items() if shared}
+    job.lock_phases = {lock: phase for lock, (_, phase) in locks.items()}
+    return job